@@ -0,0 +1,176 @@
+import Logger
+import Events
+import math
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from Rental import Rental
+from Errors import InvalidEquipmentError
+
+logger = Logger.logger
+
+REVENUE, HOURS, COUNT = 0, 1, 2
+
+BUCKETS: Dict[str, Callable[[datetime], Any]] = {
+    'hour': lambda moment: moment.replace(minute=0, second=0, microsecond=0),
+    'day': lambda moment: moment.date(),
+    'week': lambda moment: moment.date() - timedelta(days=moment.weekday()),
+}
+
+STEPS: Dict[str, timedelta] = {'hour': timedelta(hours=1), 'day': timedelta(days=1), 'week': timedelta(weeks=1)}
+
+class RentalAggregates:
+    '''Текущие итоги выручки и часов аренды по типу, клиенту и интервалу времени.
+    В срезах по интервалу часы делятся между интервалами, которые аренда занимает, а выручка и количество
+    относятся к интервалу начала аренды (выручка признается при выдаче)'''
+    def __init__(self, bucket: str = 'day') -> None:
+        '''Конструктор агрегатов с заданной шириной интервала (hour, day, week)'''
+        if bucket not in BUCKETS:
+            raise InvalidEquipmentError(f"Неизвестный интервал агрегации: {bucket}")
+        self.__bucket_name = bucket
+        self.__bucket = BUCKETS[bucket]
+        self.__step = STEPS[bucket]
+        self.__totals: Dict[Tuple, List[float]] = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def bucket(self) -> str:
+        '''Геттер для ширины интервала'''
+        return self.__bucket_name
+
+    def bucket_of(self, moment: datetime) -> Any:
+        '''Ключ интервала для момента времени'''
+        return self.__bucket(moment)
+
+    @staticmethod
+    def cost_of(rental: Rental) -> float:
+        '''Учитываемая стоимость аренды: утвержденная, иначе расчетная'''
+        if rental.total_cost_approved is not None:
+            return rental.total_cost_approved
+        return rental.total_cost if rental.end_time is not None else 0.0
+
+    def __spans(self, start_time: datetime, old_hours: float, new_hours: float) -> Iterator[Tuple[Any, float]]:
+        '''Разбиение приращения часов [start + old_hours, start + new_hours) по интервалам (со знаком)'''
+        sign = 1.0
+        if new_hours < old_hours:
+            old_hours, new_hours, sign = new_hours, old_hours, -1.0
+        moment, end = start_time + timedelta(hours=old_hours), start_time + timedelta(hours=new_hours)
+        while moment < end:
+            bucket = self.__bucket(moment)
+            bucket_start = bucket if isinstance(bucket, datetime) else datetime.combine(bucket, time.min)
+            boundary = min(bucket_start + self.__step, end)
+            yield bucket, sign * (boundary - moment).total_seconds() / 3600
+            moment = boundary
+
+    def __add(self, rental: Rental, revenue: float, old_hours: float, new_hours: float, count: int) -> None:
+        '''Добавление приращений во все срезы аренды под блокировкой (подписчики вызываются из разных потоков)'''
+        equipment_type = type(rental.equipment).__name__.lower()
+        bucket = self.__bucket(rental.start_time)
+        hours = new_hours - old_hours
+        customer_id = rental.customer_info.customer_id
+        increments = [(('all',), revenue, hours, count), (('type', equipment_type), revenue, hours, count)
+                      , (('customer', customer_id), revenue, hours, count), (('bucket', bucket), revenue, 0.0, count)
+                      , (('type_bucket', equipment_type, bucket), revenue, 0.0, count)]
+        for span, span_hours in self.__spans(rental.start_time, old_hours, new_hours):
+            increments.append((('bucket', span), 0.0, span_hours, 0))
+            increments.append((('type_bucket', equipment_type, span), 0.0, span_hours, 0))
+        totals = self.__totals
+        with self.__lock:
+            for key, key_revenue, key_hours, key_count in increments:
+                entry = totals.get(key)
+                if entry is None:
+                    entry = totals[key] = [0.0, 0.0, 0]
+                entry[REVENUE] += key_revenue
+                entry[HOURS] += key_hours
+                entry[COUNT] += key_count
+
+    def on_confirmed(self, rental: Rental) -> None:
+        '''Учет подтвержденной аренды'''
+        self.__add(rental, self.cost_of(rental), 0.0, rental.hours, 1)
+
+    def on_changed(self, rental: Rental, old_hours: float, old_cost: Optional[float]) -> None:
+        '''Учет продления или завершения аренды разницей с прошлыми значениями'''
+        self.__add(rental, self.cost_of(rental) - (old_cost or 0.0), old_hours, rental.hours, 0)
+
+    def attach(self, bus: Events.EventBus = Events.bus) -> None:
+        '''Подписка на события аренды'''
+        bus.subscribe(Events.RENTAL_CONFIRMED, self.on_confirmed)
+        bus.subscribe(Events.RENTAL_EXTENDED, self.on_changed)
+        bus.subscribe(Events.RENTAL_CLOSED, self.on_changed)
+
+    def detach(self, bus: Events.EventBus = Events.bus) -> None:
+        '''Отписка от событий аренды'''
+        bus.unsubscribe(Events.RENTAL_CONFIRMED, self.on_confirmed)
+        bus.unsubscribe(Events.RENTAL_EXTENDED, self.on_changed)
+        bus.unsubscribe(Events.RENTAL_CLOSED, self.on_changed)
+
+    def __key(self, equipment_type: Optional[str], customer_id: Optional[str], moment) -> Tuple:
+        '''Ключ среза для запроса'''
+        bucket = self.__bucket(moment) if isinstance(moment, datetime) else moment
+        if customer_id is not None:
+            if equipment_type is not None or moment is not None:
+                raise InvalidEquipmentError("Срез по клиенту не сочетается с другими срезами")
+            return ('customer', customer_id)
+        if equipment_type is not None and moment is not None:
+            return ('type_bucket', equipment_type.lower(), bucket)
+        if equipment_type is not None:
+            return ('type', equipment_type.lower())
+        if moment is not None:
+            return ('bucket', bucket)
+        return ('all',)
+
+    def __metric(self, index: int, equipment_type, customer_id, moment) -> float:
+        '''Значение метрики среза за O(1)'''
+        entry = self.__totals.get(self.__key(equipment_type, customer_id, moment))
+        return entry[index] if entry is not None else 0
+
+    def revenue(self, equipment_type: Optional[str] = None, customer_id: Optional[str] = None
+                , moment: Optional[Any] = None) -> float:
+        '''Выручка по срезу (moment - время или ключ интервала)'''
+        return self.__metric(REVENUE, equipment_type, customer_id, moment)
+
+    def hours(self, equipment_type: Optional[str] = None, customer_id: Optional[str] = None
+              , moment: Optional[Any] = None) -> float:
+        '''Часы аренды по срезу'''
+        return self.__metric(HOURS, equipment_type, customer_id, moment)
+
+    def count(self, equipment_type: Optional[str] = None, customer_id: Optional[str] = None
+              , moment: Optional[Any] = None) -> int:
+        '''Количество аренд по срезу'''
+        return self.__metric(COUNT, equipment_type, customer_id, moment)
+
+    def utilization(self, equipment_type: str, moment: Any, units: int) -> float:
+        '''Доля занятого времени парка типа в интервале'''
+        start = self.__bucket(moment) if isinstance(moment, datetime) else moment
+        if isinstance(start, date) and not isinstance(start, datetime):
+            span = 24 * 7 if self.__bucket_name == 'week' else 24
+        else:
+            span = 1
+        return self.hours(equipment_type, moment=start) / (span * units) if units else 0.0
+
+    def snapshot(self) -> Dict[Tuple, Tuple[float, float, int]]:
+        '''Копия всех итогов'''
+        with self.__lock:
+            return {key: tuple(value) for key, value in self.__totals.items()}
+
+    @classmethod
+    def rebuild(cls, rentals: Iterable[Rental], bucket: str = 'day') -> 'RentalAggregates':
+        '''Пересчет агрегатов с нуля по списку аренд'''
+        aggregates = cls(bucket)
+        count = 0
+        for rental in rentals:
+            aggregates.on_confirmed(rental)
+            count += 1
+        logger.info("Агрегаты пересчитаны по %s арендам", count)
+        return aggregates
+
+    def verify(self, rentals: Iterable[Rental]) -> bool:
+        '''Сверка текущих итогов с пересчетом с нуля (обнулившиеся срезы равны отсутствующим)'''
+        expected = self.rebuild(rentals, self.__bucket_name).snapshot()
+        actual = self.snapshot()
+        for key in expected.keys() | actual.keys():
+            values, current = expected.get(key, (0.0, 0.0, 0)), actual.get(key, (0.0, 0.0, 0))
+            if any(not math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6) for a, b in zip(values, current)):
+                logger.warning("Расхождение агрегатов в срезе %s: %s != %s", key, current, values)
+                return False
+        return True
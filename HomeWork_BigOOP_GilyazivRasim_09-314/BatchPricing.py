@@ -0,0 +1,61 @@
+import Logger
+from typing import Dict, List, Sequence
+from SportsEquipment import SportEquipment
+from Tariffs import Tariff
+from Errors import InvalidEquipmentError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = Logger.logger
+
+class BatchPricing:
+    '''Пакетный расчет стоимости аренды для множества единиц и длительностей'''
+    @staticmethod
+    def group_by_class(equipment: Sequence[SportEquipment]) -> Dict[type, List[int]]:
+        '''Группировка позиций оборудования по классу (представления FleetStore - по классу их строки)'''
+        groups: Dict[type, List[int]] = {}
+        for position, unit in enumerate(equipment):
+            equipment_class = type(unit) if isinstance(unit, SportEquipment) else unit.equipment_class
+            groups.setdefault(equipment_class, []).append(position)
+        return groups
+
+    @staticmethod
+    def pricing_rule(equipment_class: type) -> Tariff:
+        '''Тариф класса оборудования'''
+        tariff = getattr(equipment_class, 'tariff', None)
+        if tariff is None:
+            logger.error("Для класса %s не задан тариф", equipment_class.__name__)
+            raise InvalidEquipmentError(f"Пакетный расчет не поддерживает {equipment_class.__name__}")
+        return tariff
+
+    @staticmethod
+    def quote(equipment: Sequence[SportEquipment], durations: Sequence[float]) -> List[List[float]]:
+        '''Матрица стоимостей: строка на единицу, столбец на длительность в часах'''
+        quotes: List[List[float]] = [None] * len(equipment)
+        hours = list(durations)
+        groups = BatchPricing.group_by_class(equipment)
+        for equipment_class, positions in groups.items():
+            multipliers = BatchPricing.pricing_rule(equipment_class).multipliers(hours)
+            rates = [equipment[position].hourly_rate for position in positions]
+            if np is not None:
+                rows = BatchPricing.__quote_numpy(rates, hours, multipliers)
+            else:
+                rows = BatchPricing.__quote_python(rates, hours, multipliers)
+            for position, row in zip(positions, rows):
+                quotes[position] = row
+        logger.debug("Пакетный расчет: %s единиц x %s длительностей, %s классов", len(equipment), len(hours), len(groups))
+        return quotes
+
+    @staticmethod
+    def __quote_numpy(rates: List[float], hours: List[float], multipliers: List[float]) -> List[List[float]]:
+        '''Векторизованный расчет одной группы через NumPy'''
+        costs = np.multiply.outer(np.asarray(rates, dtype=np.float64), np.asarray(hours, dtype=np.float64))
+        return (costs * np.asarray(multipliers, dtype=np.float64)).tolist()
+
+    @staticmethod
+    def __quote_python(rates: List[float], hours: List[float], multipliers: List[float]) -> List[List[float]]:
+        '''Расчет одной группы без NumPy (то же правило, без вызовов методов и логирования)'''
+        return [[rate * h * multiplier for h, multiplier in zip(hours, multipliers)] for rate in rates]
@@ -0,0 +1,806 @@
+import Logger
+import argparse
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import Locks
+import logging
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from EquipmentFactory import EquipmentFactory
+from EquipmentMeta import EquipmentMeta
+from Customer import Customer, registry
+from Rental import Rental
+from BatchPricing import BatchPricing
+from FleetStore import FleetStore, CustomerStore
+from Serialization import BinarySerializer
+from Ledger import RentalLedger, LedgerView
+from Aggregates import RentalAggregates
+from Simulation import SeasonSimulation
+from Tariffs import Tariff
+from LogIndex import LogIndex
+from Checkpoint import Checkpoint
+from RentalIds import IdGenerator
+from TimerWheel import TimerWheel
+from Waitlist import Waitlist
+from EquipmentCatalog import EquipmentCatalog
+from RentalProcess import OnlineRentalProcess, OfflineRentalProcess
+from Request import Request
+from Samples import EQUIPMENT_ARGS, build_fleet, build_rentals, fleet_rows
+from Chain_of_Responsibilities import Operator, Manager, Admin, ApprovalService, ApprovalEngine, approvals
+
+logger = Logger.logger
+
+@contextlib.contextmanager
+def quiet():
+    '''Отключение вывода в консоль и логирования на время замера (в текущем потоке, см. Logger.silenced)'''
+    with Logger.silenced(logging.CRITICAL), open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+        yield
+
+@contextlib.contextmanager
+def logging_to(path: str):
+    '''Запись логов только в указанный файл, print - в никуда'''
+    handlers = list(logger.handlers)
+    file_handler = logging.FileHandler(path, encoding='utf-8')
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(file_handler)
+    try:
+        with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+            yield
+    finally:
+        logger.removeHandler(file_handler)
+        file_handler.close()
+        for handler in handlers:
+            logger.addHandler(handler)
+
+def measure(func, repeat: int = 3) -> float:
+    '''Лучшее время выполнения функции из нескольких повторов'''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_batch_quotes(size: int = 3000, durations=(1, 2, 3, 4.5, 5, 6, 8, 24)) -> dict:
+    '''Сравнение BatchPricing.quote с циклом по Rental.calculate_total'''
+    fleet = build_fleet(size)
+    start_time = datetime(2025, 1, 1, 10)
+    with quiet():
+        customer = Customer('bench', 'Benchmark')
+        rentals = [[Rental('bench', customer, unit, start_time, start_time + timedelta(hours=hours))
+                    for hours in durations] for unit in fleet]
+
+    def loop():
+        for row in rentals:
+            for rental in row:
+                rental.invalidate_cost()
+                rental.calculate_total()
+
+    with quiet():
+        scalar = measure(loop)
+        batch = measure(lambda: BatchPricing.quote(fleet, durations))
+    return {'quotes': size * len(durations), 'loop_s': scalar, 'batch_s': batch, 'speedup': scalar / batch}
+
+def allocated(build) -> int:
+    '''Объем памяти, удерживаемой результатом build()'''
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+def bench_memory(size: int = 20000) -> dict:
+    '''Байт на единицу: объекты SportEquipment/Customer против FleetStore/CustomerStore'''
+    def objects():
+        rebuilt = build_fleet(size)
+        with quiet():
+            return rebuilt, [Customer(str(i), f'customer_{i}') for i in range(size)]
+
+    def compact():
+        store, customer_store = FleetStore(), CustomerStore()
+        for equipment_type, *args in fleet_rows(size):
+            store.append(EquipmentMeta.registry[equipment_type], *args)
+        for i in range(size):
+            customer_store.append(str(i), f'customer_{i}')
+        return store, customer_store
+
+    object_bytes = allocated(objects) / size
+    compact_bytes = allocated(compact) / size
+    return {'units': size, 'objects_bytes_per_unit': object_bytes
+            , 'compact_bytes_per_unit': compact_bytes, 'ratio': object_bytes / compact_bytes}
+
+class CountingStore:
+    '''Хранилище-счетчик для замера загрузки без удержания объектов'''
+    def __init__(self) -> None:
+        self.count = 0
+
+    def add(self, unit) -> None:
+        self.count += 1
+
+def bench_bulk_ingest(size: int = 50000, chunk_size: int = 5000) -> dict:
+    '''Поштучная загрузка JSONL через create_equipment против EquipmentFactory.load_file'''
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'inventory.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            for row in fleet_rows(size):
+                equipment_class = EquipmentMeta.registry[row[0]]
+                record = {key: value for (_, key, _, _), value in zip(equipment_class.schema(), row[1:])}
+                record['equipment_type'] = row[0]
+                file.write(json.dumps(record) + '\n')
+
+        def per_unit():
+            store = CountingStore()
+            for row in EquipmentFactory.read_jsonl(path):
+                equipment_type = row.pop('equipment_type')
+                store.add(EquipmentFactory.create_equipment(equipment_type, *row.values()))
+            return store
+
+        log_path = os.path.join(folder, 'system.log')
+        with logging_to(log_path):
+            single = measure(per_unit, repeat=1)
+            store = CountingStore()
+            bulk = measure(lambda: EquipmentFactory.load_file(path, store, chunk_size), repeat=1)
+        tracemalloc.start()
+        with quiet():
+            EquipmentFactory.load_file(path, CountingStore(), chunk_size)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {'units': store.count, 'per_unit_s': single, 'bulk_s': bulk
+            , 'speedup': single / bulk, 'bulk_peak_bytes': peak}
+
+def bench_serialization(size: int = 20000) -> dict:
+    '''JSON от to_dict()/from_dict против BinarySerializer: время (без логов и с записью логов в файл) и размер'''
+    rentals = build_rentals(build_fleet(size))
+
+    def json_round_trip():
+        lines = [json.dumps(rental.to_dict()) for rental in rentals]
+        decoded = [Rental.from_dict(json.loads(line)) for line in lines]
+        return sum(map(len, lines)) + len(lines), decoded
+
+    def binary_round_trip():
+        buffer = io.BytesIO()
+        BinarySerializer.dump_stream(rentals, buffer)
+        buffer.seek(0)
+        decoded = list(BinarySerializer.load_stream(buffer))
+        return len(buffer.getvalue()), decoded
+
+    with quiet():
+        json_bytes, _ = json_round_trip()
+        binary_bytes, _ = binary_round_trip()
+        json_s = measure(json_round_trip, repeat=1)
+        binary_s = measure(binary_round_trip, repeat=1)
+    with tempfile.TemporaryDirectory() as folder, logging_to(os.path.join(folder, 'system.log')):
+        json_logged_s = measure(json_round_trip, repeat=1)
+        binary_logged_s = measure(binary_round_trip, repeat=1)
+    return {'rentals': size, 'json_s': json_s, 'binary_s': binary_s, 'speedup': json_s / binary_s
+            , 'json_logged_s': json_logged_s, 'binary_logged_s': binary_logged_s
+            , 'logged_speedup': json_logged_s / binary_logged_s
+            , 'json_bytes': json_bytes, 'binary_bytes': binary_bytes, 'size_ratio': json_bytes / binary_bytes}
+
+def bench_ledger(size: int = 100000) -> dict:
+    '''Отчет по выручке и часам: обход объектов через to_dict() против чтения RentalLedger через mmap'''
+    rentals = build_rentals(build_fleet(size))
+    with quiet():
+        for rental in rentals:
+            rental.total_cost_approved = rental.total_cost
+
+    def object_scan():
+        revenue = hours = 0.0
+        for rental in rentals:
+            data = rental.to_dict()
+            revenue += rental.total_cost_approved
+            hours += (data['end_time'] - data['start_time']) / 3600
+        return revenue, hours
+
+    with tempfile.TemporaryDirectory() as folder, quiet():
+        with RentalLedger(os.path.join(folder, 'rentals.ledger')) as ledger:
+            ledger.append_many(rentals)
+            path = ledger.path
+
+        def ledger_scan():
+            with LedgerView(path) as view:
+                return view.revenue(), view.hours()
+
+        objects_s = measure(object_scan)
+        ledger_s = measure(ledger_scan)
+        file_bytes = os.path.getsize(path)
+    return {'rentals': size, 'objects_s': objects_s, 'ledger_s': ledger_s, 'speedup': objects_s / ledger_s
+            , 'ledger_bytes': file_bytes, 'scan_mb_per_s': file_bytes / ledger_s / 2 ** 20}
+
+def run_threads(count: int, target) -> None:
+    '''Запуск count потоков target(index) с общим стартом'''
+    barrier = threading.Barrier(count)
+
+    def worker(index):
+        with Logger.silenced(logging.CRITICAL):
+            barrier.wait()
+            target(index)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def bench_reservations(size: int = 20000, threads: int = 8) -> dict:
+    '''Пропускная способность параллельной аренды: блокировки по единицам против одной общей'''
+    with quiet():
+        customer = Customer('bench', 'bench')
+    start_time = datetime(2025, 1, 1, 10)
+    end_time = start_time + timedelta(hours=2)
+
+    def throughput(locks):
+        fleet = build_fleet(size)
+        previous, Locks.units = Locks.units, locks
+
+        def attempt(index):
+            for unit in fleet[index::threads]:
+                unit.rent_equipment(customer, start_time, end_time)
+
+        try:
+            with quiet():
+                begin = time.perf_counter()
+                run_threads(threads, attempt)
+                return size / (time.perf_counter() - begin)
+        finally:
+            Locks.units = previous
+
+    striped = throughput(Locks.StripedLock())
+    single = throughput(Locks.StripedLock(1))
+    return {'threads': threads, 'striped_per_s': striped
+            , 'single_lock_per_s': single, 'ratio': striped / single}
+
+def bench_async_rentals(size: int = 2000, sample: int = 100, delay: float = 0.01) -> dict:
+    '''Аренд в секунду: одновременные rent_equipment_async против поочередных при медленном согласовании менеджера'''
+    start_time = datetime(2025, 1, 1, 10)
+    end_time = start_time + timedelta(hours=3)
+    chain = Operator(Manager(Admin(), service=ApprovalService(delay)))
+
+    def processes(count):
+        customer = Customer('online', 'online')
+        return [OnlineRentalProcess(f'rent_{i}', customer, unit, start_time, end_time)
+                for i, unit in enumerate(build_fleet(count))]
+
+    async def concurrent(rentals):
+        return await asyncio.gather(*[rental.rent_equipment_async(Request('average', 100.0), chain)
+                                      for rental in rentals])
+
+    async def sequential(rentals):
+        return [await rental.rent_equipment_async(Request('average', 100.0), chain) for rental in rentals]
+
+    with quiet():
+        rentals = processes(size)
+        begin = time.perf_counter()
+        asyncio.run(concurrent(rentals))
+        concurrent_s = time.perf_counter() - begin
+        rentals = processes(sample)
+        begin = time.perf_counter()
+        asyncio.run(sequential(rentals))
+        sequential_s = time.perf_counter() - begin
+    return {'rentals': size, 'approval_delay_s': delay, 'concurrent_per_s': size / concurrent_s
+            , 'sequential_per_s': sample / sequential_s, 'speedup': (size / concurrent_s) / (sample / sequential_s)}
+
+def bench_approvals(size: int = 100000) -> dict:
+    '''Согласование запросов: новая цепочка Operator(Manager(Admin())) на каждый запрос против ApprovalEngine'''
+    rng = random.Random(0)
+    kinds = ['easy', 'average', 'hard']
+    with quiet():
+        requests = [Request(rng.choice(kinds), 100.0) for _ in range(size)]
+
+    def per_request_chain():
+        return [Operator(Manager(Admin())).handle_request(request) for request in requests]
+
+    engine = ApprovalEngine()
+
+    def compiled():
+        return engine.approve_batch(requests)
+
+    with tempfile.TemporaryDirectory() as folder, logging_to(os.path.join(folder, 'system.log')):
+        chain_s = measure(per_request_chain, repeat=1)
+        engine_s = measure(compiled, repeat=1)
+    return {'requests': size, 'chain_s': chain_s, 'engine_s': engine_s, 'speedup': chain_s / engine_s
+            , 'counters': engine.counters}
+
+def bench_aggregates(size: int = 100000, queries: int = 10000) -> dict:
+    '''Запрос "выручка по типу за день": пересчет calculate_total по всем арендам против RentalAggregates'''
+    rentals = build_rentals(build_fleet(size))
+    day = rentals[0].start_time
+    with quiet():
+        for rental in rentals:
+            rental.total_cost_approved = rental.total_cost
+
+        def recompute():
+            total = 0.0
+            for rental in rentals:
+                if type(rental.equipment).__name__.lower() == 'skis' and rental.start_time.date() == day.date():
+                    rental.invalidate_cost()
+                    total += rental.calculate_total()
+            return total
+
+        begin = time.perf_counter()
+        aggregates = RentalAggregates.rebuild(rentals)
+        update_s = (time.perf_counter() - begin) / size
+        recompute_s = measure(recompute, repeat=1)
+        query_s = measure(lambda: [aggregates.revenue('skis', moment=day) for _ in range(queries)]) / queries
+    return {'rentals': size, 'recompute_s': recompute_s, 'query_s': query_s, 'update_per_event_s': update_s
+            , 'speedup': recompute_s / query_s}
+
+def bench_cost_cache(size: int = 5000, passes: int = 20, changed: float = 0.1) -> dict:
+    '''Повторное чтение total_cost открытых аренд: версионный кэш против пересчета при каждом чтении'''
+    fleet = build_fleet(size)
+    rentals = build_rentals(fleet)
+    rng = random.Random(0)
+
+    def recompute():
+        for rental in rentals:
+            rental.invalidate_cost()
+            rental.total_cost
+
+    def cached():
+        for rental in rentals:
+            rental.total_cost
+
+    with quiet():
+        cached()
+        for unit in rng.sample(fleet, int(size * changed)):
+            unit.hourly_rate = unit.hourly_rate + 10
+        for rental in rng.sample(rentals, int(size * changed)):
+            rental.add_extra('insurance', 30.0)
+        recompute_s = measure(lambda: [recompute() for _ in range(passes)], repeat=1)
+        cached_s = measure(lambda: [cached() for _ in range(passes)], repeat=1)
+    return {'rentals': size, 'passes': passes, 'recompute_s': recompute_s, 'cached_s': cached_s
+            , 'speedup': recompute_s / cached_s}
+
+IMPORT_PROBE = '''
+import sys, time
+begin = time.perf_counter()
+import EquipmentFactory, RentalProcess
+from EquipmentMeta import EquipmentMeta
+if {eager}:
+    EquipmentMeta.load_all()
+elapsed = time.perf_counter() - begin
+print(elapsed, sum(EquipmentMeta.declared[name] in sys.modules for name in EquipmentMeta.declared))
+'''
+
+def bench_import_time(repeat: int = 7) -> dict:
+    '''Время запуска в новом процессе: ленивая загрузка типов оборудования против загрузки всех типов'''
+    folder = os.path.dirname(os.path.abspath(__file__))
+    environment = dict(os.environ, PYTHONPATH=folder + os.pathsep + os.environ.get('PYTHONPATH', ''))
+
+    def startup(eager):
+        best, loaded = float('inf'), 0
+        with tempfile.TemporaryDirectory() as workdir:
+            for _ in range(repeat):
+                output = subprocess.run([sys.executable, '-c', IMPORT_PROBE.format(eager=eager)], cwd=workdir
+                                        , env=environment, capture_output=True, text=True, check=True).stdout.split()
+                best, loaded = min(best, float(output[0])), int(output[1])
+        return best, loaded
+
+    lazy_s, lazy_modules = startup(False)
+    eager_s, eager_modules = startup(True)
+    return {'lazy_s': lazy_s, 'lazy_equipment_modules': lazy_modules, 'eager_s': eager_s
+            , 'eager_equipment_modules': eager_modules, 'saved_s': eager_s - lazy_s}
+
+def bench_customer_registry(size: int = 100000, customers: int = 500) -> dict:
+    '''Декодирование клиентов истории аренд: новый Customer на каждую аренду против реестра'''
+    rng = random.Random(0)
+    history = [json.dumps({'cutstomer_id': f'c{i}', 'name': f'Клиент {i}'})
+               for i in (rng.randrange(customers) for _ in range(size))]
+
+    def per_rental():
+        return [Customer(*json.loads(line).values()) for line in history]
+
+    def interned():
+        return [Customer.from_dict(json.loads(line)) for line in history]
+
+    with quiet():
+        per_rental_s = measure(per_rental, repeat=1)
+        registry.clear()
+        interned_s = measure(interned, repeat=1)
+        per_rental_bytes = allocated(per_rental)
+        registry.clear()
+        interned_bytes = allocated(interned)
+    with tempfile.TemporaryDirectory() as folder, logging_to(os.path.join(folder, 'system.log')):
+        per_rental_logged_s = measure(per_rental, repeat=1)
+        registry.clear()
+        interned_logged_s = measure(interned, repeat=1)
+    registry.clear()
+    return {'rentals': size, 'customers': customers, 'per_rental_s': per_rental_s, 'interned_s': interned_s
+            , 'speedup': per_rental_s / interned_s, 'per_rental_logged_s': per_rental_logged_s
+            , 'interned_logged_s': interned_logged_s, 'logged_speedup': per_rental_logged_s / interned_logged_s
+            , 'per_rental_bytes': per_rental_bytes, 'interned_bytes': interned_bytes
+            , 'memory_ratio': per_rental_bytes / interned_bytes}
+
+def bench_simulation(size: int = 20000, days: int = 30, demand: float = 2.0) -> dict:
+    '''Симуляция сезона: один процесс против пула процессов'''
+    workers = os.cpu_count() or 1
+    simulation = SeasonSimulation(fleet_rows(size), datetime(2025, 1, 1), days=days, demand=demand, seed=7)
+    with quiet():
+        start = time.perf_counter()
+        single = simulation.run(workers=1)
+        single_s = time.perf_counter() - start
+        start = time.perf_counter()
+        simulation.run(workers=max(workers, 2))
+        pooled_s = time.perf_counter() - start
+    requests = single['total']['requests']
+    return {'units': size, 'requests': requests, 'booked': single['total']['booked'], 'workers': max(workers, 2)
+            , 'cpus': workers, 'single_s': single_s, 'pooled_s': pooled_s, 'speedup': single_s / pooled_s
+            , 'requests_per_s': requests / pooled_s}
+
+def bench_tariffs(size: int = 200000) -> dict:
+    '''Расчет стоимости: ветвление по порогу (прежнее правило) против скомпилированного тарифа'''
+    rng = random.Random(0)
+    quotes = [(rng.randint(50, 300), rng.choice((0.5, 1, 2, 3, 4.5, 5, 6, 8, 24, 48))) for _ in range(size)]
+    tiered = Tariff([(3, 0.95), (5, 0.9), (24, 0.8), (48, 0.7)])
+    rules = [(48, 0.7), (24, 0.8), (5, 0.9), (3, 0.95)]
+
+    def rule(rate, hours):
+        for threshold, discount in rules:
+            if hours >= threshold:
+                return rate * hours * discount
+        return rate * hours
+
+    def branching():
+        return [rule(rate, hours) for rate, hours in quotes]
+
+    def compiled():
+        cost = tiered.cost
+        return [cost(rate, hours) for rate, hours in quotes]
+
+    branching_s = measure(branching)
+    compiled_s = measure(compiled)
+    return {'quotes': size, 'tiers': len(rules), 'branching_s': branching_s, 'compiled_s': compiled_s
+            , 'speedup': branching_s / compiled_s}
+
+def synthetic_log(path: str, lines: int, first: int = 0, seed: int = 0) -> None:
+    '''Лог в формате Logger с сообщениями о клиентах, инвентаре и арендах'''
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    templates = ("INFO - Создан клиент: Клиент {n} (ID: c{c})", "INFO - Создан инвентарь: unit_{e} (ID: {e})"
+                 , "INFO - Создана аренда: rent_{r} для клиента Клиент {c}", "DEBUG - Расчет общей стоимости аренды"
+                 , "INFO - Продление аренды rent_{r} до 2025-02-01 10:00:00", "WARNING - Попытка арендовать недоступный инвентарь: unit_{e}")
+    with open(path, 'a', encoding='utf-8') as file:
+        for n in range(first, first + lines):
+            moment = (start + timedelta(seconds=n)).strftime('%Y-%m-%d %H:%M:%S')
+            message = rng.choice(templates).format(n=n, c=rng.randrange(5000), e=rng.randrange(20000), r=rng.randrange(100000))
+            file.write(f"{moment} - equipment_system - {message}\n")
+
+def bench_log_index(lines: int = 400000, queries: int = 50) -> dict:
+    '''Поиск истории аренды: полный просмотр файлов лога против индекса; дозапись и ротация без переиндексации'''
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'system.log')
+        for number in (3, 2, 1):
+            synthetic_log(f'{path}.{number}', lines // 4, (3 - number) * (lines // 4), seed=number)
+        synthetic_log(path, lines // 4, 3 * (lines // 4))
+        rental_ids = [f'rent_{i}' for i in random.Random(1).sample(range(100000), queries)]
+
+        def scan(rental_id):
+            pattern = re.compile(rf'(?:Создана аренда:|Продление аренды) {rental_id} ')
+            found = []
+            for name in (f'{path}.3', f'{path}.2', f'{path}.1', path):
+                with open(name, encoding='utf-8') as file:
+                    found.extend(line.rstrip('\n') for line in file if pattern.search(line))
+            return found
+
+        index = LogIndex(path)
+        start = time.perf_counter()
+        index.update()
+        build_s = time.perf_counter() - start
+        index.save()
+        scan_s = measure(lambda: [scan(rental_id) for rental_id in rental_ids], repeat=1) / queries
+        query_s = measure(lambda: [list(index.query(rental_id=rental_id)) for rental_id in rental_ids]) / queries
+        log_bytes = sum(map(os.path.getsize, index.paths()))
+        index_bytes = os.path.getsize(index.index_path)
+        os.replace(f'{path}.2', f'{path}.3')
+        os.replace(f'{path}.1', f'{path}.2')
+        os.replace(path, f'{path}.1')
+        synthetic_log(path, 1000, lines, seed=9)
+        reopened = LogIndex(path)
+        start = time.perf_counter()
+        reopened.update()
+        incremental_s = time.perf_counter() - start
+    return {'lines': lines, 'build_s': build_s, 'scan_query_s': scan_s, 'index_query_s': query_s
+            , 'speedup': scan_s / query_s, 'incremental_1000_after_rotation_s': incremental_s
+            , 'log_bytes': log_bytes, 'index_bytes': index_bytes}
+
+def bench_checkpoint(size: int = 50000) -> dict:
+    '''Теплый рестарт: пересоздание состояния конструкторами (с записью логов) против снимка; пауза фонового снимка'''
+    rows = list(fleet_rows(size))
+    start_time = datetime(2025, 1, 1, 10)
+
+    def construct():
+        fleet = [EquipmentFactory.create_equipment(*row) for row in rows]
+        customers = [Customer(str(i), f'customer_{i}') for i in range(size // 10)]
+        rentals = [Rental(f'rent_{i}', customers[i % len(customers)], unit, start_time
+                          , start_time + timedelta(hours=1 + i % 12)) for i, unit in enumerate(fleet)]
+        return {'equipment': fleet, 'customers': customers, 'rentals': rentals}
+
+    with tempfile.TemporaryDirectory() as folder:
+        checkpoint = Checkpoint(os.path.join(folder, 'state.snapshot'))
+        with logging_to(os.path.join(folder, 'system.log')):
+            start = time.perf_counter()
+            state = construct()
+            construct_s = time.perf_counter() - start
+        with quiet():
+            for unit in state['equipment'][::7]:
+                unit.subscribe(lambda *change: None)
+            start = time.perf_counter()
+            snapshot_bytes = checkpoint.save(state)
+            save_s = time.perf_counter() - start
+            start = time.perf_counter()
+            checkpoint.load()
+            restore_s = time.perf_counter() - start
+            start = time.perf_counter()
+            checkpoint.save_in_background(state)
+            pause_s = time.perf_counter() - start
+            checkpoint.wait()
+    return {'units': size, 'construct_logged_s': construct_s, 'save_s': save_s, 'restore_s': restore_s
+            , 'speedup': construct_s / restore_s, 'background_pause_s': pause_s, 'snapshot_bytes': snapshot_bytes}
+
+def bench_rental_ids(size: int = 200000, rentals: int = 50000) -> dict:
+    '''Генератор ID аренд: скорость и выборка "созданные между t1 и t2" по диапазону ключей'''
+    generator = IdGenerator(worker_id=5)
+    single_s = measure(lambda: [generator.next_rental_id() for _ in range(size)])
+    batch_s = measure(lambda: generator.rental_ids(size))
+    clock = iter(range(1750000000 * 10 ** 9, 1760000000 * 10 ** 9, 10 ** 7))
+    timed = IdGenerator(worker_id=5, clock=lambda: next(clock))
+    fleet = build_fleet(100)
+    with quiet():
+        customer = Customer('ids', 'Range scan')
+        history = [Rental(timed.next_rental_id(), customer, fleet[i % len(fleet)], datetime(2025, 1, 1)
+                          , datetime(2025, 1, 1, 2)) for i in range(rentals)]
+    start_time = IdGenerator.created_at(history[rentals // 3].rental_id)
+    end_time = IdGenerator.created_at(history[rentals // 3 + 500].rental_id)
+
+    def full_filter():
+        return [rental for rental in history if start_time <= IdGenerator.created_at(rental.rental_id) <= end_time]
+
+    def range_scan():
+        return IdGenerator.created_between(history, start_time, end_time)
+
+    filter_s = measure(full_filter, repeat=1)
+    scan_s = measure(range_scan)
+    return {'ids': size, 'ids_per_s': size / single_s, 'batch_ids_per_s': size / batch_s
+            , 'rentals': rentals, 'matched': len(range_scan()), 'filter_s': filter_s, 'range_scan_s': scan_s
+            , 'speedup': filter_s / scan_s}
+
+def bench_timer_wheel(size: int = 1000000, horizon: int = 30 * 86400) -> dict:
+    '''Колесо таймеров: постановка, отмена и срабатывание 1M ожидающих возвратов против опроса всех аренд'''
+    rng = random.Random(24)
+    origin = 1750000000.0
+    deadlines = [origin + rng.uniform(1, horizon) for _ in range(size)]
+    fired = [0]
+
+    def expire():
+        fired[0] += 1
+
+    wheel = TimerWheel(start=origin)
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        timers = [wheel.schedule(deadline, expire) for deadline in deadlines]
+        schedule_s = time.perf_counter() - start
+        cancelled = timers[::10]
+        start = time.perf_counter()
+        for timer in cancelled:
+            wheel.cancel(timer)
+        cancel_s = time.perf_counter() - start
+        start = time.perf_counter()
+        [deadline for deadline in deadlines if deadline <= origin + 60]
+        poll_s = time.perf_counter() - start
+        start = time.perf_counter()
+        wheel.advance(origin + horizon + 1)
+        advance_s = time.perf_counter() - start
+    finally:
+        gc.enable()
+    return {'timers': size, 'schedule_ns': schedule_s / size * 1e9, 'cancel_ns': cancel_s / len(cancelled) * 1e9
+            , 'advance_s': advance_s, 'fired_per_s': fired[0] / advance_s, 'poll_scan_per_tick_s': poll_s}
+
+def bench_waitlist(units: int = 1500, requests: int = 20000) -> dict:
+    '''Лист ожидания в пиковый день: назначение освободившихся единиц через кучи против перебора всех заявок'''
+    rng = random.Random(25)
+    opening = datetime(2025, 1, 1, 10)
+    types = list(EQUIPMENT_ARGS)
+    with quiet():
+        customers = [Customer(f'waiting_{i}', f'waiting_{i}') for i in range(100)]
+    demand = []
+    for i in range(requests):
+        start_time = opening + timedelta(minutes=30 * rng.randint(0, 16))
+        demand.append((customers[i % len(customers)], types[i % len(types)], start_time
+                       , start_time + timedelta(hours=rng.randint(1, 8)), rng.uniform(100, 2400)))
+
+    def occupied_fleet():
+        fleet = build_fleet(units)
+        return [unit.rent_equipment(customers[0], opening - timedelta(hours=3), opening - timedelta(hours=1))
+                for unit in fleet]
+
+    def heap_run():
+        with Logger.silenced(logging.CRITICAL):
+            taken = occupied_fleet()
+            waitlist = Waitlist(clock=lambda: opening - timedelta(hours=1))
+            for rental in taken:
+                waitlist.watch(rental.equipment)
+            start = time.perf_counter()
+            tickets = [waitlist.request(*row) for row in demand]
+            enqueue_s = time.perf_counter() - start
+            start = time.perf_counter()
+            for rental in taken:
+                rental.close()
+            serve_s = time.perf_counter() - start
+        return tickets, enqueue_s, serve_s
+
+    def scan_run():
+        with Logger.silenced(logging.CRITICAL):
+            taken = occupied_fleet()
+            pending = [(-Waitlist.max_rate(row[1], (row[3] - row[2]).total_seconds() / 3600, row[4], None)
+                        , row[2], i, row) for i, row in enumerate(demand)]
+            served = []
+            start = time.perf_counter()
+            for rental in taken:
+                rental.close()
+                unit = rental.equipment
+                kind = EquipmentCatalog.equipment_type(unit)
+                best = None
+                for index, item in enumerate(pending):
+                    if item[3][1] == kind and -item[0] >= unit.hourly_rate and (best is None or item < pending[best]):
+                        best = index
+                if best is not None:
+                    customer, _, start_time, end_time, _ = pending.pop(best)[3]
+                    process = OnlineRentalProcess(f'scan_{len(served)}', customer, unit, start_time, end_time)
+                    served.append((unit.equipment_id, customer.customer_id, start_time, process.rent_equipment().end_time))
+            serve_s = time.perf_counter() - start
+        return served, serve_s
+
+    tickets, enqueue_s, heap_s = heap_run()
+    assigned = sum(ticket.rental is not None for ticket in tickets)
+    _, scan_s = scan_run()
+    return {'units': units, 'requests': requests, 'assigned': assigned, 'enqueue_us': enqueue_s / requests * 1e6
+            , 'heap_serve_s': heap_s, 'scan_serve_s': scan_s, 'speedup': scan_s / heap_s}
+
+BENCHMARKS = {
+    'batch_quotes': bench_batch_quotes,
+    'memory': bench_memory,
+    'bulk_ingest': bench_bulk_ingest,
+    'serialization': bench_serialization,
+    'ledger': bench_ledger,
+    'reservations': bench_reservations,
+    'async_rentals': bench_async_rentals,
+    'approvals': bench_approvals,
+    'aggregates': bench_aggregates,
+    'cost_cache': bench_cost_cache,
+    'import_time': bench_import_time,
+    'customer_registry': bench_customer_registry,
+    'simulation': bench_simulation,
+    'tariffs': bench_tariffs,
+    'log_index': bench_log_index,
+    'checkpoint': bench_checkpoint,
+    'rental_ids': bench_rental_ids,
+    'timer_wheel': bench_timer_wheel,
+    'waitlist': bench_waitlist,
+}
+
+SUITE_SIZES = (1000, 10000)
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+def per_operation(setup, run, size: int, repeat: int = 5) -> float:
+    '''Лучшее время одной операции без сборщика мусора: setup(size) не входит в замер, run(state) - size операций'''
+    best = float('inf')
+    for _ in range(repeat if size <= 100000 else 1):
+        with quiet():
+            state = setup(size)
+            gc.collect()
+            gc.disable()
+            try:
+                begin = time.perf_counter()
+                run(state)
+                best = min(best, time.perf_counter() - begin)
+            finally:
+                gc.enable()
+    return best / size
+
+def suite_processes(process_class, size: int):
+    '''Процессы аренды для каждой единицы нового парка'''
+    start_time = datetime(2025, 1, 1, 10)
+    customer = Customer('suite', 'suite')
+    return [process_class(f'rent_{i}', customer, unit, start_time, start_time + timedelta(hours=1 + i % 8))
+            for i, unit in enumerate(build_fleet(size))]
+
+def suite_requests(size: int):
+    '''Запросы на изменение цены всех типов'''
+    kinds = ('easy', 'average', 'hard')
+    return [Request(kinds[i % 3], 100.0) for i in range(size)]
+
+def reset_costs(rentals):
+    '''Аренды со сброшенным кэшем стоимости'''
+    for rental in rentals:
+        rental.invalidate_cost()
+    return rentals
+
+HOT_PATHS = {
+    'create_equipment': (lambda size: list(fleet_rows(size))
+                         , lambda rows: [EquipmentFactory.create_equipment(*row) for row in rows]),
+    'rent_equipment': (lambda size: (build_fleet(size), Customer('suite', 'suite'))
+                       , lambda state: [unit.rent_equipment(state[1], datetime(2025, 1, 1, 10)) for unit in state[0]]),
+    'online_rental': (lambda size: suite_processes(OnlineRentalProcess, size)
+                      , lambda processes: [process.rent_equipment() for process in processes]),
+    'offline_rental': (lambda size: suite_processes(OfflineRentalProcess, size)
+                       , lambda processes: [process.rent_equipment() for process in processes]),
+    'calculate_total': (lambda size: reset_costs(build_rentals(build_fleet(size)))
+                        , lambda rentals: [rental.calculate_total() for rental in rentals]),
+    'dict_round_trip': (lambda size: build_rentals(build_fleet(size))
+                        , lambda rentals: [Rental.from_dict(rental.to_dict()) for rental in rentals]),
+    'approval_chain': (suite_requests
+                       , lambda requests: [approvals.approve(request) for request in requests]),
+}
+
+def run_suite(sizes=SUITE_SIZES, paths=None, repeat: int = 5) -> dict:
+    '''Время одной операции горячих путей для каждого размера парка'''
+    results = {}
+    for name in paths or HOT_PATHS:
+        setup, run = HOT_PATHS[name]
+        results[name] = {str(size): per_operation(setup, run, size, repeat) for size in sizes}
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    '''Регрессии: пути и размеры, где время выросло больше чем на threshold'''
+    regressions = []
+    for name, timings in results.items():
+        for size, seconds in timings.items():
+            reference = baseline.get(name, {}).get(size)
+            if reference is not None and seconds > reference * (1 + threshold):
+                regressions.append((name, size, reference, seconds))
+    return regressions
+
+def suite_main(args) -> int:
+    '''Запуск набора, сравнение с базовой линией и обновление JSON'''
+    sizes = tuple(int(size) for size in args.sizes.split(','))
+    results = run_suite(sizes, args.paths or None, args.repeat)
+    for name, timings in results.items():
+        print(name, {size: f'{seconds * 1e6:.2f} us' for size, seconds in timings.items()})
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file).get('results', {})
+    regressions = compare(results, baseline, args.threshold)
+    for name, size, reference, seconds in regressions:
+        print(f'REGRESSION {name}[{size}]: {reference * 1e6:.2f} us -> {seconds * 1e6:.2f} us')
+    if args.update or not baseline:
+        for name, timings in results.items():
+            baseline.setdefault(name, {}).update(timings)
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump({'python': platform.python_version(), 'results': baseline}, file, indent=2, sort_keys=True)
+        print('Базовая линия сохранена в', args.baseline)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замеры производительности системы аренды')
+    parser.add_argument('names', nargs='*', help='отдельные замеры из BENCHMARKS (по умолчанию все)')
+    parser.add_argument('--suite', action='store_true', help='набор горячих путей с проверкой регрессий')
+    parser.add_argument('--paths', nargs='*', choices=list(HOT_PATHS), help='горячие пути набора')
+    parser.add_argument('--sizes', default=','.join(map(str, SUITE_SIZES)), help='размеры парка, например 1000,1000000')
+    parser.add_argument('--repeat', type=int, default=5, help='повторов на размер до 100k (берется лучший)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='локальный JSON с базовой линией (создается при первом запуске, в git не хранится)')
+    parser.add_argument('--threshold', type=float, default=0.25, help='допустимый рост времени (0.25 = 25%%)')
+    parser.add_argument('--update', action='store_true', help='записать результаты в базовую линию')
+    arguments = parser.parse_args()
+    if arguments.suite:
+        sys.exit(suite_main(arguments))
+    for name in arguments.names or list(BENCHMARKS):
+        print(name, BENCHMARKS[name]())
@@ -0,0 +1,56 @@
+import Logger
+from typing import Dict, Any
+from SportsEquipment import SportEquipment
+from Tariffs import Tariff
+
+logger = Logger.logger
+
+class Bicycle(SportEquipment):
+    '''Класс велосипеда'''
+    type_code = 1
+    tariff = Tariff([(5, 0.92)])
+    field_aliases = {'bike_type': 'type'}
+
+    def __init__(self, equipment_id: str, name: str, condition: str
+                 , hourly_rate: float, bike_type: str, is_available: bool = True) -> None:
+        '''Конструктор велосипеда'''
+        super().__init__(equipment_id, name, condition, hourly_rate, is_available)
+        self.__type = bike_type
+        logger.info("Создан велосипед: %s (Тип: %s)", name, bike_type)
+
+    @property
+    def type(self) -> str:
+        '''Геттер для типа велосипеда'''
+        return self.__type
+
+    @type.setter
+    def type(self, new: str) -> None:
+        '''Сеттер для типа велосипеда'''
+        logger.debug("Изменение типа велосипеда с %s на %s", self.__type, type)
+        self.__type = type
+
+    def calculate_rental_cost(self, hours: float) -> float:
+        '''Расчет стоимости аренды велосипеда по тарифу класса'''
+        logger.debug("Расчет стоимости аренды велосипеда на %s часов", hours)
+        return self.tariff.cost(self.hourly_rate, hours)
+
+    def __str__(self) -> str:
+        '''Строковое представление велосипеда'''
+        return f"Велосипед: {self.name}, Тип: {self.__type}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''Преобразование велосипеда в словарь'''
+        return {
+            'equipment_id': self.equipment_id,
+            'name': self.name,
+            'condition': self.condition,
+            'hourly_rate': self.hourly_rate,
+            'type': self.type,
+            'is_available': self.is_available
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Bicycle':
+        '''Создание велосипеда из словаря'''
+        logger.debug("Создание Bicycle из словаря: %s", data)
+        return cls(*data.values())
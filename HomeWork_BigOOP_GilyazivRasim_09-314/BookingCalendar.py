@@ -0,0 +1,243 @@
+import Logger
+import Events
+import Locks
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from SportsEquipment import SportEquipment
+from Errors import InvalidEquipmentError, RentalNotFoundError
+
+logger = Logger.logger
+
+Booking = Tuple[datetime, datetime, str]
+
+class SortedChunks:
+    '''Сортированный список из блоков ограниченной длины: вставка и удаление за O(log n + LOAD), а не O(n)'''
+    LOAD = 256
+
+    def __init__(self, key: Callable[[Any], Any]) -> None:
+        '''Конструктор пустого списка; key - ключ поиска, согласованный с порядком элементов'''
+        self.__key = key
+        self.__chunks: List[list] = []
+        self.__firsts: list = []
+        self.__size = 0
+
+    def __len__(self) -> int:
+        '''Количество элементов'''
+        return self.__size
+
+    def __iter__(self) -> Iterator[Any]:
+        '''Элементы по возрастанию'''
+        return chain.from_iterable(self.__chunks)
+
+    def add(self, item: Any) -> None:
+        '''Вставка элемента с делением переполненного блока'''
+        if not self.__chunks:
+            self.__chunks.append([item])
+            self.__firsts.append(item)
+        else:
+            index = max(bisect_right(self.__firsts, item) - 1, 0)
+            chunk = self.__chunks[index]
+            insort(chunk, item)
+            self.__firsts[index] = chunk[0]
+            if len(chunk) > 2 * self.LOAD:
+                self.__chunks[index:index + 1] = [chunk[:self.LOAD], chunk[self.LOAD:]]
+                self.__firsts[index:index + 1] = [chunk[0], chunk[self.LOAD]]
+        self.__size += 1
+
+    def remove(self, item: Any) -> None:
+        '''Удаление элемента (ValueError, если его нет)'''
+        index = bisect_right(self.__firsts, item) - 1
+        chunk = self.__chunks[index] if index >= 0 else []
+        position = bisect_left(chunk, item)
+        if position == len(chunk) or chunk[position] != item:
+            raise ValueError(item)
+        del chunk[position]
+        if chunk:
+            self.__firsts[index] = chunk[0]
+        else:
+            del self.__chunks[index]
+            del self.__firsts[index]
+        self.__size -= 1
+
+    def last(self) -> Optional[Any]:
+        '''Наибольший элемент'''
+        return self.__chunks[-1][-1] if self.__chunks else None
+
+    def last_upto(self, key: Any) -> Optional[Any]:
+        '''Последний элемент с ключом <= key'''
+        index = bisect_right(self.__firsts, key, key=self.__key) - 1
+        if index < 0:
+            return None
+        chunk = self.__chunks[index]
+        return chunk[bisect_right(chunk, key, key=self.__key) - 1]
+
+    def first_after(self, key: Any) -> Optional[Any]:
+        '''Первый элемент с ключом > key'''
+        index = bisect_right(self.__firsts, key, key=self.__key) - 1
+        if index >= 0:
+            chunk = self.__chunks[index]
+            position = bisect_right(chunk, key, key=self.__key)
+            if position < len(chunk):
+                return chunk[position]
+        return self.__chunks[index + 1][0] if index + 1 < len(self.__chunks) else None
+
+    def split(self, key: Any) -> Tuple[Iterator[Any], Iterator[Any]]:
+        '''Элементы с ключом <= key и остальные (двоичный поиск границы)'''
+        index = bisect_right(self.__firsts, key, key=self.__key) - 1
+        if index < 0:
+            return iter(()), iter(self)
+        chunk = self.__chunks[index]
+        position = bisect_right(chunk, key, key=self.__key)
+        head = chain(chain.from_iterable(self.__chunks[:index]), chunk[:position])
+        return head, chain(chunk[position:], chain.from_iterable(self.__chunks[index + 1:]))
+
+class UnitCalendar:
+    '''Календарь бронирований одной единицы инвентаря'''
+    def __init__(self) -> None:
+        '''Конструктор календаря единицы'''
+        self.__bookings = SortedChunks(itemgetter(0))
+
+    def __len__(self) -> int:
+        '''Количество бронирований'''
+        return len(self.__bookings)
+
+    @property
+    def free_from(self) -> datetime:
+        '''Момент, с которого единица свободна бессрочно (конец последнего бронирования)'''
+        last = self.__bookings.last()
+        return datetime.min if last is None else last[1]
+
+    def __overlaps(self, start_time: datetime, end_time: datetime) -> bool:
+        '''Пересечение интервала с соседними бронированиями'''
+        previous = self.__bookings.last_upto(start_time)
+        if previous is not None and previous[1] > start_time:
+            return True
+        following = self.__bookings.first_after(start_time)
+        return following is not None and following[0] < end_time
+
+    def is_free(self, start_time: datetime, end_time: datetime) -> bool:
+        '''Проверка отсутствия пересечений с интервалом [start_time, end_time) за O(log n)'''
+        with Locks.units.get(id(self)):
+            return not self.__overlaps(start_time, end_time)
+
+    def book(self, start_time: datetime, end_time: datetime, rental_id: str) -> None:
+        '''Добавление бронирования с проверкой пересечений за O(log n)'''
+        if end_time <= start_time:
+            logger.error("Некорректный интервал бронирования: %s - %s", start_time, end_time)
+            raise InvalidEquipmentError("Время окончания бронирования раньше времени начала")
+        with Locks.units.get(id(self)):
+            if self.__overlaps(start_time, end_time):
+                raise RentalNotFoundError("Инвентарь уже забронирован на это время")
+            self.__bookings.add((start_time, end_time, rental_id))
+
+    def cancel(self, start_time: datetime) -> str:
+        '''Отмена бронирования, начинающегося в start_time'''
+        with Locks.units.get(id(self)):
+            booking = self.__bookings.last_upto(start_time)
+            if booking is None or booking[0] != start_time:
+                raise RentalNotFoundError("Бронирование не найдено")
+            self.__bookings.remove(booking)
+            return booking[2]
+
+    def bookings(self) -> List[Booking]:
+        '''Список бронирований в порядке начала'''
+        with Locks.units.get(id(self)):
+            return list(self.__bookings)
+
+class BookingCalendar:
+    '''Календарь бронирований парка инвентаря'''
+    def __init__(self) -> None:
+        '''Конструктор календаря парка'''
+        self.__units: Dict[str, UnitCalendar] = {}
+        self.__by_type: Dict[str, Dict[str, SportEquipment]] = {}
+        self.__types: Dict[str, str] = {}
+        self.__free_from: Dict[str, datetime] = {}
+        self.__free_index: Dict[str, SortedChunks] = {}
+        self.__lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        '''Состояние для pickle (снимки Checkpoint) без блокировки'''
+        with self.__lock:
+            state = self.__dict__.copy()
+        del state['_BookingCalendar__lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        '''Восстановление из pickle с новой блокировкой'''
+        self.__dict__.update(state)
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def end_or_open(end_time: Optional[datetime]) -> datetime:
+        '''Аренда без времени окончания занимает инвентарь бессрочно'''
+        return datetime.max if end_time is None else end_time
+
+    def register(self, equipment: SportEquipment) -> None:
+        '''Регистрация единицы инвентаря в календаре'''
+        equipment_type = type(equipment).__name__.lower()
+        equipment_id = equipment.equipment_id
+        calendar = self.__units.setdefault(equipment_id, UnitCalendar())
+        self.__by_type.setdefault(equipment_type, {})[equipment_id] = equipment
+        with self.__lock:
+            if equipment_id not in self.__types:
+                self.__types[equipment_id] = equipment_type
+                self.__free_from[equipment_id] = calendar.free_from
+                self.__free_index.setdefault(equipment_type, SortedChunks(itemgetter(0))).add(
+                    (calendar.free_from, equipment_id))
+        logger.debug("Инвентарь %s добавлен в календарь бронирований", equipment_id)
+
+    def unit(self, equipment_id: str) -> UnitCalendar:
+        '''Календарь конкретной единицы (бронировать через BookingCalendar.book, иначе индекс свободных устареет)'''
+        calendar = self.__units.get(equipment_id)
+        if calendar is None:
+            logger.error("Инвентарь с ID %s не зарегистрирован в календаре", equipment_id)
+            raise InvalidEquipmentError(f"Инвентарь с ID {equipment_id} не зарегистрирован в календаре")
+        return calendar
+
+    def __reindex(self, equipment_id: str) -> None:
+        '''Обновление позиции единицы в индексе "свободна бессрочно с момента"'''
+        with self.__lock:
+            old, new = self.__free_from[equipment_id], self.__units[equipment_id].free_from
+            if old != new:
+                index = self.__free_index[self.__types[equipment_id]]
+                index.remove((old, equipment_id))
+                index.add((new, equipment_id))
+                self.__free_from[equipment_id] = new
+
+    def is_free(self, equipment_id: str, start_time: datetime, end_time: Optional[datetime] = None) -> bool:
+        '''Проверка свободности единицы на интервале'''
+        return self.unit(equipment_id).is_free(start_time, self.end_or_open(end_time))
+
+    def book(self, equipment_id: str, start_time: datetime, end_time: Optional[datetime], rental_id: str) -> None:
+        '''Бронирование единицы на интервал'''
+        self.unit(equipment_id).book(start_time, self.end_or_open(end_time), rental_id)
+        self.__reindex(equipment_id)
+        logger.info("Инвентарь %s забронирован с %s по %s", equipment_id, start_time, end_time)
+
+    def cancel(self, equipment_id: str, start_time: datetime) -> str:
+        '''Отмена бронирования единицы с оповещением BOOKING_CANCELLED (календарь, единица, начало, ID аренды)'''
+        rental_id = self.unit(equipment_id).cancel(start_time)
+        self.__reindex(equipment_id)
+        logger.info("Отменено бронирование %s инвентаря %s", rental_id, equipment_id)
+        equipment = self.__by_type[self.__types[equipment_id]][equipment_id]
+        Events.bus.emit(Events.BOOKING_CANCELLED, self, equipment, start_time, rental_id)
+        return rental_id
+
+    def free_units(self, equipment_type: str, start_time: datetime
+                   , end_time: Optional[datetime] = None) -> List[SportEquipment]:
+        '''Единицы заданного типа, свободные на всем интервале: свободные бессрочно к start_time берутся
+        из индекса за O(log n + k), у забронированных позже start_time проверяются окна за O(log n) на единицу'''
+        end_time = self.end_or_open(end_time)
+        units = self.__by_type.get(equipment_type.lower(), {})
+        with self.__lock:
+            index = self.__free_index.get(equipment_type.lower())
+            if index is None:
+                return []
+            ready, later = index.split(start_time)
+            ready, later = [equipment_id for _, equipment_id in ready], [equipment_id for _, equipment_id in later]
+        return [units[equipment_id] for equipment_id in ready] + [
+            units[equipment_id] for equipment_id in later if self.__units[equipment_id].is_free(start_time, end_time)]
@@ -1,4 +1,7 @@
 import Logger
+import Metrics
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
 from abc import ABC, abstractmethod
 from Errors import PermissionDeniedError
 
@@ -9,66 +12,234 @@ def check_permissions(required_permission):
     def decorator(func):
         def wrapper(self, *args, **kwargs):
             if required_permission > self.access:
-                logger.warning(f"Попытка выполнить действие без достаточных прав (Требуется: {required_permission}, Имеется: {self.access})")
+                logger.warning("Попытка выполнить действие без достаточных прав (Требуется: %s, Имеется: %s)", required_permission, self.access)
+                Metrics.count('permission_checks_total', outcome='denied')
                 raise PermissionDeniedError
+            Metrics.count('permission_checks_total', outcome='allowed')
             return func(self, *args, **kwargs)
         return wrapper
     return decorator
 
 class ChangeHandler(ABC):
     '''Абстрактный класс обработчика запросов'''
-    def __init__(self, next=None):
-        '''Конструктор обработчика'''
+    title = 'Обработчик'
+    metric = 'handler'
+    approves: Optional[tuple] = ()
+
+    def __init__(self, next=None, service=None):
+        '''Конструктор обработчика (service - асинхронный сервис согласования)'''
         self._next = next
+        self._service = service
 
     @abstractmethod
     def handle_request(self, request):
         '''Абстрактный метод обработки запроса'''
         pass
 
+    def can_approve(self, request) -> bool:
+        '''Проверка полномочий на запрос по типам approves (None - любые типы)'''
+        return self.approves is None or request.type in self.approves
+
+    async def handle_request_async(self, request):
+        '''Асинхронная обработка запроса: ожидание сервиса согласования не блокирует другие аренды'''
+        if self.can_approve(request):
+            if self._service is None or await self._service.review(self, request):
+                logger.info("%s одобрил запрос типа %s", self.title, request.type)
+                request.approved = True
+                return True
+        if self._next:
+            return await self._next.handle_request_async(request)
+        logger.warning("%s не смог обработать запрос типа %s", self.title, request.type)
+        return False
+
 class Operator(ChangeHandler):
     '''Класс оператора'''
+    title = 'Оператор'
+    metric = 'operator'
+    approves = ('easy',)
+
+    @Metrics.instrument('approval_handler', handler='operator')
     def handle_request(self, request):
         '''Обработка запроса оператором'''
-        if request.type == 'easy':
-            logger.info(f"Оператор одобрил запрос типа {request.type}")
+        if self.can_approve(request):
+            logger.info("Оператор одобрил запрос типа %s", request.type)
             request.approved = True
             return True
         elif self._next:
             return self._next.handle_request(request)
-        logger.warning(f"Оператор не смог обработать запрос типа {request.type}")
+        logger.warning("Оператор не смог обработать запрос типа %s", request.type)
         return False
 
 class Manager(ChangeHandler):
     '''Класс менеджера'''
+    title = 'Менеджер'
+    metric = 'manager'
+    approves = ('easy', 'average')
+
+    @Metrics.instrument('approval_handler', handler='manager')
     def handle_request(self, request):
         '''Обработка запроса менеджером'''
-        if (request.type == 'easy' or request.type == 'average'):
-            logger.info(f"Менеджер одобрил запрос типа {request.type}")
+        if self.can_approve(request):
+            logger.info("Менеджер одобрил запрос типа %s", request.type)
             request.approved = True
             return True
         elif self._next:
             return self._next.handle_request(request)
-        logger.warning(f"Менеджер не смог обработать запрос типа {request.type}")
+        logger.warning("Менеджер не смог обработать запрос типа %s", request.type)
         return False
 
 class Admin(ChangeHandler):
     '''Класс администратора'''
+    title = 'Администратор'
+    metric = 'admin'
+    approves = None
+
+    @Metrics.instrument('approval_handler', handler='admin')
     def handle_request(self, request):
         '''Обработка запроса администратором'''
-        logger.info(f"Администратор одобрил запрос типа {request.type}")
+        logger.info("Администратор одобрил запрос типа %s", request.type)
+        request.approved = True
+        return True
+
+class ApprovalEngine:
+    '''Цепочка обработчиков, скомпилированная в таблицу "тип запроса -> одобряющий уровень" (при переопределенном handle_request - через цепочку)'''
+    STOCK = (Operator.handle_request, Manager.handle_request, Admin.handle_request)
+
+    def __init__(self, chain: Optional[ChangeHandler] = None) -> None:
+        '''Однократный обход цепочки и построение таблицы'''
+        self.__levels: List[ChangeHandler] = []
+        handler = chain if chain is not None else Operator(Manager(Admin()))
+        while handler is not None:
+            self.__levels.append(handler)
+            handler = handler._next
+        self.__compiled = all(type(handler).handle_request in self.STOCK for handler in self.__levels)
+        self.__table: Dict[str, ChangeHandler] = {}
+        self.__fallback: Optional[ChangeHandler] = None
+        self.__walks: Dict[str, Tuple[str, ...]] = {}
+        for depth, handler in enumerate(self.__levels):
+            if handler.approves is None:
+                self.__fallback = handler
+                break
+            for request_type in handler.approves:
+                if request_type not in self.__table:
+                    self.__table[request_type] = handler
+                    self.__walks[request_type] = self.__walk(depth)
+        self.__fallback_walk = self.__walk(len(self.__levels) - 1 if self.__fallback is None
+                                           else self.__levels.index(self.__fallback))
+        self.__counters: Counter = Counter()
+        if self.__compiled:
+            logger.info("Собран движок согласования: %s", {key: value.title for key, value in self.__table.items()})
+        else:
+            logger.info("Цепочка содержит собственные обработчики, согласование идет через handle_request")
+
+    def __walk(self, depth: int) -> Tuple[str, ...]:
+        '''Метки обработчиков, через которые прошел бы запрос до уровня depth включительно'''
+        return tuple(handler.metric for handler in self.__levels[:depth + 1])
+
+    @property
+    def chain(self) -> ChangeHandler:
+        '''Первый обработчик исходной цепочки'''
+        return self.__levels[0]
+
+    @property
+    def compiled(self) -> bool:
+        '''Идет ли согласование по таблице (False - через handle_request цепочки)'''
+        return self.__compiled
+
+    def level(self, request_type: str) -> Optional[ChangeHandler]:
+        '''Уровень, одобряющий запрос данного типа (None - никто)'''
+        return self.__table.get(request_type, self.__fallback)
+
+    @property
+    def counters(self) -> Dict[str, int]:
+        '''Количество одобрений по уровням'''
+        with Metrics.lock:
+            return dict(self.__counters)
+
+    def reset_counters(self) -> None:
+        '''Сброс счетчиков одобрений'''
+        with Metrics.lock:
+            self.__counters.clear()
+
+    def __lookup(self, request, approved: Counter, walked: Counter) -> bool:
+        '''Согласование по таблице с учетом одобрений и типов запросов для метрик обработчиков'''
+        handler = self.__table.get(request.type, self.__fallback)
+        walked[request.type] += 1
+        if handler is None:
+            logger.warning("Запрос типа %s некому одобрить", request.type)
+            return False
+        logger.info("%s одобрил запрос типа %s", handler.title, request.type)
         request.approved = True
+        approved[handler.title] += 1
+        return True
+
+    def __route(self, request, approved: Counter) -> bool:
+        '''Согласование через handle_request цепочки (метрики обработчиков считают сами обработчики)'''
+        if not self.chain.handle_request(request):
+            return False
+        handler = self.level(request.type)
+        approved[handler.title if handler is not None else self.chain.title] += 1
         return True
 
+    def __record(self, approved: Counter, walked: Counter) -> None:
+        '''Перенос счетчиков одобрений и метрик обработчиков, через которых прошли бы запросы по цепочке'''
+        with Metrics.lock:
+            self.__counters.update(approved)
+        handlers: Counter = Counter()
+        for request_type, value in walked.items():
+            for metric in self.__walks.get(request_type, self.__fallback_walk):
+                handlers[metric] += value
+        for metric, value in handlers.items():
+            Metrics.count('approval_handler_total', value, handler=metric)
+
+    @Metrics.instrument('approval_engine')
+    def approve(self, request) -> bool:
+        '''Согласование одного запроса поиском в таблице'''
+        approved, walked = Counter(), Counter()
+        if self.__compiled:
+            result = self.__lookup(request, approved, walked)
+        else:
+            result = self.__route(request, approved)
+        self.__record(approved, walked)
+        return result
+
+    @Metrics.instrument('approval_engine_batch')
+    def approve_batch(self, requests: Iterable) -> List[bool]:
+        '''Согласование списка запросов за один вызов'''
+        approved, walked = Counter(), Counter()
+        if self.__compiled:
+            results = [self.__lookup(request, approved, walked) for request in requests]
+        else:
+            results = [self.__route(request, approved) for request in requests]
+        self.__record(approved, walked)
+        logger.info("Пакетно согласовано %s из %s запросов", sum(results), len(results))
+        return results
+
+class ApprovalService:
+    '''Локальная заглушка внешнего сервиса согласования с задержкой ответа'''
+    def __init__(self, delay: float = 0.05, decision: bool = True) -> None:
+        '''Конструктор сервиса согласования'''
+        self.delay = delay
+        self.decision = decision
+
+    async def review(self, handler, request) -> bool:
+        '''Согласование запроса после задержки (asyncio загружается только асинхронным путем)'''
+        import asyncio
+        logger.debug("%s ожидает согласования запроса типа %s", handler.title, request.type)
+        await asyncio.sleep(self.delay)
+        return self.decision
+
+approvals = ApprovalEngine()
+
 class Salesman:
     '''Класс продавца'''
     def __init__(self, access: int) -> None:
         '''Конструктор продавца'''
         self.access = access
-        logger.info(f"Создан продавец с уровнем доступа {access}")
+        logger.info("Создан продавец с уровнем доступа %s", access)
 
     @check_permissions(3)
     def makesale(self, rentalprocess, request=None):
         '''Метод оформления продажи'''
-        logger.info(f"Продавец с уровнем доступа {self.access} оформляет аренду")
+        logger.info("Продавец с уровнем доступа %s оформляет аренду", self.access)
         return rentalprocess.rent_equipment(request)
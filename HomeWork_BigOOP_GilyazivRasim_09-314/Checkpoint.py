@@ -0,0 +1,220 @@
+import Logger
+import contextlib
+import copyreg
+import io
+import os
+import pickle
+import struct
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional
+from Customer import Customer, registry
+from EquipmentMeta import EquipmentMeta
+from Tariffs import Tariff
+from Errors import InvalidEquipmentError
+
+logger = Logger.logger
+
+MAGIC = b'RCHKPT02'
+HEADER = struct.Struct('<8sIQd')
+LENGTH = struct.Struct('<Q')
+TRANSIENT = ('_listeners',)
+
+State = Dict[str, List[Any]]
+
+def restore_array(typecode: str, buffer) -> array:
+    '''Восстановление массива из внеполосного буфера'''
+    values = array(typecode)
+    values.frombytes(buffer)
+    return values
+
+class SnapshotPickler(pickle.Pickler):
+    '''Pickler снимка: данные array уходят во внеполосные буферы, подписчики объектов не сохраняются'''
+    def reducer_override(self, obj: Any) -> Any:
+        '''Особая упаковка массивов и объектов с подписчиками'''
+        if type(obj) is array:
+            return restore_array, (obj.typecode, pickle.PickleBuffer(obj))
+        state = getattr(obj, '__dict__', None)
+        if state and not isinstance(obj, type) and any(name in state for name in TRANSIENT):
+            state = {name: value for name, value in state.items() if name not in TRANSIENT}
+            return copyreg.__newobj__, (type(obj),), state
+        return NotImplemented
+
+class Checkpoint:
+    '''Снимки живого состояния (инвентарь, клиенты, аренды) и теплый рестарт без конструкторов'''
+    def __init__(self, path: str) -> None:
+        '''Конструктор для файла снимка path'''
+        self.__path = path
+        self.__child: Optional[int] = None
+        self.__writer: Optional[threading.Thread] = None
+        self.__succeeded = True
+        self.__periodic: Optional[threading.Thread] = None
+        self.__stop = threading.Event()
+
+    @property
+    def path(self) -> str:
+        '''Геттер для пути к файлу снимка'''
+        return self.__path
+
+    @staticmethod
+    def dumps(state: State) -> List[Any]:
+        '''Части файла снимка: заголовок, основной поток pickle 5 (состояние и тарифы) и внеполосные буферы'''
+        buffers: List[pickle.PickleBuffer] = []
+        stream = io.BytesIO()
+        tariffs = {name: tariff.to_dict() for name, tariff in EquipmentMeta.tariffs.items()}
+        SnapshotPickler(stream, protocol=5, buffer_callback=buffers.append).dump(
+            (state, tariffs, EquipmentMeta.tariff_generation))
+        payload = stream.getbuffer()
+        parts: List[Any] = [HEADER.pack(MAGIC, len(buffers), len(payload), time.time()), payload]
+        for buffer in buffers:
+            raw = buffer.raw()
+            parts.append(LENGTH.pack(raw.nbytes))
+            parts.append(raw)
+        return parts
+
+    @staticmethod
+    def freeze(state: State) -> State:
+        '''Поверхностная копия состояния: списки копируются, объекты - общие (дешево, можно под блокировкой)'''
+        return {key: list(values) for key, values in state.items()}
+
+    def write(self, parts: List[Any]) -> int:
+        '''Атомарная запись частей снимка в файл'''
+        temporary = f'{self.__path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as file:
+            for part in parts:
+                file.write(part)
+            file.flush()
+            os.fsync(file.fileno())
+            size = file.tell()
+        os.replace(temporary, self.__path)
+        return size
+
+    def save(self, state: State) -> int:
+        '''Синхронный снимок состояния вида {'equipment': [...], 'customers': [...], 'rentals': [...]}'''
+        size = self.write(self.dumps(state))
+        logger.info("Снимок состояния записан в %s: %s байт", self.__path, size)
+        return size
+
+    def load(self) -> State:
+        '''Восстановление состояния без конструкторов; клиенты регистрируются в реестре, тарифы применяются'''
+        with open(self.__path, 'rb') as file:
+            data = memoryview(file.read())
+        if len(data) < HEADER.size:
+            raise InvalidEquipmentError(f"Файл {self.__path} не является снимком состояния")
+        magic, count, length, created = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise InvalidEquipmentError(f"Файл {self.__path} не является снимком состояния")
+        offset = HEADER.size + length
+        payload = data[HEADER.size:offset]
+        buffers = []
+        for _ in range(count):
+            (size,) = LENGTH.unpack_from(data, offset)
+            offset += LENGTH.size
+            buffers.append(data[offset:offset + size])
+            offset += size
+        with Logger.silenced():
+            state, tariffs, generation = pickle.loads(payload, buffers=buffers)
+            EquipmentMeta.set_tariffs({name: Tariff.from_dict(data) for name, data in tariffs.items()})
+        # Ключи кэша стоимости в снимке посчитаны при поколениях тарифов до generation включительно
+        EquipmentMeta.tariff_generation = max(EquipmentMeta.tariff_generation, generation + 1)
+        for customer in state.get('customers', ()):
+            if isinstance(customer, Customer):
+                registry.add(customer)
+        logger.info("Состояние восстановлено из снимка %s от %s", self.__path, time.ctime(created))
+        return state
+
+    def __reap(self, status: int) -> None:
+        '''Учет кода завершения процесса записи снимка'''
+        self.__child = None
+        self.__succeeded = os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+        if not self.__succeeded:
+            logger.error("Фоновый снимок %s не записан: статус процесса %s", self.__path, status)
+
+    def __write_parts(self, parts: List[Any]) -> None:
+        '''Запись снимка в потоке записи с учетом результата'''
+        try:
+            self.write(parts)
+            self.__succeeded = True
+        except Exception:
+            self.__succeeded = False
+            logger.exception("Фоновый снимок %s не записан", self.__path)
+
+    def busy(self) -> bool:
+        '''Идет ли фоновая запись снимка (завершившийся процесс записи учитывается)'''
+        if self.__child is not None:
+            pid, status = os.waitpid(self.__child, os.WNOHANG)
+            if pid == 0:
+                return True
+            self.__reap(status)
+        return self.__writer is not None and self.__writer.is_alive()
+
+    def save_in_background(self, state: State) -> bool:
+        '''Фоновый снимок; False, если предыдущий снимок еще пишется'''
+        if self.busy():
+            logger.warning("Предыдущий снимок %s еще записывается, новый пропущен", self.__path)
+            return False
+        # fork копирует только вызывающий поток: при других живых потоках состояние и захваченные ими
+        # блокировки в копии могут оказаться на полпути, поэтому тогда снимок сериализуется здесь же,
+        # в точке вызова, а в фоне только записывается
+        threads = threading.active_count()
+        if hasattr(os, 'fork') and threads == 1:
+            pid = os.fork()
+            if pid == 0:
+                code = 1
+                try:
+                    self.write(self.dumps(state))
+                    code = 0
+                finally:
+                    os._exit(code)
+            self.__child = pid
+            logger.debug("Снимок %s записывается процессом %s", self.__path, pid)
+            return True
+        if hasattr(os, 'fork'):
+            logger.info("Живых потоков: %s, снимок %s сериализуется в вызывающем потоке без fork", threads, self.__path)
+        parts = self.dumps(self.freeze(state))
+        self.__writer = threading.Thread(target=self.__write_parts, args=(parts,), name='checkpoint-writer', daemon=True)
+        self.__writer.start()
+        return True
+
+    def wait(self) -> bool:
+        '''Ожидание завершения фонового снимка; True при успешной записи последнего снимка'''
+        if self.__child is not None:
+            _, status = os.waitpid(self.__child, 0)
+            self.__reap(status)
+        if self.__writer is not None:
+            self.__writer.join()
+            self.__writer = None
+        return self.__succeeded
+
+    def start_periodic(self, source: Callable[[], State], interval: float
+                       , lock: Optional[threading.Lock] = None) -> None:
+        '''Периодические снимки в потоке таймера: под lock (если задан) только копия списков source(), сериализация - вне его'''
+        if self.__periodic is not None:
+            raise InvalidEquipmentError("Периодические снимки уже запущены")
+        self.__stop.clear()
+        guard = lock if lock is not None else contextlib.nullcontext()
+
+        def loop():
+            while not self.__stop.wait(interval):
+                try:
+                    with guard:
+                        state = self.freeze(source())
+                    parts = self.dumps(state)
+                except Exception:
+                    self.__succeeded = False
+                    logger.exception("Периодический снимок %s не снят", self.__path)
+                    continue
+                self.__write_parts(parts)
+
+        self.__periodic = threading.Thread(target=loop, name='checkpoint-timer', daemon=True)
+        self.__periodic.start()
+        logger.info("Периодические снимки в %s каждые %s с", self.__path, interval)
+
+    def stop_periodic(self) -> None:
+        '''Остановка периодических снимков с ожиданием текущей записи'''
+        if self.__periodic is not None:
+            self.__stop.set()
+            self.__periodic.join()
+            self.__periodic = None
+        self.wait()
@@ -1,5 +1,8 @@
 import Logger
-from typing import Dict, Any
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Any, Optional
 
 logger = Logger.logger
 
@@ -9,7 +12,7 @@ class Customer:
         '''Конструктор клиента'''
         self.__customer_id = customer_id
         self.__name = name
-        logger.info(f"Создан клиент: {name} (ID: {customer_id})")
+        logger.info("Создан клиент: %s (ID: %s)", name, customer_id)
 
     @property
     def customer_id(self) -> str:
@@ -19,7 +22,7 @@ class Customer:
     @customer_id.setter
     def customer_id(self, customer_id: str) -> None:
         '''Сеттер для ID клиента'''
-        logger.debug(f"Изменение ID клиента с {self.__customer_id} на {customer_id}")
+        logger.debug("Изменение ID клиента с %s на %s", self.__customer_id, customer_id)
         self.__customer_id = customer_id
 
     @property
@@ -30,7 +33,7 @@ class Customer:
     @name.setter
     def name(self, name: str) -> None:
         '''Сеттер для имени клиента'''
-        logger.debug(f"Изменение имени клиента с {self.__name} на {name}")
+        logger.debug("Изменение имени клиента с %s на %s", self.__name, name)
         self.__name = name
 
     def __str__(self) -> str:
@@ -44,8 +47,85 @@ class Customer:
             'name': self.name,
         }
 
+    @classmethod
+    def restore(cls, customer_id: str, name: str) -> 'Customer':
+        '''Восстановление сохраненного клиента без журналирования создания'''
+        customer = cls.__new__(cls)
+        customer.__customer_id = customer_id
+        customer.__name = name
+        return customer
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Customer':
-        '''Создание клиента из словаря'''
-        logger.debug(f"Создание Customer из словаря: {data}")
-        return cls(*data.values())
\ No newline at end of file
+        '''Создание клиента из словаря (общий объект на customer_id из реестра)'''
+        if cls is Customer:
+            return registry.intern(*data.values())
+        logger.debug("Создание Customer из словаря: %s", data)
+        return cls(*data.values())
+
+class CustomerRegistry:
+    '''Реестр клиентов: один объект на customer_id и LRU недавно использованных'''
+    def __init__(self, capacity: int = 1024) -> None:
+        '''Конструктор реестра с размером LRU capacity'''
+        self.__customers: 'weakref.WeakValueDictionary[str, Customer]' = weakref.WeakValueDictionary()
+        self.__hot: 'OrderedDict[str, Customer]' = OrderedDict()
+        self.__capacity = capacity
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        '''Количество живых клиентов в реестре'''
+        return len(self.__customers)
+
+    def __touch(self, customer: Customer) -> None:
+        '''Отметка клиента как недавно использованного'''
+        hot = self.__hot
+        hot[customer.customer_id] = customer
+        hot.move_to_end(customer.customer_id)
+        if len(hot) > self.__capacity:
+            hot.popitem(last=False)
+
+    def get(self, customer_id: str) -> Optional[Customer]:
+        '''Клиент по ID, если он еще жив'''
+        return self.__customers.get(customer_id)
+
+    @staticmethod
+    def __conflict(customer: Customer, name: str) -> None:
+        '''Расхождение имени: порядок поступления данных не говорит, какое имя новее, поэтому первое сохраняется'''
+        logger.warning("Клиент %s уже зарегистрирован с именем %s, имя %s не применено"
+                       , customer.customer_id, customer.name, name)
+
+    def add(self, customer: Customer) -> Customer:
+        '''Регистрация существующего объекта клиента (возвращает общий объект; при расхождении имени - первое)'''
+        with self.__lock:
+            shared = self.__customers.setdefault(customer.customer_id, customer)
+            if shared.name != customer.name:
+                self.__conflict(shared, customer.name)
+            self.__touch(shared)
+        return shared
+
+    def intern(self, customer_id: str, name: str) -> Customer:
+        '''Общий объект клиента: создается при первой встрече customer_id, расхождение имени только логируется'''
+        hot = self.__hot
+        customer = hot.get(customer_id)
+        if customer is not None and customer.name == name:
+            try:
+                hot.move_to_end(customer_id)
+            except KeyError:
+                pass
+            return customer
+        with self.__lock:
+            customer = self.__customers.get(customer_id)
+            if customer is None:
+                customer = self.__customers[customer_id] = Customer.restore(customer_id, name)
+            elif customer.name != name:
+                self.__conflict(customer, name)
+            self.__touch(customer)
+        return customer
+
+    def clear(self) -> None:
+        '''Очистка реестра'''
+        with self.__lock:
+            self.__customers.clear()
+            self.__hot.clear()
+
+registry = CustomerRegistry()
\ No newline at end of file
@@ -0,0 +1,162 @@
+import Logger
+import threading
+from heapq import merge
+from itertools import islice, takewhile
+from math import inf, nextafter
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from BookingCalendar import SortedChunks
+from SportsEquipment import SportEquipment
+from Errors import InvalidEquipmentError
+
+logger = Logger.logger
+
+RateKey = Tuple[float, str, str]
+
+class EquipmentCatalog:
+    '''Каталог инвентаря с индексами по ID, типу, доступности и ставке (индексы под собственной блокировкой)'''
+    def __init__(self) -> None:
+        '''Конструктор каталога'''
+        self.__by_id: Dict[str, SportEquipment] = {}
+        self.__by_rate = SortedChunks(itemgetter(0))
+        self.__type_by_rate: Dict[str, SortedChunks] = {}
+        self.__available: Dict[str, Set[str]] = {}
+        self.__available_by_rate: Dict[str, SortedChunks] = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def equipment_type(equipment: SportEquipment) -> str:
+        '''Тип оборудования в формате ключей реестра (для представлений FleetStore - тип их строки)'''
+        if isinstance(equipment, SportEquipment):
+            return type(equipment).__name__.lower()
+        return equipment.equipment_class.__name__.lower()
+
+    @staticmethod
+    def __key(equipment_id: str, hourly_rate: float, condition: str) -> RateKey:
+        '''Ключ сортированного индекса (совпадает с порядком SportEquipment.__lt__)'''
+        return (hourly_rate, condition, equipment_id)
+
+    @staticmethod
+    def __discard(index: SortedChunks, key: RateKey) -> None:
+        '''Удаление ключа из сортированного индекса, если он там есть'''
+        try:
+            index.remove(key)
+        except ValueError:
+            pass
+
+    def __index(self, equipment_type: str, key: RateKey, is_available: bool) -> None:
+        '''Добавление ключа во все индексы'''
+        equipment_id = key[2]
+        self.__by_rate.add(key)
+        self.__type_by_rate.setdefault(equipment_type, SortedChunks(itemgetter(0))).add(key)
+        available = self.__available.setdefault(equipment_type, set())
+        available_by_rate = self.__available_by_rate.setdefault(equipment_type, SortedChunks(itemgetter(0)))
+        if is_available:
+            available.add(equipment_id)
+            available_by_rate.add(key)
+
+    def __unindex(self, equipment_type: str, key: RateKey) -> None:
+        '''Удаление ключа из всех индексов'''
+        self.__discard(self.__by_rate, key)
+        self.__discard(self.__type_by_rate[equipment_type], key)
+        self.__available[equipment_type].discard(key[2])
+        self.__discard(self.__available_by_rate[equipment_type], key)
+
+    def add(self, equipment: SportEquipment) -> None:
+        '''Добавление оборудования в каталог (представления FleetStore не поддерживают подписку и отклоняются)'''
+        if not isinstance(equipment, SportEquipment):
+            logger.error("Каталог принимает только объекты инвентаря, получено %s", type(equipment).__name__)
+            raise InvalidEquipmentError(f"Каталог не принимает {type(equipment).__name__}: нужен объект SportEquipment")
+        with self.__lock:
+            if equipment.equipment_id in self.__by_id:
+                logger.error("Повторное добавление инвентаря с ID %s в каталог", equipment.equipment_id)
+                raise InvalidEquipmentError(f"Инвентарь с ID {equipment.equipment_id} уже есть в каталоге")
+            self.__by_id[equipment.equipment_id] = equipment
+            key = self.__key(equipment.equipment_id, equipment.hourly_rate, equipment.condition)
+            self.__index(self.equipment_type(equipment), key, equipment.is_available)
+        equipment.subscribe(self._on_change)
+        logger.debug("Инвентарь %s добавлен в каталог", equipment.equipment_id)
+
+    def remove(self, equipment_id: str) -> SportEquipment:
+        '''Удаление оборудования из каталога'''
+        with self.__lock:
+            equipment = self.__by_id.pop(equipment_id, None)
+            if equipment is None:
+                logger.error("Инвентарь с ID %s отсутствует в каталоге", equipment_id)
+                raise InvalidEquipmentError(f"Инвентарь с ID {equipment_id} отсутствует в каталоге")
+            key = self.__key(equipment_id, equipment.hourly_rate, equipment.condition)
+            self.__unindex(self.equipment_type(equipment), key)
+        equipment.unsubscribe(self._on_change)
+        logger.debug("Инвентарь %s удален из каталога", equipment_id)
+        return equipment
+
+    def _on_change(self, equipment: SportEquipment, field: str, old, new) -> None:
+        '''Поддержание индексов при срабатывании сеттеров оборудования'''
+        if field not in ('equipment_id', 'hourly_rate', 'condition', 'is_available') or old == new:
+            return
+        equipment_id = old if field == 'equipment_id' else equipment.equipment_id
+        hourly_rate = old if field == 'hourly_rate' else equipment.hourly_rate
+        condition = old if field == 'condition' else equipment.condition
+        equipment_type = self.equipment_type(equipment)
+        with self.__lock:
+            if field == 'equipment_id' and new in self.__by_id:
+                logger.error("Инвентарь с ID %s уже есть в каталоге, смена ID %s отклонена", new, old)
+                raise InvalidEquipmentError(f"Инвентарь с ID {new} уже есть в каталоге")
+            self.__unindex(equipment_type, self.__key(equipment_id, hourly_rate, condition))
+            if field == 'equipment_id':
+                del self.__by_id[old]
+                self.__by_id[new] = equipment
+            key = self.__key(equipment.equipment_id, equipment.hourly_rate, equipment.condition)
+            self.__index(equipment_type, key, equipment.is_available)
+
+    def get(self, equipment_id: str) -> Optional[SportEquipment]:
+        '''Поиск оборудования по ID за O(1)'''
+        return self.__by_id.get(equipment_id)
+
+    def __len__(self) -> int:
+        '''Количество единиц в каталоге'''
+        return len(self.__by_id)
+
+    def __contains__(self, equipment_id: str) -> bool:
+        '''Проверка наличия оборудования по ID'''
+        return equipment_id in self.__by_id
+
+    def __iter__(self) -> Iterator[SportEquipment]:
+        '''Итерация по снимку оборудования каталога'''
+        with self.__lock:
+            return iter(list(self.__by_id.values()))
+
+    def available(self, equipment_type: str) -> List[SportEquipment]:
+        '''Доступное оборудование заданного типа'''
+        with self.__lock:
+            ids = self.__available.get(equipment_type.lower(), ())
+            return [self.__by_id[equipment_id] for equipment_id in ids]
+
+    def count_available(self, equipment_type: str) -> int:
+        '''Количество доступных единиц заданного типа'''
+        return len(self.__available.get(equipment_type.lower(), ()))
+
+    def cheapest_available(self, equipment_type: str, k: int = 1) -> List[SportEquipment]:
+        '''Самые дешевые доступные единицы заданного типа'''
+        with self.__lock:
+            index = self.__available_by_rate.get(equipment_type.lower(), ())
+            return [self.__by_id[key[2]] for key in islice(index, k)]
+
+    def in_rate_range(self, low: float, high: float, equipment_type: Optional[str] = None
+                      , only_available: bool = False) -> List[SportEquipment]:
+        '''Оборудование с почасовой ставкой в диапазоне [low, high], по возрастанию (rate, condition)'''
+        with self.__lock:
+            if only_available:
+                if equipment_type is None:
+                    indexes = list(self.__available_by_rate.values())
+                else:
+                    indexes = [self.__available_by_rate.get(equipment_type.lower(), SortedChunks(itemgetter(0)))]
+            elif equipment_type is None:
+                indexes = [self.__by_rate]
+            else:
+                indexes = [self.__type_by_rate.get(equipment_type.lower(), SortedChunks(itemgetter(0)))]
+            slices = []
+            for index in indexes:
+                _, tail = index.split(nextafter(low, -inf))
+                slices.append(takewhile(lambda key: key[0] <= high, tail))
+            return [self.__by_id[key[2]] for key in merge(*slices)]
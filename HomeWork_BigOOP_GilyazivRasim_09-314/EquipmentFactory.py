@@ -1,17 +1,110 @@
 import Logger
+import Metrics
+import csv
+import json
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
 from EquipmentMeta import EquipmentMeta
-from Errors import *
+from Errors import InvalidEquipmentError
 
 logger = Logger.logger
 
+TYPE_KEY = 'equipment_type'
+
+def parse_bool(value: Any) -> bool:
+    '''Разбор логического значения из CSV/JSON'''
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'да')
+    return bool(value)
+
+CONVERTERS = {float: float, bool: parse_bool, str: str}
+
 class EquipmentFactory:
     '''Фабрика для создания оборудования'''
     @staticmethod
+    @Metrics.instrument('factory_create')
     def create_equipment(equipment_type: str, *args, **kwargs):
         '''Статический метод для создания оборудования'''
-        equipment = EquipmentMeta.registry.get(equipment_type.lower())
+        equipment = EquipmentMeta.lookup(equipment_type.lower())
         if not equipment:
-            logger.error(f"Неизвестный тип инвентаря: {equipment_type}")
+            logger.error("Неизвестный тип инвентаря: %s", equipment_type)
             raise InvalidEquipmentError(f'Неизвестный тип инвентаря: {equipment_type}')
-        logger.info(f"Создание оборудования типа {equipment_type}")
+        logger.info("Создание оборудования типа %s", equipment_type)
         return equipment(*args, **kwargs)
+
+    @staticmethod
+    def resolve(equipment_type: str) -> Tuple[type, List[Tuple[str, str, Callable]]]:
+        '''Класс и разбор полей строки для типа оборудования'''
+        equipment = EquipmentMeta.lookup(equipment_type.lower())
+        if not equipment:
+            logger.error("Неизвестный тип инвентаря: %s", equipment_type)
+            raise InvalidEquipmentError(f'Неизвестный тип инвентаря: {equipment_type}')
+        fields = [(parameter, key, CONVERTERS.get(annotation, lambda value: value))
+                  for parameter, key, annotation, _ in equipment.schema()]
+        return equipment, fields
+
+    @staticmethod
+    def read_csv(path: str) -> Iterator[Dict[str, Any]]:
+        '''Потоковое чтение строк инвентаря из CSV'''
+        with open(path, newline='', encoding='utf-8') as file:
+            yield from csv.DictReader(file)
+
+    @staticmethod
+    def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+        '''Потоковое чтение строк инвентаря из JSONL'''
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    @staticmethod
+    def read_file(path: str) -> Iterator[Dict[str, Any]]:
+        '''Выбор способа чтения по расширению файла'''
+        if path.endswith('.csv'):
+            return EquipmentFactory.read_csv(path)
+        if path.endswith(('.jsonl', '.ndjson')):
+            return EquipmentFactory.read_jsonl(path)
+        raise InvalidEquipmentError(f'Неподдерживаемый формат файла инвентаря: {path}')
+
+    @staticmethod
+    def create_bulk(rows: Iterable[Dict[str, Any]], chunk_size: int = 10000) -> Iterator[List[Any]]:
+        '''Пакетное создание оборудования: выдает списки по chunk_size единиц'''
+        resolved: Dict[str, Tuple[type, List[Tuple[str, str, Callable]]]] = {}
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            units = []
+            with Logger.silenced():
+                for row in chunk:
+                    equipment_type = row[TYPE_KEY]
+                    entry = resolved.get(equipment_type)
+                    if entry is None:
+                        entry = resolved[equipment_type] = EquipmentFactory.resolve(equipment_type)
+                    equipment, fields = entry
+                    kwargs = {}
+                    for parameter, key, convert in fields:
+                        value = row.get(key, row.get(parameter))
+                        if value is not None and value != '':
+                            kwargs[parameter] = convert(value)
+                    units.append(equipment(**kwargs))
+            logger.info("Пакетно создано %s единиц инвентаря", len(units))
+            yield units
+
+    @staticmethod
+    def stream_file(path: str, chunk_size: int = 10000) -> Iterator[Any]:
+        '''Потоковое создание оборудования из CSV/JSONL по одной единице'''
+        for units in EquipmentFactory.create_bulk(EquipmentFactory.read_file(path), chunk_size):
+            yield from units
+
+    @staticmethod
+    def load_file(path: str, store, chunk_size: int = 10000) -> int:
+        '''Загрузка файла инвентаря напрямую в хранилище с методом add'''
+        count = 0
+        for units in EquipmentFactory.create_bulk(EquipmentFactory.read_file(path), chunk_size):
+            for unit in units:
+                store.add(unit)
+            count += len(units)
+        logger.info("Загружено %s единиц инвентаря из %s", count, path)
+        return count
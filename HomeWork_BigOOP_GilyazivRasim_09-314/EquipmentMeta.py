@@ -1,15 +1,106 @@
 import Logger
+import importlib
+import inspect
+from typing import Any, Dict, Optional
+from Errors import InvalidEquipmentError
+from Tariffs import Tariff
 
 logger = Logger.logger
 
 class EquipmentMeta(type):
     '''Метакласс для контроля создания классов оборудования'''
     registry = {}
+    schemas = {}
+    codes = {}
+    declared = {
+        'bicycle': 'BicycleEquipment',
+        'skis': 'SkisEquipment',
+        'tennisracket': 'TennisRacketEquipment',
+    }
+    declared_codes = {1: 'bicycle', 2: 'skis', 3: 'tennisracket'}
+    markers = {'type': 'bicycle', 'length': 'skis', 'string_tension': 'tennisracket'}
+    tariffs = {}
+    tariff_generation = 0
 
     def __new__(cls, name, bases, namespace):
         '''Авторегистрация классов оборудования'''
         new_class = super().__new__(cls, name, bases, namespace)
         if name != 'SportEquipment':
             cls.registry[name.lower()] = new_class
-            logger.debug(f"Зарегистрирован класс оборудования: {name}")
-        return new_class
\ No newline at end of file
+            logger.debug("Зарегистрирован класс оборудования: %s", name)
+            if name.lower() in cls.tariffs:
+                new_class.tariff = cls.tariffs[name.lower()]
+        code = namespace.get('type_code')
+        if code is not None:
+            if cls.codes.get(code, new_class).__name__ != name:
+                raise InvalidEquipmentError(f"Код типа {code} уже занят классом {cls.codes[code].__name__}")
+            cls.codes[code] = new_class
+        return new_class
+
+    def schema(cls):
+        '''Поля конструктора класса: (параметр, ключ в to_dict, тип, значение по умолчанию)'''
+        fields = EquipmentMeta.schemas.get(cls)
+        if fields is None:
+            aliases = getattr(cls, 'field_aliases', {})
+            parameters = list(inspect.signature(cls.__init__).parameters.values())[1:]
+            fields = tuple((parameter.name, aliases.get(parameter.name, parameter.name),
+                            parameter.annotation, parameter.default) for parameter in parameters)
+            EquipmentMeta.schemas[cls] = fields
+        return fields
+
+    @staticmethod
+    def declare(name: str, module: str, type_code: Optional[int] = None, marker: Optional[str] = None) -> None:
+        '''Объявление типа оборудования, модуль которого загрузится при первом обращении'''
+        EquipmentMeta.declared[name.lower()] = module
+        if type_code is not None:
+            EquipmentMeta.declared_codes[type_code] = name.lower()
+        if marker is not None:
+            EquipmentMeta.markers[marker] = name.lower()
+
+    @staticmethod
+    def lookup(name: str) -> Optional[type]:
+        '''Класс по имени типа с загрузкой модуля при первом обращении'''
+        equipment_class = EquipmentMeta.registry.get(name)
+        if equipment_class is None and name in EquipmentMeta.declared:
+            importlib.import_module(EquipmentMeta.declared[name])
+            logger.debug("Загружен модуль оборудования %s", EquipmentMeta.declared[name])
+            equipment_class = EquipmentMeta.registry.get(name)
+        return equipment_class
+
+    @staticmethod
+    def by_code(code: int) -> Optional[type]:
+        '''Класс по коду типа с загрузкой модуля при первом обращении'''
+        equipment_class = EquipmentMeta.codes.get(code)
+        if equipment_class is None and code in EquipmentMeta.declared_codes:
+            equipment_class = EquipmentMeta.lookup(EquipmentMeta.declared_codes[code])
+        return equipment_class
+
+    @staticmethod
+    def by_fields(data: Dict[str, Any]) -> Optional[type]:
+        '''Класс по характерному полю словаря to_dict()'''
+        for marker, name in EquipmentMeta.markers.items():
+            if marker in data:
+                return EquipmentMeta.lookup(name)
+        return None
+
+    @staticmethod
+    def set_tariff(name: str, tariff: Tariff) -> None:
+        '''Горячая замена тарифа типа (в том числе еще не загруженного); кэши стоимости устаревают'''
+        name = name.lower()
+        EquipmentMeta.tariffs[name] = tariff
+        equipment_class = EquipmentMeta.registry.get(name)
+        if equipment_class is not None:
+            equipment_class.tariff = tariff
+        EquipmentMeta.tariff_generation += 1
+        logger.info("Установлен тариф для %s: %s", name, tariff)
+
+    @staticmethod
+    def set_tariffs(tariffs: Dict[str, Tariff]) -> None:
+        '''Замена нескольких тарифов (например, из Tariff.load)'''
+        for name, tariff in tariffs.items():
+            EquipmentMeta.set_tariff(name, tariff)
+
+    @staticmethod
+    def load_all() -> Dict[str, type]:
+        '''Загрузка всех объявленных типов'''
+        return {name: EquipmentMeta.lookup(name) for name in EquipmentMeta.declared}
@@ -0,0 +1,69 @@
+import Logger
+import contextlib
+import threading
+from typing import Callable, Dict, Iterator, List
+
+logger = Logger.logger
+
+RENTAL_CONFIRMED = 'rental_confirmed'
+RENTAL_EXTENDED = 'rental_extended'
+RENTAL_CLOSED = 'rental_closed'
+BOOKING_CANCELLED = 'booking_cancelled'
+
+class EventBus:
+    '''Шина событий жизненного цикла аренды'''
+    def __init__(self) -> None:
+        '''Конструктор шины событий'''
+        self.__listeners: Dict[str, List[Callable]] = {}
+        self.__local = threading.local()
+
+    def subscribe(self, event: str, listener: Callable) -> None:
+        '''Подписка на событие'''
+        self.__listeners.setdefault(event, []).append(listener)
+        logger.debug("Подписка на событие %s", event)
+
+    def unsubscribe(self, event: str, listener: Callable) -> None:
+        '''Отписка от события'''
+        listeners = self.__listeners.get(event)
+        if listeners and listener in listeners:
+            listeners.remove(listener)
+
+    def emit(self, event: str, *args) -> None:
+        '''Оповещение подписчиков события: ошибка одного подписчика не прерывает операцию и остальных'''
+        listeners = self.__listeners.get(event)
+        if listeners:
+            for listener in tuple(listeners):
+                try:
+                    listener(*args)
+                except Exception:
+                    logger.exception("Ошибка подписчика %s события %s", getattr(listener, '__qualname__', listener), event)
+
+    @contextlib.contextmanager
+    def operation(self) -> Iterator[None]:
+        '''Операция (например, завершение аренды), до конца которой в этом потоке откладываются вызовы defer'''
+        local = self.__local
+        depth = getattr(local, 'depth', 0)
+        if not depth:
+            local.deferred = []
+        local.depth = depth + 1
+        try:
+            yield
+        finally:
+            local.depth = depth
+            if not depth:
+                deferred, local.deferred = local.deferred, []
+                for callback in deferred:
+                    try:
+                        callback()
+                    except Exception:
+                        logger.exception("Ошибка отложенного вызова %s", getattr(callback, '__qualname__', callback))
+
+    def defer(self, callback: Callable[[], None]) -> None:
+        '''Вызов после завершения текущей операции потока (сразу, если операции нет)'''
+        local = self.__local
+        if getattr(local, 'depth', 0):
+            local.deferred.append(callback)
+        else:
+            callback()
+
+bus = EventBus()
@@ -0,0 +1,527 @@
+import Logger
+import Locks
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from EquipmentMeta import EquipmentMeta
+from Tariffs import Tariff
+from SportsEquipment import SportEquipment
+from Customer import Customer
+from Errors import InvalidEquipmentError
+
+logger = Logger.logger
+
+class Interner:
+    '''Таблица повторяющихся строк с компактными кодами'''
+    def __init__(self) -> None:
+        '''Конструктор таблицы'''
+        self.__values: List[Any] = []
+        self.__codes: Dict[Any, int] = {}
+
+    def code(self, value: Any) -> int:
+        '''Код значения (с добавлением в таблицу)'''
+        code = self.__codes.get(value)
+        if code is None:
+            code = self.__codes[value] = len(self.__values)
+            self.__values.append(value)
+        return code
+
+    def value(self, code: int) -> Any:
+        '''Значение по коду'''
+        return self.__values[code]
+
+BASE_FIELDS = ('equipment_id', 'name', 'condition', 'hourly_rate', 'is_available')
+
+class FleetStore:
+    '''Колоночное хранилище парка инвентаря (struct-of-arrays)'''
+    specific_fields: Dict[str, Tuple[str, type]] = {}
+
+    def __init__(self) -> None:
+        '''Конструктор хранилища'''
+        self.__types = Interner()
+        self.__conditions = Interner()
+        self.__labels = Interner()
+        self.__type_codes = array('H')
+        self.__condition_codes = array('H')
+        self.__ids: List[str] = []
+        self.__names: List[str] = []
+        self.__rates = array('d')
+        self.__rate_ints = bytearray()
+        self.__rate_versions = array('I')
+        self.__available = bytearray()
+        self.__specific = array('d')
+        self.__specific_ints = bytearray()
+        self.__listeners: Dict[int, List[Callable]] = {}
+
+    @staticmethod
+    def specific_field(type_name: str, equipment_class: Optional[type] = None) -> Tuple[str, type]:
+        '''Специфичное поле типа (ключ to_dict, тип) по схеме класса из EquipmentMeta'''
+        field = FleetStore.specific_fields.get(type_name)
+        if field is None:
+            equipment_class = equipment_class or EquipmentMeta.lookup(type_name)
+            fields = [] if equipment_class is None else [
+                (key, annotation) for name, key, annotation, _ in equipment_class.schema() if name not in BASE_FIELDS]
+            if len(fields) != 1 or fields[0][1] not in (str, float):
+                logger.error("Компактное хранилище не поддерживает %s", type_name)
+                raise InvalidEquipmentError(f"Компактное хранилище не поддерживает {type_name}")
+            field = FleetStore.specific_fields[type_name] = fields[0]
+        return field
+
+    def __len__(self) -> int:
+        '''Количество единиц в хранилище'''
+        return len(self.__ids)
+
+    def __getitem__(self, row: int) -> 'EquipmentView':
+        '''Легковесное представление единицы по номеру строки'''
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        row %= len(self)
+        return EquipmentView.for_type(self.type_name(row))(self, row)
+
+    def __iter__(self) -> Iterator['EquipmentView']:
+        '''Итерация по представлениям единиц'''
+        for row in range(len(self)):
+            yield EquipmentView.for_type(self.type_name(row))(self, row)
+
+    def append(self, equipment_class: type, equipment_id: str, name: str, condition: str
+               , hourly_rate: float, specific: Any, is_available: bool = True) -> int:
+        '''Добавление единицы, возвращает номер строки'''
+        type_name = equipment_class.__name__.lower()
+        self.specific_field(type_name, equipment_class)
+        if hourly_rate < 0:
+            logger.error("Попытка установить отрицательную почасовую ставку")
+            raise InvalidEquipmentError("Недопустимое значение для цены")
+        self.__type_codes.append(self.__types.code(type_name))
+        self.__ids.append(equipment_id)
+        self.__names.append(name)
+        self.__condition_codes.append(self.__conditions.code(condition))
+        self.__rates.append(hourly_rate)
+        self.__rate_ints.append(type(hourly_rate) is int)
+        self.__rate_versions.append(0)
+        self.__available.append(bool(is_available))
+        self.__specific.append(0.0)
+        self.__specific_ints.append(False)
+        row = len(self.__ids) - 1
+        self.set_specific(row, specific)
+        return row
+
+    def add(self, equipment: SportEquipment) -> int:
+        '''Перенос существующего объекта оборудования в хранилище'''
+        field = self.specific_field(type(equipment).__name__.lower(), type(equipment))[0]
+        return self.append(type(equipment), equipment.equipment_id, equipment.name, equipment.condition
+                           , equipment.hourly_rate, getattr(equipment, field), equipment.is_available)
+
+    def type_name(self, row: int) -> str:
+        '''Имя типа оборудования строки (ключ EquipmentMeta.registry)'''
+        return self.__types.value(self.__type_codes[row])
+
+    def equipment_class(self, row: int) -> type:
+        '''Класс оборудования строки (модуль типа загружается через EquipmentMeta при первом обращении)'''
+        return EquipmentMeta.lookup(self.__types.value(self.__type_codes[row]))
+
+    def equipment_id(self, row: int) -> str:
+        '''Чтение ID оборудования строки'''
+        return self.__ids[row]
+
+    def set_equipment_id(self, row: int, equipment_id: str) -> None:
+        '''Запись ID оборудования строки'''
+        self.__ids[row] = equipment_id
+
+    def name(self, row: int) -> str:
+        '''Чтение названия строки'''
+        return self.__names[row]
+
+    def set_name(self, row: int, name: str) -> None:
+        '''Запись названия строки'''
+        self.__names[row] = name
+
+    def condition(self, row: int) -> str:
+        '''Чтение состояния строки'''
+        return self.__conditions.value(self.__condition_codes[row])
+
+    def set_condition(self, row: int, condition: str) -> None:
+        '''Запись состояния строки'''
+        self.__condition_codes[row] = self.__conditions.code(condition)
+
+    def hourly_rate(self, row: int) -> float:
+        '''Чтение почасовой ставки строки (целая ставка возвращается как int)'''
+        value = self.__rates[row]
+        return int(value) if self.__rate_ints[row] else value
+
+    def set_hourly_rate(self, row: int, hourly_rate: float) -> None:
+        '''Запись почасовой ставки строки'''
+        self.__rates[row] = hourly_rate
+        self.__rate_ints[row] = type(hourly_rate) is int
+        self.__rate_versions[row] += 1
+
+    def pricing_version(self, row: int) -> int:
+        '''Счетчик изменений ставки строки'''
+        return self.__rate_versions[row]
+
+    def is_available(self, row: int) -> bool:
+        '''Чтение статуса доступности строки'''
+        return bool(self.__available[row])
+
+    def set_is_available(self, row: int, is_available: bool) -> None:
+        '''Запись статуса доступности строки'''
+        self.__available[row] = bool(is_available)
+
+    def specific(self, row: int) -> Any:
+        '''Значение поля, специфичного для класса (с исходным типом: str, int или float)'''
+        value = self.__specific[row]
+        if self.specific_field(self.type_name(row))[1] is str:
+            return self.__labels.value(int(value))
+        return int(value) if self.__specific_ints[row] else value
+
+    def set_specific(self, row: int, value: Any) -> None:
+        '''Запись поля, специфичного для класса'''
+        if self.specific_field(self.type_name(row))[1] is str:
+            value = self.__labels.code(value)
+        else:
+            self.__specific_ints[row] = type(value) is int
+        self.__specific[row] = value
+
+    def subscribe(self, row: int, listener: Callable) -> None:
+        '''Подписка на изменения строки через сеттеры представлений'''
+        self.__listeners.setdefault(row, []).append(listener)
+
+    def unsubscribe(self, row: int, listener: Callable) -> None:
+        '''Отписка от изменений строки'''
+        listeners = self.__listeners.get(row)
+        if listeners and listener in listeners:
+            listeners.remove(listener)
+
+    def notify(self, row: int, field: str, old, new) -> None:
+        '''Оповещение подписчиков строки (listener(представление, поле, старое, новое), как у SportEquipment)'''
+        listeners = self.__listeners.get(row)
+        if listeners:
+            view = self[row]
+            for listener in tuple(listeners):
+                listener(view, field, old, new)
+
+class EquipmentView:
+    '''Представление строки FleetStore с API свойств SportEquipment'''
+    __slots__ = ('_store', '_row')
+    views: Dict[str, type] = {}
+    type_name: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        '''Авторегистрация представления типа type_name'''
+        super().__init_subclass__(**kwargs)
+        if cls.type_name is not None:
+            EquipmentView.views[cls.type_name] = cls
+
+    def __init__(self, store: FleetStore, row: int) -> None:
+        '''Конструктор представления'''
+        self._store = store
+        self._row = row
+
+    @staticmethod
+    def for_type(type_name: str) -> type:
+        '''Класс представления типа: объявленный или построенный по схеме класса оборудования'''
+        view = EquipmentView.views.get(type_name)
+        if view is None:
+            key, kind = FleetStore.specific_field(type_name)
+            equipment_class = EquipmentMeta.lookup(type_name)
+            view = type(f'{equipment_class.__name__}View', (EquipmentView,)
+                        , {'__slots__': (), 'type_name': type_name, key: EquipmentView.specific_property(key, kind)})
+            logger.debug("Построено представление %s по схеме класса", view.__name__)
+        return view
+
+    @staticmethod
+    def specific_property(key: str, kind: type) -> property:
+        '''Свойство специфичного поля для построенного представления (числа не могут быть отрицательными)'''
+        def getter(view: 'EquipmentView') -> Any:
+            '''Геттер специфичного поля'''
+            return view._store.specific(view._row)
+
+        def setter(view: 'EquipmentView', value: Any) -> None:
+            '''Сеттер специфичного поля'''
+            if kind is float and value < 0:
+                logger.error("Попытка установить отрицательное значение поля %s", key)
+                raise InvalidEquipmentError(f"Недопустимое значение для поля {key}")
+            view._set_specific(key, value)
+        return property(getter, setter)
+
+    def subscribe(self, listener: Callable) -> None:
+        '''Подписка на изменения строки'''
+        self._store.subscribe(self._row, listener)
+
+    def unsubscribe(self, listener: Callable) -> None:
+        '''Отписка от изменений строки'''
+        self._store.unsubscribe(self._row, listener)
+
+    def notify(self, field: str, old, new) -> None:
+        '''Оповещение подписчиков строки об изменении атрибута'''
+        self._store.notify(self._row, field, old, new)
+
+    def _set_specific(self, key: str, value: Any) -> None:
+        '''Запись специфичного поля с оповещением'''
+        old = self._store.specific(self._row)
+        self._store.set_specific(self._row, value)
+        self.notify(key, old, value)
+
+    @property
+    def equipment_id(self) -> str:
+        '''Геттер для ID оборудования'''
+        return self._store.equipment_id(self._row)
+
+    @equipment_id.setter
+    def equipment_id(self, equipment_id: str) -> None:
+        '''Сеттер для ID оборудования'''
+        old = self._store.equipment_id(self._row)
+        self._store.set_equipment_id(self._row, equipment_id)
+        try:
+            self.notify('equipment_id', old, equipment_id)
+        except InvalidEquipmentError:
+            self._store.set_equipment_id(self._row, old)
+            raise
+
+    @property
+    def name(self) -> str:
+        '''Геттер для названия оборудования'''
+        return self._store.name(self._row)
+
+    @name.setter
+    def name(self, name: str) -> None:
+        '''Сеттер для названия оборудования'''
+        old = self._store.name(self._row)
+        self._store.set_name(self._row, name)
+        self.notify('name', old, name)
+
+    @property
+    def condition(self) -> str:
+        '''Геттер для состояния оборудования'''
+        return self._store.condition(self._row)
+
+    @condition.setter
+    def condition(self, condition: str) -> None:
+        '''Сеттер для состояния оборудования'''
+        old = self._store.condition(self._row)
+        self._store.set_condition(self._row, condition)
+        self.notify('condition', old, condition)
+
+    @property
+    def hourly_rate(self) -> float:
+        '''Геттер для почасовой ставки'''
+        return self._store.hourly_rate(self._row)
+
+    @hourly_rate.setter
+    def hourly_rate(self, hourly_rate: float) -> None:
+        '''Сеттер для почасовой ставки'''
+        if hourly_rate < 0:
+            logger.error("Попытка установить отрицательную почасовую ставку")
+            raise InvalidEquipmentError("Недопустимое значение для цены")
+        old = self._store.hourly_rate(self._row)
+        self._store.set_hourly_rate(self._row, hourly_rate)
+        self.notify('hourly_rate', old, hourly_rate)
+
+    @property
+    def pricing_version(self) -> int:
+        '''Геттер для счетчика изменений ставки и тарифов'''
+        return self._store.pricing_version(self._row) + EquipmentMeta.tariff_generation
+
+    @property
+    def equipment_class(self) -> type:
+        '''Геттер для исходного класса оборудования строки'''
+        return self._store.equipment_class(self._row)
+
+    @property
+    def tariff(self) -> Tariff:
+        '''Геттер для тарифа исходного класса'''
+        return self._store.equipment_class(self._row).tariff
+
+    @property
+    def is_available(self) -> bool:
+        '''Геттер для статуса доступности'''
+        return self._store.is_available(self._row)
+
+    @is_available.setter
+    def is_available(self, is_available: bool) -> None:
+        '''Сеттер для статуса доступности'''
+        old = self._store.is_available(self._row)
+        self._store.set_is_available(self._row, is_available)
+        self.notify('is_available', old, is_available)
+
+    def release(self) -> bool:
+        '''Возврат инвентаря под блокировкой строки; False, если он уже свободен'''
+        with Locks.units.get((id(self._store), self._row)):
+            if self._store.is_available(self._row):
+                return False
+            self._store.set_is_available(self._row, True)
+        self.notify('is_available', False, True)
+        return True
+
+    def calculate_rental_cost(self, hours: float) -> float:
+        '''Расчет стоимости аренды по тарифу исходного класса'''
+        return self._store.equipment_class(self._row).tariff.cost(self.hourly_rate, hours)
+
+    def __lt__(self, other: Any) -> bool:
+        '''Оператор сравнения "меньше"'''
+        return (self.hourly_rate, self.condition) < (other.hourly_rate, other.condition)
+
+    def __gt__(self, other: Any) -> bool:
+        '''Оператор сравнения "больше"'''
+        return (self.hourly_rate, self.condition) > (other.hourly_rate, other.condition)
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''Преобразование в словарь того же вида, что и SportEquipment.to_dict'''
+        field = self._store.specific_field(self._store.type_name(self._row))[0]
+        return {
+            'equipment_id': self.equipment_id,
+            'name': self.name,
+            'condition': self.condition,
+            'hourly_rate': self.hourly_rate,
+            field: self._store.specific(self._row),
+            'is_available': self.is_available
+        }
+
+class BicycleView(EquipmentView):
+    '''Представление велосипеда'''
+    __slots__ = ()
+    type_name = 'bicycle'
+
+    @property
+    def type(self) -> str:
+        '''Геттер для типа велосипеда'''
+        return self._store.specific(self._row)
+
+    @type.setter
+    def type(self, bike_type: str) -> None:
+        '''Сеттер для типа велосипеда'''
+        self._set_specific('type', bike_type)
+
+    def __str__(self) -> str:
+        '''Строковое представление велосипеда'''
+        return f"Велосипед: {self.name}, Тип: {self.type}"
+
+class SkisView(EquipmentView):
+    '''Представление лыж'''
+    __slots__ = ()
+    type_name = 'skis'
+
+    @property
+    def length(self) -> float:
+        '''Геттер для длины лыж'''
+        return self._store.specific(self._row)
+
+    @length.setter
+    def length(self, length: float) -> None:
+        '''Сеттер для длины лыж'''
+        if length < 0:
+            logger.error("Попытка установить отрицательную длину лыж")
+            raise InvalidEquipmentError
+        self._set_specific('length', length)
+
+    def __str__(self) -> str:
+        '''Строковое представление лыж'''
+        return f"Лыжи: {self.name}, Длина: {self.length}"
+
+class TennisRacketView(EquipmentView):
+    '''Представление теннисной ракетки'''
+    __slots__ = ()
+    type_name = 'tennisracket'
+
+    @property
+    def string_tension(self) -> float:
+        '''Геттер для натяжения струн'''
+        return self._store.specific(self._row)
+
+    @string_tension.setter
+    def string_tension(self, string_tension: float) -> None:
+        '''Сеттер для натяжения струн'''
+        if string_tension < 0:
+            logger.error("Попытка установить отрицательное натяжение струн")
+            raise InvalidEquipmentError("Недопустимое значение для напряжения")
+        self._set_specific('string_tension', string_tension)
+
+    def __str__(self) -> str:
+        '''Строковое представление ракетки'''
+        return f"Теннисная ракетка: {self.name}, Натяжение: {self.string_tension}"
+
+class CustomerStore:
+    '''Колоночное хранилище клиентов'''
+    def __init__(self) -> None:
+        '''Конструктор хранилища клиентов'''
+        self.__ids: List[str] = []
+        self.__names: List[str] = []
+
+    def __len__(self) -> int:
+        '''Количество клиентов'''
+        return len(self.__ids)
+
+    def __getitem__(self, row: int) -> 'CustomerView':
+        '''Представление клиента по номеру строки'''
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        return CustomerView(self, row % len(self))
+
+    def __iter__(self) -> Iterator['CustomerView']:
+        '''Итерация по представлениям клиентов'''
+        for row in range(len(self)):
+            yield CustomerView(self, row)
+
+    def append(self, customer_id: str, name: str) -> int:
+        '''Добавление клиента, возвращает номер строки'''
+        self.__ids.append(customer_id)
+        self.__names.append(name)
+        return len(self.__ids) - 1
+
+    def add(self, customer: Customer) -> int:
+        '''Перенос существующего клиента в хранилище'''
+        return self.append(customer.customer_id, customer.name)
+
+    def customer_id(self, row: int) -> str:
+        '''Чтение ID клиента строки'''
+        return self.__ids[row]
+
+    def set_customer_id(self, row: int, customer_id: str) -> None:
+        '''Запись ID клиента строки'''
+        self.__ids[row] = customer_id
+
+    def name(self, row: int) -> str:
+        '''Чтение имени клиента строки'''
+        return self.__names[row]
+
+    def set_name(self, row: int, name: str) -> None:
+        '''Запись имени клиента строки'''
+        self.__names[row] = name
+
+class CustomerView:
+    '''Представление строки CustomerStore с API свойств Customer'''
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store: CustomerStore, row: int) -> None:
+        '''Конструктор представления'''
+        self._store = store
+        self._row = row
+
+    @property
+    def customer_id(self) -> str:
+        '''Геттер для ID клиента'''
+        return self._store.customer_id(self._row)
+
+    @customer_id.setter
+    def customer_id(self, customer_id: str) -> None:
+        '''Сеттер для ID клиента'''
+        self._store.set_customer_id(self._row, customer_id)
+
+    @property
+    def name(self) -> str:
+        '''Геттер для имени клиента'''
+        return self._store.name(self._row)
+
+    @name.setter
+    def name(self, name: str) -> None:
+        '''Сеттер для имени клиента'''
+        self._store.set_name(self._row, name)
+
+    def __str__(self) -> str:
+        '''Строковое представление клиента'''
+        return f"Клиент {self.name} ID: {self.customer_id}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''Преобразование в словарь того же вида, что и Customer.to_dict'''
+        return {
+            'cutstomer_id': self.customer_id,
+            'name': self.name,
+        }
@@ -0,0 +1,195 @@
+import Logger
+import Events
+import hashlib
+import math
+import mmap
+import os
+import struct
+from itertools import islice
+from typing import Dict, Iterable, Tuple
+from Rental import Rental
+from Errors import InvalidEquipmentError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = Logger.logger
+
+MAGIC = b'RLEDGER1'
+VERSION = 1
+HEADER = struct.Struct('<8sII')
+RECORD = struct.Struct('<ddddH6x24s16s16s')
+COLUMNS = ('start_time', 'end_time', 'total_cost', 'extras_total')
+DOUBLES_PER_RECORD = RECORD.size // 8
+CODE_OFFSET = 4 * 8 // 2
+SHORTS_PER_RECORD = RECORD.size // 2
+
+if np is not None:
+    DTYPE = np.dtype([('start_time', '<f8'), ('end_time', '<f8'), ('total_cost', '<f8'), ('extras_total', '<f8')
+                      , ('type_code', '<u2'), ('padding', 'V6'), ('rental_id', 'S24'), ('customer_id', 'S16')
+                      , ('equipment_id', 'S16')])
+
+def fixed(value: str, size: int) -> bytes:
+    '''Строковое поле фиксированной ширины: слишком длинный ID заменяется меткой '#' и хешем, а не ошибкой'''
+    data = value.encode()
+    if len(data) > size:
+        data = b'#' + hashlib.blake2b(data, digest_size=(size - 1) // 2).hexdigest().encode()
+    return data
+
+def record(rental: Rental) -> bytes:
+    '''Запись аренды фиксированной ширины'''
+    extras = rental.extras
+    end_time = rental.end_time.timestamp() if rental.end_time is not None else math.nan
+    approved = rental.total_cost_approved if rental.total_cost_approved is not None else math.nan
+    return RECORD.pack(rental.start_time.timestamp(), end_time, approved, sum(extras.values()) if extras else 0.0
+                       , getattr(type(rental.equipment), 'type_code', None) or 0
+                       , fixed(rental.rental_id, 24), fixed(rental.customer_info.customer_id, 16)
+                       , fixed(rental.equipment.equipment_id, 16))
+
+class RentalLedger:
+    '''Журнал подтвержденных аренд только на дозапись'''
+    def __init__(self, path: str) -> None:
+        '''Открытие или создание файла журнала'''
+        self.__path = path
+        self.__file = open(path, 'a+b')
+        if self.__file.tell() == 0:
+            self.__file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            self.__file.flush()
+        else:
+            self.__file.seek(0)
+            check_header(self.__file.read(HEADER.size), path)
+            self.__file.seek(0, os.SEEK_END)
+        logger.info("Открыт журнал аренд: %s", path)
+
+    @property
+    def path(self) -> str:
+        '''Геттер для пути к файлу журнала'''
+        return self.__path
+
+    def append(self, rental: Rental) -> None:
+        '''Дозапись одной аренды'''
+        self.__file.write(record(rental))
+
+    def append_many(self, rentals: Iterable[Rental], batch_size: int = 4096) -> int:
+        '''Дозапись аренд пачками'''
+        count = 0
+        rentals = iter(rentals)
+        while True:
+            batch = list(islice(rentals, batch_size))
+            if not batch:
+                break
+            self.__file.write(b''.join(map(record, batch)))
+            count += len(batch)
+        logger.info("В журнал %s записано %s аренд", self.__path, count)
+        return count
+
+    def attach(self, bus: Events.EventBus = Events.bus) -> None:
+        '''Запись в журнал каждой подтвержденной аренды'''
+        bus.subscribe(Events.RENTAL_CONFIRMED, self.append)
+
+    def detach(self, bus: Events.EventBus = Events.bus) -> None:
+        '''Отключение журнала от событий подтверждения'''
+        bus.unsubscribe(Events.RENTAL_CONFIRMED, self.append)
+
+    def flush(self) -> None:
+        '''Сброс буфера записи на диск'''
+        self.__file.flush()
+
+    def view(self) -> 'LedgerView':
+        '''Отображение уже записанной части журнала для чтения'''
+        self.flush()
+        return LedgerView(self.__path)
+
+    def close(self) -> None:
+        '''Закрытие журнала'''
+        self.__file.close()
+        logger.info("Закрыт журнал аренд: %s", self.__path)
+
+    def __enter__(self) -> 'RentalLedger':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def check_header(header: bytes, path: str) -> None:
+    '''Проверка заголовка файла журнала'''
+    if len(header) < HEADER.size:
+        raise InvalidEquipmentError(f"Файл {path} не является журналом аренд")
+    magic, version, size = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or size != RECORD.size:
+        raise InvalidEquipmentError(f"Файл {path} не является журналом аренд версии {VERSION}")
+
+class LedgerView:
+    '''Чтение журнала через mmap без создания объектов на запись; колонки действительны до close()'''
+    def __init__(self, path: str) -> None:
+        '''Отображение файла журнала в память'''
+        self.__file = open(path, 'rb')
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        check_header(self.__map[:HEADER.size], path)
+        self.__count = (len(self.__map) - HEADER.size) // RECORD.size
+        self.__records = memoryview(self.__map)[HEADER.size:HEADER.size + self.__count * RECORD.size]
+
+    def __len__(self) -> int:
+        '''Количество полных записей'''
+        return self.__count
+
+    def column(self, name: str) -> memoryview:
+        '''Колонка double как memoryview с шагом в одну запись'''
+        return self.__records.cast('d')[COLUMNS.index(name)::DOUBLES_PER_RECORD]
+
+    def type_codes(self) -> memoryview:
+        '''Колонка кодов типа оборудования'''
+        return self.__records.cast('H')[CODE_OFFSET::SHORTS_PER_RECORD]
+
+    def array(self):
+        '''Структурированный массив NumPy поверх отображения (None без NumPy)'''
+        if np is None:
+            return None
+        return np.frombuffer(self.__map, dtype=DTYPE, count=self.__count, offset=HEADER.size)
+
+    def record(self, index: int) -> Tuple:
+        '''Разбор одной записи'''
+        values = RECORD.unpack_from(self.__records, index * RECORD.size)
+        return values[:5] + tuple(value.rstrip(b'\0').decode() for value in values[5:])
+
+    def revenue(self) -> float:
+        '''Сумма утвержденных стоимостей'''
+        table = self.array()
+        if table is not None:
+            return float(np.nansum(table['total_cost']))
+        return math.fsum(cost for cost in self.column('total_cost') if cost == cost)
+
+    def hours(self) -> float:
+        '''Суммарная длительность завершенных аренд в часах'''
+        table = self.array()
+        if table is not None:
+            return float(np.nansum(table['end_time'] - table['start_time'])) / 3600
+        return math.fsum(end - start for start, end in zip(self.column('start_time'), self.column('end_time'))
+                         if end == end) / 3600
+
+    def revenue_by_type(self) -> Dict[int, float]:
+        '''Выручка по кодам типа оборудования'''
+        table = self.array()
+        if table is not None:
+            codes, positions = np.unique(table['type_code'], return_inverse=True)
+            costs = np.nan_to_num(table['total_cost'])
+            return dict(zip(codes.tolist(), np.bincount(positions, weights=costs).tolist()))
+        totals: Dict[int, float] = {}
+        for code, cost in zip(self.type_codes(), self.column('total_cost')):
+            if cost == cost:
+                totals[code] = totals.get(code, 0.0) + cost
+        return totals
+
+    def close(self) -> None:
+        '''Освобождение отображения'''
+        self.__records.release()
+        self.__map.close()
+        self.__file.close()
+
+    def __enter__(self) -> 'LedgerView':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,18 @@
+import threading
+from typing import Hashable
+
+class StripedLock:
+    '''Набор блокировок, распределенных по ключам: единицы инвентаря не блокируют друг друга'''
+    def __init__(self, stripes: int = 256) -> None:
+        '''Конструктор набора из stripes блокировок'''
+        self.__locks = [threading.Lock() for _ in range(stripes)]
+
+    def __len__(self) -> int:
+        '''Количество блокировок'''
+        return len(self.__locks)
+
+    def get(self, key: Hashable) -> threading.Lock:
+        '''Блокировка для ключа'''
+        return self.__locks[hash(key) % len(self.__locks)]
+
+units = StripedLock()
@@ -0,0 +1,248 @@
+import Logger
+import argparse
+import calendar
+import logging
+import mmap
+import os
+import pickle
+import re
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from Errors import InvalidEquipmentError
+
+logger = Logger.logger
+
+VERSION = 1
+HEAD_SIZE = 64
+TIMESTAMP = re.compile(rb'(\d{4})-(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d) - [^ ]+ - ([A-Z]+) - ')
+
+LEVEL_CODES = {b'DEBUG': logging.DEBUG, b'INFO': logging.INFO, b'WARNING': logging.WARNING, b'ERROR': logging.ERROR
+               , b'CRITICAL': logging.CRITICAL}
+
+ENTITY_PATTERNS: List[Tuple[str, Tuple[str, ...]]] = [
+    (r'Создана аренда: (\S+)', ('rental',)),
+    (r'(?:Завершение|Продление) аренды (\S+)', ('rental',)),
+    (r'отчета по аренде (\S+)', ('rental',)),
+    (r'Отменено бронирование (\S+) инвентаря (\S+)', ('rental', 'equipment')),
+    (r'ID аренды с (\S+) на (\S+)', ('rental', 'rental')),
+    (r'Создан клиент: .* \(ID: ([^)]+)\)', ('customer',)),
+    (r'ID клиента с (\S+) на (\S+)', ('customer', 'customer')),
+    (r'Клиент (\S+) уже зарегистрирован', ('customer',)),
+    (r'Создан инвентарь: .* \(ID: ([^)]+)\)', ('equipment',)),
+    (r'Инвентарь (?:с ID )?(\S+) (?:добавлен|удален|забронирован с|не зарегистрирован|отсутствует)', ('equipment',)),
+    (r'ID оборудования с (\S+) на (\S+)', ('equipment', 'equipment')),
+    (r'инвентаря с ID (\S+) в каталог', ('equipment',)),
+]
+COMPILED_PATTERNS = [(re.compile(pattern.encode()), kinds) for pattern, kinds in ENTITY_PATTERNS]
+
+def entities(message: bytes) -> List[Tuple[str, str]]:
+    '''Сущности (вид, ID), упомянутые в сообщении лога'''
+    found = []
+    for pattern, kinds in COMPILED_PATTERNS:
+        match = pattern.search(message)
+        if match is not None:
+            found.extend((kind, value.decode(errors='replace')) for kind, value in zip(kinds, match.groups()))
+    return found
+
+def seconds(moment: datetime) -> int:
+    '''Время в секундах в той же шкале, что и отметки лога (локальное время без пояса)'''
+    return calendar.timegm(moment.timetuple())
+
+class SourceIndex:
+    '''Индекс одного файла лога: отметки времени, уровни, смещения записей и списки записей по сущностям'''
+    def __init__(self, head: bytes) -> None:
+        '''Конструктор пустого индекса файла с отпечатком начала файла'''
+        self.head = head
+        self.path = ''
+        self.end = 0
+        self.times = array('q')
+        self.levels = array('B')
+        self.offsets = array('Q')
+        self.postings: Dict[Tuple[str, str], array] = {}
+
+    def __len__(self) -> int:
+        '''Количество проиндексированных записей'''
+        return len(self.offsets)
+
+    def scan(self, data: mmap.mmap, size: int) -> int:
+        '''Дозапись индекса по полным строкам от self.end до size, возвращает число новых записей'''
+        times, levels, offsets, postings = self.times, self.levels, self.offsets, self.postings
+        cached_prefix, cached_seconds = None, 0
+        position, added = self.end, 0
+        while position < size:
+            newline = data.find(b'\n', position, size)
+            if newline < 0:
+                break
+            match = TIMESTAMP.match(data, position, newline)
+            if match is not None:
+                prefix = data[position:position + 19]
+                if prefix != cached_prefix:
+                    cached_prefix = prefix
+                    cached_seconds = calendar.timegm(tuple(map(int, match.groups()[:6])) + (0, 0, 0))
+                record = len(offsets)
+                times.append(cached_seconds)
+                levels.append(LEVEL_CODES.get(match.group(7), 0))
+                offsets.append(position)
+                for entity in entities(data[match.end():newline]):
+                    numbers = postings.get(entity)
+                    if numbers is None:
+                        numbers = postings[entity] = array('I')
+                    if not numbers or numbers[-1] != record:
+                        numbers.append(record)
+                added += 1
+            position = newline + 1
+        self.end = position
+        return added
+
+    def candidates(self, start: Optional[int], end: Optional[int], keys: List[Tuple[str, str]]) -> Sequence[int]:
+        '''Номера записей по спискам сущностей (пересечение) или диапазону времени'''
+        if keys:
+            lists = sorted((self.postings.get(key, ()) for key in keys), key=len)
+            numbers = set(lists[0]).intersection(*lists[1:]) if len(lists) > 1 else lists[0]
+            return sorted(numbers)
+        first = bisect_left(self.times, start) if start is not None else 0
+        last = bisect_right(self.times, end) if end is not None else len(self.times)
+        return range(first, last)
+
+    def record_end(self, number: int) -> int:
+        '''Конец записи (вместе со строками-продолжениями)'''
+        return self.offsets[number + 1] if number + 1 < len(self.offsets) else self.end
+
+class LogIndex:
+    '''Потоковый индекс system.log и ротированных копий; файлы опознаются по inode, а не по имени'''
+    def __init__(self, log_path: str = Logger.log_path, index_path: Optional[str] = None, backups: int = 3) -> None:
+        '''Конструктор индекса: загрузка сохраненного индекса, если он есть'''
+        self.__log_path = log_path
+        self.__index_path = index_path or log_path + '.idx'
+        self.__backups = backups
+        self.__sources: Dict[Tuple[int, int], SourceIndex] = {}
+        self.__order: List[Tuple[int, int]] = []
+        self.load()
+
+    @property
+    def index_path(self) -> str:
+        '''Геттер для пути к файлу индекса'''
+        return self.__index_path
+
+    def __len__(self) -> int:
+        '''Количество проиндексированных записей во всех файлах'''
+        return sum(len(source) for source in self.__sources.values())
+
+    def paths(self) -> List[str]:
+        '''Файлы лога от самого старого к текущему'''
+        candidates = [f'{self.__log_path}.{number}' for number in range(self.__backups, 0, -1)] + [self.__log_path]
+        return [path for path in candidates if os.path.exists(path)]
+
+    def update(self) -> int:
+        '''Инкрементальная индексация: только новые строки, ротация не приводит к переиндексации'''
+        added = 0
+        order = []
+        for path in self.paths():
+            try:
+                with open(path, 'rb') as file:
+                    status = os.fstat(file.fileno())
+                    head = file.read(HEAD_SIZE)
+                    key = (status.st_dev, status.st_ino)
+                    source = self.__sources.get(key)
+                    if source is None or not head.startswith(source.head) or status.st_size < source.end:
+                        source = self.__sources[key] = SourceIndex(head)
+                    if len(source.head) < HEAD_SIZE:
+                        source.head = head
+                    source.path = path
+                    order.append(key)
+                    if status.st_size > source.end:
+                        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                            added += source.scan(data, min(status.st_size, len(data)))
+            except FileNotFoundError:
+                continue
+        for key in set(self.__sources) - set(order):
+            del self.__sources[key]
+        self.__order = order
+        if added:
+            logger.debug("Проиндексировано новых записей лога: %s", added)
+        return added
+
+    def query(self, start: Optional[datetime] = None, end: Optional[datetime] = None, level: Optional[str] = None
+              , rental_id: Optional[str] = None, equipment_id: Optional[str] = None, customer_id: Optional[str] = None
+              , limit: Optional[int] = None, refresh: bool = True) -> Iterator[str]:
+        '''Записи лога по времени, минимальному уровню и ID сущностей без повторного чтения файлов целиком'''
+        if refresh:
+            self.update()
+        minimum = logging.getLevelName(level.upper()) if level else 0
+        if not isinstance(minimum, int):
+            raise InvalidEquipmentError(f"Неизвестный уровень логирования: {level}")
+        start_s = seconds(start) if start is not None else None
+        end_s = seconds(end) if end is not None else None
+        keys = [(kind, value) for kind, value in (('rental', rental_id), ('equipment', equipment_id)
+                                                 , ('customer', customer_id)) if value is not None]
+        returned = 0
+        for key in self.__order:
+            source = self.__sources[key]
+            numbers = [number for number in source.candidates(start_s, end_s, keys)
+                       if source.levels[number] >= minimum
+                       and (start_s is None or source.times[number] >= start_s)
+                       and (end_s is None or source.times[number] <= end_s)]
+            if not numbers:
+                continue
+            with open(source.path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for number in numbers:
+                    yield data[source.offsets[number]:source.record_end(number)].decode('utf-8', errors='replace').rstrip('\n')
+                    returned += 1
+                    if limit is not None and returned >= limit:
+                        return
+
+    def save(self) -> None:
+        '''Атомарная запись индекса на диск'''
+        state = {'version': VERSION, 'order': self.__order, 'sources': {
+            key: (source.head, source.path, source.end, source.times, source.levels, source.offsets, source.postings)
+            for key, source in self.__sources.items()}}
+        temporary = self.__index_path + '.tmp'
+        with open(temporary, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self.__index_path)
+        logger.debug("Индекс лога сохранен в %s", self.__index_path)
+
+    def load(self) -> bool:
+        '''Чтение сохраненного индекса (несовместимый или поврежденный файл игнорируется)'''
+        try:
+            with open(self.__index_path, 'rb') as file:
+                state = pickle.load(file)
+        except FileNotFoundError:
+            return False
+        except (pickle.UnpicklingError, EOFError, ValueError) as error:
+            logger.warning("Индекс лога %s не прочитан: %s", self.__index_path, error)
+            return False
+        if not isinstance(state, dict) or state.get('version') != VERSION:
+            return False
+        self.__sources = {}
+        for key, (head, path, end, times, levels, offsets, postings) in state['sources'].items():
+            source = self.__sources[key] = SourceIndex(head)
+            source.path, source.end = path, end
+            source.times, source.levels, source.offsets, source.postings = times, levels, offsets, postings
+        self.__order = [key for key in state['order'] if key in self.__sources]
+        return True
+
+def main(argv: Optional[List[str]] = None) -> None:
+    '''Командная строка: python LogIndex.py --rental rent_1 --level WARNING --since "2025-01-01 10:00:00"'''
+    parser = argparse.ArgumentParser(description='Поиск по logs/system.log через индекс')
+    parser.add_argument('--log', default=Logger.log_path, help='путь к текущему файлу лога')
+    parser.add_argument('--rental', help='ID аренды')
+    parser.add_argument('--equipment', help='ID инвентаря')
+    parser.add_argument('--customer', help='ID клиента')
+    parser.add_argument('--level', help='минимальный уровень (DEBUG, INFO, WARNING, ERROR)')
+    parser.add_argument('--since', type=datetime.fromisoformat, help='начало интервала, например 2025-01-01 10:00:00')
+    parser.add_argument('--until', type=datetime.fromisoformat, help='конец интервала')
+    parser.add_argument('--limit', type=int, help='максимум записей')
+    args = parser.parse_args(argv)
+    index = LogIndex(args.log)
+    begin = time.perf_counter()
+    for line in index.query(args.since, args.until, args.level, args.rental, args.equipment, args.customer, args.limit):
+        print(line)
+    index.save()
+    logger.debug("Запрос к индексу лога выполнен за %.3f с", time.perf_counter() - begin)
+
+if __name__ == '__main__':
+    main()
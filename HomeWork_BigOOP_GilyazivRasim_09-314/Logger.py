@@ -1,6 +1,11 @@
+import atexit
+import contextlib
+import contextvars
+import copy
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 log_folder = "logs"
 log_file = "system.log"
@@ -9,10 +14,34 @@ log_path = os.path.join(log_folder, log_file)
 if not os.path.exists(log_folder):
     os.makedirs(log_folder)
 
-def setup_logger(log_path):
-    logger = logging.getLogger("equipment_system")
-    logger.setLevel(logging.DEBUG)
+high_throughput = False
+listener = None
+silenced_level = contextvars.ContextVar('silenced_level', default=logging.NOTSET)
+quiet_prints = contextvars.ContextVar('quiet_prints', default=False)
+
+class ContextLogger(logging.Logger):
+    '''Логгер, учитывающий порог silenced() текущего потока (контекста) до создания записи'''
+    def isEnabledFor(self, level):
+        '''Уровень включен глобально и не подавлен в текущем контексте'''
+        return level >= silenced_level.get() and super().isEnabledFor(level)
+
+class SilencedFilter(logging.Filter):
+    '''Фильтр записей ниже порога silenced() для логгера, созданного не как ContextLogger'''
+    def filter(self, record):
+        '''Пропуск записи, если ее уровень не ниже порога текущего контекста'''
+        return record.levelno >= silenced_level.get()
+
+class DeferredQueueHandler(QueueHandler):
+    '''Обработчик очереди: запись строки и форматирование вывода выполняются в фоновом потоке'''
+    def prepare(self, record):
+        '''Сообщение собирается в вызывающем потоке: аргументы фиксируются на момент вызова,
+        ошибка форматирования возникает в месте вызова'''
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        return record
 
+def create_handlers(log_path):
     formatter = logging.Formatter(
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
@@ -30,10 +59,82 @@ def setup_logger(log_path):
     )
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(formatter)
+    return [console_handler, file_handler]
+
+def setup_logger(log_path, asynchronous=False):
+    manager = logging.Logger.manager
+    previous_class = manager.loggerClass
+    manager.setLoggerClass(ContextLogger)
+    try:
+        logger = logging.getLogger("equipment_system")
+    finally:
+        manager.loggerClass = previous_class
+    logger.setLevel(logging.DEBUG)
+    if not isinstance(logger, ContextLogger) and not any(isinstance(item, SilencedFilter) for item in logger.filters):
+        logger.addFilter(SilencedFilter())
 
     if not logger.hasHandlers():
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
+        handlers = create_handlers(log_path)
+        if asynchronous:
+            handlers = [start_listener(handlers)]
+        for handler in handlers:
+            logger.addHandler(handler)
     return logger
 
-logger = setup_logger(log_path)
\ No newline at end of file
+def start_listener(handlers):
+    '''Запуск фонового потока записи логов, возвращает обработчик очереди'''
+    global listener
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return DeferredQueueHandler(records)
+
+def stop_listener():
+    '''Остановка фонового потока с дозаписью очереди'''
+    global listener
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        listener = None
+
+def use_async_logging(enabled=True):
+    '''Переключение логгера между синхронной и фоновой записью'''
+    if enabled == (listener is not None):
+        return
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        if not isinstance(handler, QueueHandler):
+            handler.close()
+    stop_listener()
+    handlers = create_handlers(log_path)
+    if enabled:
+        handlers = [start_listener(handlers)]
+    for handler in handlers:
+        logger.addHandler(handler)
+
+def set_high_throughput(enabled=True):
+    '''Режим высокой нагрузки: фоновая запись логов и отключение print в горячем пути'''
+    global high_throughput
+    high_throughput = enabled
+    use_async_logging(enabled)
+
+def prints_enabled():
+    '''Разрешен ли print в горячем пути: нет в режиме высокой нагрузки и внутри silenced()'''
+    return not (high_throughput or quiet_prints.get())
+
+@contextlib.contextmanager
+def silenced(level=logging.WARNING):
+    '''Подавление логов ниже level и print-эффектов для пакетных операций только в текущем потоке (контексте):
+    глобальный уровень логгера не меняется, вложенные вызовы восстанавливают состояние в своем порядке'''
+    level_token = silenced_level.set(max(silenced_level.get(), level))
+    prints_token = quiet_prints.set(True)
+    try:
+        yield
+    finally:
+        quiet_prints.reset(prints_token)
+        silenced_level.reset(level_token)
+
+atexit.register(stop_listener)
+
+logger = setup_logger(log_path)
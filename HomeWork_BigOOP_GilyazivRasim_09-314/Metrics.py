@@ -0,0 +1,175 @@
+import Logger
+import contextlib
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = Logger.logger
+
+enabled = False
+tracing = False
+
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+SPAN_LIMIT = 10000
+
+class Histogram:
+    '''Гистограмма задержек с фиксированными границами корзин'''
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self) -> None:
+        '''Конструктор пустой гистограммы'''
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        '''Учет одного значения'''
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+lock = threading.Lock()
+counters: Dict[Key, float] = {}
+histograms: Dict[Key, Histogram] = {}
+spans: Deque[Dict[str, Any]] = deque(maxlen=SPAN_LIMIT)
+current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+def key(name: str, labels: Dict[str, str]) -> Key:
+    '''Ключ метрики из имени и меток'''
+    return name, tuple(sorted(labels.items()))
+
+def enable(metrics: bool = True, trace: bool = False) -> None:
+    '''Включение сбора метрик и, по желанию, трассировки'''
+    global enabled, tracing
+    enabled, tracing = metrics, trace
+    logger.info("Метрики: %s, трассировка: %s", metrics, trace)
+
+def disable() -> None:
+    '''Отключение сбора метрик и трассировки'''
+    enable(False, False)
+
+def reset() -> None:
+    '''Сброс всех накопленных значений'''
+    with lock:
+        counters.clear()
+        histograms.clear()
+        spans.clear()
+
+def count(name: str, value: float = 1, **labels) -> None:
+    '''Увеличение счетчика (ничего не делает при отключенных метриках)'''
+    if not enabled:
+        return
+    metric = key(name, labels)
+    with lock:
+        counters[metric] = counters.get(metric, 0) + value
+
+def observe(name: str, seconds: float, **labels) -> None:
+    '''Учет длительности в гистограмме'''
+    metric = key(name, labels)
+    with lock:
+        histogram = histograms.get(metric)
+        if histogram is None:
+            histogram = histograms[metric] = Histogram()
+        histogram.observe(seconds)
+
+@contextlib.contextmanager
+def span(name: str, **labels):
+    '''Замер участка кода: гистограмма при включенных метриках, запись спана при трассировке'''
+    if not enabled:
+        yield
+        return
+    parent = current_span.get()
+    token = current_span.set(name) if tracing else None
+    begin = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        seconds = time.perf_counter() - begin
+        observe(name + '_seconds', seconds, **labels)
+        count(name + ('_errors_total' if failed else '_total'), **labels)
+        if token is not None:
+            current_span.reset(token)
+            spans.append({'name': name, 'labels': labels, 'parent': parent, 'start': begin, 'seconds': seconds
+                          , 'error': failed, 'thread': threading.get_ident()})
+
+def instrument(name: str, **labels):
+    '''Декоратор для замера вызовов функции (без накладных расходов кроме одной проверки при отключении)'''
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def coroutine_wrapper(*args, **kwargs):
+                if not enabled:
+                    return await func(*args, **kwargs)
+                with span(name, **labels):
+                    return await func(*args, **kwargs)
+            return coroutine_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with span(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def snapshot() -> Dict[str, Any]:
+    '''Снимок метрик в виде словаря'''
+    with lock:
+        return {
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                         for (name, labels), value in counters.items()],
+            'histograms': [{'name': name, 'labels': dict(labels), 'buckets': dict(zip(BUCKETS + (float('inf'),), h.counts))
+                            , 'sum': h.total, 'count': h.count} for (name, labels), h in histograms.items()],
+            'spans': list(spans),
+        }
+
+def format_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    '''Метки в синтаксисе Prometheus'''
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+def prometheus() -> str:
+    '''Метрики в текстовом формате Prometheus'''
+    lines: List[str] = []
+    with lock:
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f'# TYPE equipment_{name} counter')
+            for (metric, labels), value in counters.items():
+                if metric == name:
+                    lines.append(f'equipment_{name}{format_labels(labels)} {value}')
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f'# TYPE equipment_{name} histogram')
+            for (metric, labels), histogram in histograms.items():
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket in zip(BUCKETS + (float('inf'),), histogram.counts):
+                    cumulative += bucket
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'equipment_{name}_bucket{format_labels(labels, ("le", le))} {cumulative}')
+                lines.append(f'equipment_{name}_sum{format_labels(labels)} {histogram.total}')
+                lines.append(f'equipment_{name}_count{format_labels(labels)} {histogram.count}')
+    return '\n'.join(lines) + '\n'
+
+def write_prometheus(path: str) -> None:
+    '''Атомарная запись метрик в файл для локального сбора (textfile collector)'''
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        file.write(prometheus())
+    os.replace(temporary, path)
+    logger.debug("Метрики записаны в %s", path)
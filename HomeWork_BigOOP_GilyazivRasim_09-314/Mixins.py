@@ -13,5 +13,24 @@ class NotificationMixin:
     '''Миксин для уведомлений'''
     def send_notification(self, text) -> str:
         '''Метод для отправки уведомлений'''
-        logger.info(f"Уведомление: {text}")
-        return f"[NOTIFICATION] {text}"
\ No newline at end of file
+        logger.info("Уведомление: %s", text)
+        return f"[NOTIFICATION] {text}"
+
+class ObservableMixin:
+    '''Миксин для подписки на изменения атрибутов'''
+    def subscribe(self, listener) -> None:
+        '''Подписка на изменения объекта'''
+        self.__dict__.setdefault('_listeners', []).append(listener)
+
+    def unsubscribe(self, listener) -> None:
+        '''Отписка от изменений объекта'''
+        listeners = self.__dict__.get('_listeners')
+        if listeners and listener in listeners:
+            listeners.remove(listener)
+
+    def notify(self, field: str, old, new) -> None:
+        '''Оповещение подписчиков об изменении атрибута'''
+        listeners = self.__dict__.get('_listeners')
+        if listeners:
+            for listener in listeners:
+                listener(self, field, old, new)
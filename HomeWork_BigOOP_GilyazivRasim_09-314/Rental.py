@@ -1,27 +1,39 @@
 import Logger
-from Mixins import *
-from typing import Dict, Any, Optional
-from SportsEquipment import SportEquipment, Bicycle, Skis, TennisRacket
+import Events
+import Locks
+from Mixins import LoggingMixin, NotificationMixin
+from typing import Dict, Any, Optional, TYPE_CHECKING
+from EquipmentMeta import EquipmentMeta
 from Interface import Reportable
 from Customer import Customer
 from datetime import datetime
+from Errors import InvalidEquipmentError, RentalNotFoundError
+
+if TYPE_CHECKING:
+    from SportsEquipment import SportEquipment
+    from BookingCalendar import BookingCalendar
 
 logger = Logger.logger
 
 class Rental(Reportable, LoggingMixin, NotificationMixin):
     '''Класс аренды'''
-    def __init__(self,rental_id: str, customer: Customer, equipment: SportEquipment
-                 , start_time: datetime, end_time: Optional[datetime] = None, extras: Optional[Dict[str, float]] = None):
+    def __init__(self,rental_id: str, customer: Customer, equipment: 'SportEquipment'
+                 , start_time: datetime, end_time: Optional[datetime] = None, extras: Optional[Dict[str, float]] = None
+                 , calendar: Optional['BookingCalendar'] = None):
         '''Конструктор аренды'''
         self.__rental_id = rental_id
         self.__customer_info = customer
         self.__equipment = equipment
         self.__start_time = start_time
         self.__end_time = end_time
-        self.__extras: Dict[str, float] = extras
+        self.__extras: Optional[Dict[str, float]] = dict(extras) if extras is not None else None
         self.__total_cost: Optional[float] = None
+        self.__cost_key: Optional[tuple] = None
+        self.__version = 0
         self.__total_cost_approved: Optional[float] = None
-        logger.info(f"Создана аренда: {rental_id} для клиента {customer.name}")
+        self.__closed = False
+        self.__calendar = calendar
+        logger.info("Создана аренда: %s для клиента %s", rental_id, customer.name)
 
     @property
     def rental_id(self) -> str:
@@ -31,7 +43,7 @@ class Rental(Reportable, LoggingMixin, NotificationMixin):
     @rental_id.setter
     def rental_id(self, rental_id: str) -> None:
         '''Сеттер для ID аренды'''
-        logger.debug(f"Изменение ID аренды с {self.__rental_id} на {rental_id}")
+        logger.debug("Изменение ID аренды с %s на %s", self.__rental_id, rental_id)
         self.__rental_id = rental_id
 
     @property
@@ -42,19 +54,20 @@ class Rental(Reportable, LoggingMixin, NotificationMixin):
     @customer_info.setter
     def customer_info(self, customer_info: Customer) -> None:
         '''Сеттер для информации о клиенте'''
-        logger.debug(f"Изменение информации о клиенте с {self.__customer_info.name} на {customer_info.name}")
+        logger.debug("Изменение информации о клиенте с %s на %s", self.__customer_info.name, customer_info.name)
         self.__customer_info = customer_info
 
     @property
-    def equipment(self) -> SportEquipment:
+    def equipment(self) -> 'SportEquipment':
         '''Геттер для информации об оборудовании'''
         return self.__equipment
 
     @equipment.setter
-    def equipment(self, equipment: SportEquipment) -> None:
+    def equipment(self, equipment: 'SportEquipment') -> None:
         '''Сеттер для информации об оборудовании'''
-        logger.debug(f"Изменение оборудования с {self.__equipment.name} на {equipment.name}")
+        logger.debug("Изменение оборудования с %s на %s", self.__equipment.name, equipment.name)
         self.__equipment = equipment
+        self.__version += 1
 
     @property
     def start_time(self) -> datetime:
@@ -64,8 +77,9 @@ class Rental(Reportable, LoggingMixin, NotificationMixin):
     @start_time.setter
     def start_time(self, start_time: datetime) -> None:
         '''Сеттер для времени начала аренды'''
-        logger.debug(f"Изменение времени начала аренды с {self.__start_time} на {start_time}")
+        logger.debug("Изменение времени начала аренды с %s на %s", self.__start_time, start_time)
         self.__start_time = start_time
+        self.__version += 1
 
     @property
     def end_time(self) -> datetime:
@@ -76,13 +90,14 @@ class Rental(Reportable, LoggingMixin, NotificationMixin):
     def end_time(self, end_time: datetime) -> None:
         '''Сеттер для времени окончания аренды'''
         if self.__end_time is None:
-            logger.debug(f"Установка времени окончания аренды: {end_time}")
+            logger.debug("Установка времени окончания аренды: %s", end_time)
             self.__end_time = end_time
+            self.__version += 1
 
     @property
     def total_cost(self) -> float:
-        '''Геттер для общей стоимости аренды'''
-        if self.__total_cost is None:
+        '''Геттер для общей стоимости аренды (пересчет только при смене версий входных данных)'''
+        if self.__total_cost is None or self.__cost_key != self.__pricing_key():
             self.calculate_total()
         return self.__total_cost
 
@@ -92,43 +107,123 @@ class Rental(Reportable, LoggingMixin, NotificationMixin):
         return self.__total_cost_approved
     
     @property
-    def extras(self):
-        '''Геттер для дополнительных элементов аренды'''
+    def extras(self) -> Optional[Dict[str, float]]:
+        '''Геттер для дополнительных элементов аренды (изменения словаря учитываются кэшем стоимости)'''
         return self.__extras
 
     @total_cost_approved.setter
     def total_cost_approved(self, total_cost: float) -> None:
         '''Сеттер для утвержденной стоимости'''
         if self.__total_cost_approved is None:
-            logger.info(f"Утверждение стоимости аренды: {total_cost}")
+            logger.info("Утверждение стоимости аренды: %s", total_cost)
             self.__total_cost_approved = total_cost
 
+    @property
+    def closed(self) -> bool:
+        '''Геттер для признака завершения аренды'''
+        return self.__closed
+
+    @property
+    def calendar(self) -> Optional['BookingCalendar']:
+        '''Геттер для календаря, в котором забронирована аренда'''
+        return self.__calendar
+
+    @property
+    def hours(self) -> float:
+        '''Длительность аренды в часах (0 для бессрочной)'''
+        if self.__end_time is None:
+            return 0.0
+        return (self.__end_time - self.__start_time).total_seconds() / 3600
+
+    def __reschedule(self, end_time: datetime) -> tuple:
+        '''Смена времени окончания с доначислением разницы к утвержденной стоимости'''
+        old_hours, old_cost = self.hours, self.__total_cost_approved
+        previous = self.calculate_total() if self.__end_time is not None else 0.0
+        self.__end_time = end_time
+        self.__version += 1
+        if old_cost is not None:
+            self.__total_cost_approved = old_cost + self.calculate_total() - previous
+        return old_hours, old_cost
+
+    def extend(self, end_time: datetime) -> None:
+        '''Продление аренды до нового времени окончания'''
+        if self.__closed:
+            raise RentalNotFoundError(f"Аренда {self.__rental_id} уже завершена")
+        if self.__end_time is not None and end_time <= self.__end_time:
+            raise InvalidEquipmentError("Новое время окончания должно быть позже текущего")
+        logger.info("Продление аренды %s до %s", self.__rental_id, end_time)
+        old_hours, old_cost = self.__reschedule(end_time)
+        Events.bus.emit(Events.RENTAL_EXTENDED, self, old_hours, old_cost)
+
+    def close(self, end_time: Optional[datetime] = None) -> None:
+        '''Завершение аренды: время возврата, освобождение инвентаря и брони; отложенные реакции - после RENTAL_CLOSED'''
+        end_time = end_time or self.__end_time or datetime.now()
+        if end_time < self.__start_time:
+            logger.error("Время возврата %s раньше начала аренды %s", end_time, self.__start_time)
+            raise InvalidEquipmentError("Время возврата раньше времени начала аренды")
+        with Events.bus.operation():
+            with Locks.units.get(id(self.__equipment)):
+                if self.__closed:
+                    raise RentalNotFoundError(f"Аренда {self.__rental_id} уже завершена")
+                previous_end, previous_cost = self.__end_time, self.__total_cost_approved
+                self.__closed = True
+            try:
+                old_hours, old_cost = self.__reschedule(end_time)
+                if self.__calendar is not None:
+                    try:
+                        self.__calendar.cancel(self.__equipment.equipment_id, self.__start_time)
+                    except RentalNotFoundError:
+                        logger.warning("Бронирование аренды %s не найдено в календаре", self.__rental_id)
+                else:
+                    self.__equipment.release()
+            except Exception:
+                with Locks.units.get(id(self.__equipment)):
+                    self.__end_time, self.__total_cost_approved = previous_end, previous_cost
+                    self.__version += 1
+                    self.__closed = False
+                logger.exception("Аренда %s не завершена, состояние восстановлено", self.__rental_id)
+                raise
+            logger.info("Завершение аренды %s в %s", self.__rental_id, end_time)
+            Events.bus.emit(Events.RENTAL_CLOSED, self, old_hours, old_cost)
+
     def add_extra(self, service: str, price: float) -> None:
         '''Добавление дополнительной услуги'''
-        logger.info(f"Добавление дополнительной услуги: {service} за {price}")
+        logger.info("Добавление дополнительной услуги: %s за %s", service, price)
+        if self.__extras is None:
+            self.__extras = {}
         self.__extras[service] = price
-        self.__total_cost = None
+        self.__version += 1
 
     def remove_extra(self, service: str) -> None:
         '''Удаление дополнительной услуги'''
-        if service in self.__extras:
-            logger.info(f"Удаление дополнительной услуги: {service}")
+        if self.__extras and service in self.__extras:
+            logger.info("Удаление дополнительной услуги: %s", service)
             del self.__extras[service]
-            self.__total_cost = self.calculate_total()
+            self.__version += 1
+
+    def invalidate_cost(self) -> None:
+        '''Сброс кэша стоимости: следующее чтение total_cost пересчитает ее'''
+        self.__total_cost = None
+        self.__cost_key = None
+
+    def __pricing_key(self) -> tuple:
+        '''Ключ кэша стоимости: версии аренды и цен инвентаря и состав доп. услуг (словарь доступен через extras)'''
+        extras = self.__extras
+        return self.__version, self.__equipment.pricing_version, tuple(extras.items()) if extras else None
 
     def calculate_total(self) -> float:
         '''Расчет общей стоимости аренды'''
-        logger.debug("Расчет общей стоимости аренды")
-        if self.__total_cost is not None:
+        key = self.__pricing_key()
+        if self.__total_cost is not None and self.__cost_key == key:
             return self.__total_cost
+        logger.debug("Расчет общей стоимости аренды")
 
         hours = (self.end_time - self.start_time).total_seconds() / 3600
         base_cost = self.equipment.calculate_rental_cost(hours)
-        extras_cost = 0
-        if self.__extras is not None:
-            extras_cost = sum(self.__extras.values())
+        extras_cost = self.equipment.tariff.extras_cost(self.__extras)
         self.__total_cost = base_cost + extras_cost
-        logger.debug(f"Общая стоимость аренды: {self.__total_cost}")
+        self.__cost_key = key
+        logger.debug("Общая стоимость аренды: %s", self.__total_cost)
         return self.__total_cost
 
     def __str__(self):
@@ -144,7 +239,7 @@ class Rental(Reportable, LoggingMixin, NotificationMixin):
 
     def generate_report(self) -> str:
         '''Генерация отчета по аренде'''
-        logger.info(f"Генерация отчета по аренде {self.rental_id}")
+        logger.info("Генерация отчета по аренде %s", self.rental_id)
         return self.__str__()
 
     def to_dict(self) -> Dict[str, Any]:
@@ -155,24 +250,20 @@ class Rental(Reportable, LoggingMixin, NotificationMixin):
             'equipment': self.equipment.to_dict(),
             'start_time': self.start_time.timestamp(),
             'end_time': self.end_time.timestamp() if self.end_time else None,
-            'extras': self.__extras
+            'extras': dict(self.__extras) if self.__extras is not None else None
         }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Rental':
         '''Создание аренды из словаря'''
-        logger.debug(f"Создание Rental из словаря: {data}")
+        logger.debug("Создание Rental из словаря: %s", data)
         dict = list(data.values())
         eq = dict[2]
-        res_dict = None
-        if 'length' in eq.keys():
-            res_dict = Skis.from_dict(eq)
-        elif 'type' in eq.keys():
-            res_dict = Bicycle.from_dict(eq)
-        elif 'string_tension' in eq.keys():
-            res_dict = TennisRacket.from_dict(eq)
-        else:
-            res_dict = SportEquipment.from_dict(eq)
+        equipment_class = EquipmentMeta.by_fields(eq)
+        if equipment_class is None:
+            logger.error("Не удалось определить тип инвентаря по словарю: %s", eq)
+            raise InvalidEquipmentError("Неизвестный тип инвентаря в словаре аренды")
+        res_dict = equipment_class.from_dict(eq)
 
         return cls(dict[0],
                  Customer.from_dict(dict[1]),
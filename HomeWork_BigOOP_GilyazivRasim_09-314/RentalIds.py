@@ -0,0 +1,114 @@
+import Logger
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from operator import attrgetter
+from typing import List, Sequence, Tuple
+from Errors import InvalidEquipmentError
+
+logger = Logger.logger
+
+EPOCH_MS = 1704067200000
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+TIME_SHIFT = WORKER_BITS + SEQUENCE_BITS
+TICK = 1 << WORKER_BITS
+MAX_WORKER = (1 << WORKER_BITS) - 1
+PREFIX = 'rent_'
+
+def milliseconds(moment: datetime) -> int:
+    '''Миллисекунды от эпохи генератора (наивное время считается локальным)'''
+    return int(moment.timestamp() * 1000) - EPOCH_MS
+
+def process_worker_id() -> int:
+    '''Номер процесса: RENTAL_WORKER_ID, если задан, иначе младшие биты PID (свой у каждого живого процесса)'''
+    configured = os.environ.get('RENTAL_WORKER_ID')
+    return int(configured) if configured is not None else os.getpid() & MAX_WORKER
+
+class IdGenerator:
+    '''Генератор уникальных возрастающих ID в стиле snowflake: время (мс) | номер в мс | номер процесса.
+    Общее состояние защищено threading.Lock: в CPython это дешевле и проще атомарных счетчиков, которых нет'''
+    def __init__(self, worker_id: int = 0, clock=time.time_ns) -> None:
+        '''Конструктор генератора для процесса worker_id (0..1023)'''
+        self.__clock = clock
+        self.__last = 0
+        self.__lock = threading.Lock()
+        self.worker_id = worker_id
+
+    @property
+    def worker_id(self) -> int:
+        '''Геттер для номера процесса'''
+        return self.__worker_id
+
+    @worker_id.setter
+    def worker_id(self, worker_id: int) -> None:
+        '''Сеттер для номера процесса (у каждого процесса-писателя свой)'''
+        if not 0 <= worker_id <= MAX_WORKER:
+            raise InvalidEquipmentError(f"Номер процесса должен быть от 0 до {MAX_WORKER}")
+        with self.__lock:
+            self.__worker_id = worker_id
+            self.__last = self.__last >> WORKER_BITS << WORKER_BITS | worker_id
+        logger.debug("Генератор ID: процесс %s", worker_id)
+
+    def reserve(self, count: int = 1) -> int:
+        '''Первый из count подряд идущих ID (шаг TICK); переполнение номера в мс занимает следующую мс'''
+        floor = (self.__clock() // 1000000 - EPOCH_MS) << TIME_SHIFT | self.__worker_id
+        with self.__lock:
+            first = self.__last + TICK if self.__last >= floor else floor
+            self.__last = first + (count - 1) * TICK
+        return first
+
+    def next_id(self) -> int:
+        '''Следующий ID'''
+        return self.reserve()
+
+    def next_rental_id(self) -> str:
+        '''Следующий ID аренды: строки сортируются так же, как числа'''
+        return f'{PREFIX}{self.reserve():019d}'
+
+    def rental_ids(self, count: int) -> List[str]:
+        '''Пачка ID аренд за одно обращение к общему состоянию'''
+        first = self.reserve(count)
+        return [f'{PREFIX}{first + i * TICK:019d}' for i in range(count)]
+
+    @staticmethod
+    def parse(rental_id: str) -> int:
+        '''Число из ID аренды'''
+        if not rental_id.startswith(PREFIX) or len(rental_id) != len(PREFIX) + 19:
+            raise InvalidEquipmentError(f"ID {rental_id!r} создан не генератором")
+        return int(rental_id[len(PREFIX):])
+
+    @staticmethod
+    def created_at(rental_id: str) -> datetime:
+        '''Время создания, закодированное в ID аренды'''
+        value = IdGenerator.parse(rental_id)
+        return datetime.fromtimestamp(((value >> TIME_SHIFT) + EPOCH_MS) / 1000)
+
+    @staticmethod
+    def worker_of(rental_id: str) -> int:
+        '''Номер процесса, выдавшего ID аренды'''
+        return IdGenerator.parse(rental_id) & MAX_WORKER
+
+    @staticmethod
+    def bounds(start_time: datetime, end_time: datetime) -> Tuple[str, str]:
+        '''Диапазон ключей [low, high] для аренд, созданных в интервале [start_time, end_time]'''
+        low = max(milliseconds(start_time), 0) << TIME_SHIFT
+        high = ((max(milliseconds(end_time), -1) + 1) << TIME_SHIFT) - 1
+        return f'{PREFIX}{low:019d}', f'{PREFIX}{max(high, 0):019d}'
+
+    @staticmethod
+    def created_between(rentals: Sequence, start_time: datetime, end_time: datetime) -> Sequence:
+        '''Срез списка аренд, упорядоченного по rental_id, созданных в интервале (двоичный поиск)'''
+        low, high = IdGenerator.bounds(start_time, end_time)
+        key = attrgetter('rental_id')
+        return rentals[bisect_left(rentals, low, key=key):bisect_right(rentals, high, key=key)]
+
+def reassign_after_fork() -> None:
+    '''Дочерний процесс fork не должен продолжать последовательность родителя под его номером'''
+    rental_ids.worker_id = os.getpid() & MAX_WORKER
+
+rental_ids = IdGenerator(process_worker_id())
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reassign_after_fork)
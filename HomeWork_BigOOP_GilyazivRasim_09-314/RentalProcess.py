@@ -1,25 +1,28 @@
 import Logger
+import Metrics
+import Events
 from abc import abstractmethod
-from Mixins import *
-from SportsEquipment import Rentable, Reportable
+from typing import Dict, Optional
+from datetime import datetime
+from Mixins import LoggingMixin
+from Interface import Rentable, Reportable
 from SportsEquipment import SportEquipment
 from Customer import Customer
 from Request import Request
-from typing import Optional
-from datetime import datetime
-from Chain_of_Responsibilities import *
+from Chain_of_Responsibilities import ChangeHandler, approvals
 from Rental import Rental
-from typing import Dict
-from Errors import *
+from Errors import RentalNotFoundError
+from BookingCalendar import BookingCalendar
 
 logger = Logger.logger
 
 class RentalProcess(Rental, Rentable, Reportable, LoggingMixin):
     '''Абстрактный класс процесса аренды'''
     def __init__(self, rental_id: str, customer: Customer, equipment: SportEquipment
-                 , start_time: datetime, end_time: Optional[datetime] = None, extras: Optional[Dict[str, float]] = None) -> None:
+                 , start_time: datetime, end_time: Optional[datetime] = None, extras: Optional[Dict[str, float]] = None
+                 , calendar: Optional[BookingCalendar] = None) -> None:
         '''Конструктор процесса аренды'''
-        super().__init__(rental_id, customer, equipment, start_time, end_time, extras)
+        super().__init__(rental_id, customer, equipment, start_time, end_time, extras, calendar)
 
     def rent_equipment(self, request: Optional[Request] = None) -> 'Rental':
         '''Метод аренды оборудования'''
@@ -27,11 +30,33 @@ class RentalProcess(Rental, Rentable, Reportable, LoggingMixin):
             rent = self.create()
             price = rent.total_cost
             rent.total_cost_approved = self.confirm(price, request)
+            Events.bus.emit(Events.RENTAL_CONFIRMED, rent)
             return rent
         else:
             logger.error("Попытка арендовать недоступное оборудование")
             raise RentalNotFoundError("Инвентарь недоступен")
 
+    @Metrics.instrument('rental_stage', stage='confirm_async')
+    async def confirm_async(self, price: float, request: Optional[Request]
+                            , chain: Optional[ChangeHandler] = None) -> float:
+        '''Асинхронное согласование цены: цепочка обработчиков ожидается без блокировки цикла событий'''
+        logger.debug("Асинхронное согласование цены с персоналом")
+        if request:
+            chain = chain if chain is not None else approvals.chain
+            price = request.newprice if await chain.handle_request_async(request) else price
+        return price
+
+    async def rent_equipment_async(self, request: Optional[Request] = None
+                                   , chain: Optional[ChangeHandler] = None) -> 'Rental':
+        '''Асинхронная аренда без печати отчета: проверка и создание идут в памяти, ожидается только согласование'''
+        if not self.check():
+            logger.error("Попытка арендовать недоступное оборудование")
+            raise RentalNotFoundError("Инвентарь недоступен")
+        rent = self.create()
+        rent.total_cost_approved = await self.confirm_async(rent.total_cost, request, chain)
+        Events.bus.emit(Events.RENTAL_CONFIRMED, rent)
+        return rent
+
     @abstractmethod
     def check(self):
         '''Абстрактный метод проверки'''
@@ -50,63 +75,97 @@ class RentalProcess(Rental, Rentable, Reportable, LoggingMixin):
 class OnlineRentalProcess(RentalProcess):
     '''Класс онлайн процесса аренды'''
     def __init__(self, rental_id: str, customer: Customer, equipment: SportEquipment
-                 , start_time: datetime, end_time: Optional[datetime] = None, extras: Optional[Dict[str, float]] = None) -> None:
+                 , start_time: datetime, end_time: Optional[datetime] = None, extras: Optional[Dict[str, float]] = None
+                 , calendar: Optional[BookingCalendar] = None) -> None:
         '''Конструктор онлайн процесса'''
-        super().__init__(rental_id, customer, equipment, start_time, end_time, extras)
+        super().__init__(rental_id, customer, equipment, start_time, end_time, extras, calendar)
 
+    @Metrics.instrument('rental', channel='online')
     def rent_equipment(self, request: Optional[Request] = None) -> 'Rental':
         '''Метод онлайн аренды'''
         logger.info("Начало онлайн процесса аренды")
         rent = super().rent_equipment(request)
-        print(rent.generate_report())
+        if Logger.prints_enabled():
+            print(rent.generate_report())
         return rent
 
+    @Metrics.instrument('rental_async', channel='online')
+    async def rent_equipment_async(self, request: Optional[Request] = None
+                                   , chain: Optional[ChangeHandler] = None) -> 'Rental':
+        '''Асинхронная онлайн аренда без печати отчета: отчет формирует вызывающая сторона'''
+        logger.info("Начало асинхронного онлайн процесса аренды")
+        return await super().rent_equipment_async(request, chain)
+
+    @Metrics.instrument('rental_stage', stage='check', channel='online')
     def check(self):
         '''Метод проверки для онлайн аренды'''
         logger.debug("Онлайн проверка доступности оборудования")
+        if self.calendar is not None:
+            return self.calendar.is_free(self.equipment.equipment_id, self.start_time, self.end_time)
         return self.equipment.is_available
 
+    @Metrics.instrument('rental_stage', stage='create', channel='online')
     def create(self):
         '''Метод создания онлайн аренды'''
         logger.debug("Подсчет базовой стоимости онлайн")
+        if self.calendar is not None:
+            return self.equipment.reserve_equipment(self.calendar, self.customer_info, self.start_time, self.end_time, self.extras)
         rent = self.equipment.rent_equipment(self.customer_info, self.start_time, self.end_time, self.extras)
         return rent
 
+    @Metrics.instrument('rental_stage', stage='confirm', channel='online')
     def confirm(self, price, request):
         '''Метод подтверждения для онлайн аренды'''
         logger.debug("Согласование цены с персоналом онлайн")
         if request:
-            price = request.newprice if Operator(Manager(Admin())).handle_request(request) else price
+            price = request.newprice if approvals.approve(request) else price
         return price
 
 class OfflineRentalProcess(RentalProcess):
     '''Класс оффлайн процесса аренды'''
     def __init__(self, rental_id: str, customer: Customer, equipment: SportEquipment
-                 , start_time: datetime, end_time: Optional[datetime] = None, extras: Optional[Dict[str, float]] = None) -> None:
+                 , start_time: datetime, end_time: Optional[datetime] = None, extras: Optional[Dict[str, float]] = None
+                 , calendar: Optional[BookingCalendar] = None) -> None:
         '''Конструктор онлайн процесса'''
-        super().__init__(rental_id, customer, equipment, start_time, end_time, extras)
+        super().__init__(rental_id, customer, equipment, start_time, end_time, extras, calendar)
 
+    @Metrics.instrument('rental', channel='offline')
     def rent_equipment(self, request: Optional[Request] = None) -> 'Rental':
         '''Метод оффлайн аренды'''
         logger.info("Начало оффлайн процесса аренды")
         rent = super().rent_equipment(request)
-        print(rent.generate_report())
+        if Logger.prints_enabled():
+            print(rent.generate_report())
         return rent
 
+    @Metrics.instrument('rental_async', channel='offline')
+    async def rent_equipment_async(self, request: Optional[Request] = None
+                                   , chain: Optional[ChangeHandler] = None) -> 'Rental':
+        '''Асинхронная оффлайн аренда без печати отчета: отчет формирует вызывающая сторона'''
+        logger.info("Начало асинхронного оффлайн процесса аренды")
+        return await super().rent_equipment_async(request, chain)
+
+    @Metrics.instrument('rental_stage', stage='check', channel='offline')
     def check(self):
         '''Метод проверки для оффлайн аренды'''
         logger.debug("Оффлайн проверка доступности оборудования")
+        if self.calendar is not None:
+            return self.calendar.is_free(self.equipment.equipment_id, self.start_time, self.end_time)
         return self.equipment.is_available
 
+    @Metrics.instrument('rental_stage', stage='create', channel='offline')
     def create(self):
         '''Метод создания оффлайн аренды'''
         logger.debug("Подсчет базовой стоимости оффлайн")
+        if self.calendar is not None:
+            return self.equipment.reserve_equipment(self.calendar, self.customer_info, self.start_time, self.end_time, self.extras)
         rent = self.equipment.rent_equipment(self.customer_info, self.start_time, self.end_time, self.extras)
         return rent
 
+    @Metrics.instrument('rental_stage', stage='confirm', channel='offline')
     def confirm(self, price, request):
         '''Метод подтверждения для оффлайн аренды'''
         logger.debug("Согласование цены с персоналом оффлайн")
         if request:
-            price = request.newprice if Operator(Manager(Admin())).handle_request(request) else price
+            price = request.newprice if approvals.approve(request) else price
         return price
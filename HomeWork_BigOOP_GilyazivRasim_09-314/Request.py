@@ -9,7 +9,7 @@ class Request:
         self.__type = type
         self.__approved = approved
         self.newprice = newprice
-        logger.debug(f"Создан запрос типа {type} на сумму {newprice}")
+        logger.debug("Создан запрос типа %s на сумму %s", type, newprice)
 
     @property
     def type(self) -> str:
@@ -19,7 +19,7 @@ class Request:
     @type.setter
     def type(self, type: str) -> None:
         '''Сеттер для типа запроса'''
-        logger.debug(f"Изменение типа запроса с {self.__type} на {type}")
+        logger.debug("Изменение типа запроса с %s на %s", self.__type, type)
         self.__type = type
 
     @property
@@ -31,5 +31,5 @@ class Request:
     def approved(self, approved: bool) -> None:
         '''Сеттер для статуса одобрения'''
         if not self.__approved:
-            logger.info(f"Изменение статуса одобрения запроса с {self.__approved} на {approved}")
+            logger.info("Изменение статуса одобрения запроса с %s на %s", self.__approved, approved)
             self.__approved = approved
\ No newline at end of file
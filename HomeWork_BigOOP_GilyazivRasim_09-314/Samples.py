@@ -0,0 +1,40 @@
+import Logger
+import random
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple
+from EquipmentFactory import EquipmentFactory
+from Customer import Customer
+from Rental import Rental
+
+EQUIPMENT_ARGS = {
+    'bicycle': lambda i: ('Mountain',),
+    'skis': lambda i: (150 + i % 40,),
+    'tennisracket': lambda i: (1.0 + (i % 5) / 10,),
+}
+
+START_TIME = datetime(2025, 1, 1, 10)
+
+def fleet_rows(size: int, seed: Optional[int] = 0, types: Sequence[str] = tuple(EQUIPMENT_ARGS)) -> Iterator[Tuple]:
+    '''Аргументы фабрики для парка: при seed=None ставка 50 + i % 250 и состояние good, иначе случайные'''
+    rng = random.Random(seed) if seed is not None else None
+    for i in range(size):
+        equipment_type = types[i % len(types)]
+        if rng is None:
+            condition, hourly_rate = 'good', 50 + i % 250
+        else:
+            condition, hourly_rate = rng.choice(['perfect', 'good', 'bad']), rng.randint(50, 300)
+        yield (equipment_type, str(i), f'{equipment_type}_{i}', condition, hourly_rate, *EQUIPMENT_ARGS[equipment_type](i))
+
+def build_fleet(size: int, seed: Optional[int] = 0, types: Sequence[str] = tuple(EQUIPMENT_ARGS)) -> List:
+    '''Парк инвентаря заданного размера без логов и print'''
+    with Logger.silenced():
+        return [EquipmentFactory.create_equipment(*row) for row in fleet_rows(size, seed, types)]
+
+def build_rentals(fleet: Sequence, seed: int = 0) -> List[Rental]:
+    '''Аренды для каждой единицы парка со случайной длительностью'''
+    rng = random.Random(seed)
+    with Logger.silenced():
+        customers = [Customer(str(i), f'customer_{i}') for i in range(max(1, len(fleet) // 10))]
+        return [Rental(f'rent_{i}', rng.choice(customers), unit, START_TIME
+                       , START_TIME + timedelta(hours=rng.randint(1, 12)), {'helmet': 50.0} if i % 4 == 0 else None)
+                for i, unit in enumerate(fleet)]
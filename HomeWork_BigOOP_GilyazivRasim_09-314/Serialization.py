@@ -0,0 +1,267 @@
+import Logger
+import math
+import struct
+from datetime import datetime
+from itertools import islice
+from operator import attrgetter
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+from EquipmentMeta import EquipmentMeta
+from SportsEquipment import SportEquipment
+from Customer import Customer, registry
+from Rental import Rental
+from Errors import InvalidEquipmentError
+
+logger = Logger.logger
+
+EQUIPMENT, CUSTOMER, RENTAL = 1, 2, 3
+NO_EXTRAS = 0xFFFF
+SEPARATOR = '\0'
+
+FRAME = struct.Struct('<I')
+KIND = struct.Struct('<B')
+
+def optional_float(value: float) -> Optional[float]:
+    '''NaN в двоичном формате обозначает отсутствующее значение'''
+    return None if math.isnan(value) else value
+
+def join_strings(strings) -> bytes:
+    '''Строковые поля записи одним блоком UTF-8 через NUL (NUL внутри поля отклоняется при записи)'''
+    joined = SEPARATOR.join(strings)
+    if joined.count(SEPARATOR) != len(strings) - 1:
+        logger.error("Символ NUL в строковом поле записи: %r", strings)
+        raise InvalidEquipmentError("Строковое поле содержит символ NUL, недопустимый в двоичном формате")
+    return joined.encode()
+
+def split_strings(data: bytes, offset: int, count: int) -> List[str]:
+    '''Разбор строкового блока записи'''
+    strings = data[offset:].decode().split(SEPARATOR)
+    if len(strings) != count:
+        raise InvalidEquipmentError("Поврежденная запись или символ NUL в строковом поле")
+    return strings
+
+class Probe:
+    '''Метка аргумента конструктора при построении карты атрибутов'''
+    def __getattr__(self, name: str) -> 'Probe':
+        return self
+
+class StateLayout:
+    '''Создание объектов в обход конструктора по карте "параметр -> атрибут"'''
+    immutable = (type(None), bool, int, float, str, bytes, tuple)
+
+    def __init__(self, cls: type, parameter_count: int) -> None:
+        '''Карта строится по одному пробному вызову конструктора с метками'''
+        self.cls = cls
+        self.attributes = None
+        self.constants = {}
+        probes = [Probe() for _ in range(parameter_count)]
+        try:
+            with Logger.silenced():
+                state = vars(cls(*probes))
+        except Exception:
+            logger.debug("Класс %s восстанавливается через конструктор", cls.__name__)
+            return
+        positions = {id(probe): position for position, probe in enumerate(probes)}
+        attributes = [None] * parameter_count
+        for name, value in state.items():
+            position = positions.get(id(value))
+            if position is not None:
+                attributes[position] = name
+            elif isinstance(value, self.immutable):
+                self.constants[name] = value
+            else:
+                logger.debug("Класс %s восстанавливается через конструктор", cls.__name__)
+                return
+        if None not in attributes:
+            self.attributes = attributes
+
+    def create(self, values) -> Any:
+        '''Объект с заданными значениями параметров конструктора'''
+        if self.attributes is None:
+            return self.cls(*values)
+        obj = self.cls.__new__(self.cls)
+        state = obj.__dict__
+        state.update(self.constants)
+        state.update(zip(self.attributes, values))
+        return obj
+
+class EquipmentLayout:
+    '''Двоичная схема класса оборудования, построенная по EquipmentMeta.schema'''
+    def __init__(self, equipment_class: type) -> None:
+        '''Компиляция схемы класса в форматы struct'''
+        schema = equipment_class.schema()
+        self.equipment_class = equipment_class
+        self.code = equipment_class.type_code
+        keys = [key for _, key, _, _ in schema]
+        kinds = [annotation for _, _, annotation, _ in schema]
+        for key, kind in zip(keys, kinds):
+            if kind not in (str, float, bool):
+                raise InvalidEquipmentError(f"Поле {key} класса {equipment_class.__name__} не поддерживается форматом")
+        order = ([i for i, kind in enumerate(kinds) if kind is str] + [i for i, kind in enumerate(kinds) if kind is float]
+                 + [i for i, kind in enumerate(kinds) if kind is bool])
+        self.string_count = kinds.count(str)
+        self.float_count = kinds.count(float)
+        self.values = attrgetter(*[keys[i] for i in order])
+        self.inverse = [order.index(position) for position in range(len(order))]
+        state = StateLayout(equipment_class, len(schema))
+        self.constants = state.constants
+        self.string_attributes = self.number_attributes = None
+        if state.attributes is not None:
+            attributes = [state.attributes[i] for i in order]
+            self.string_attributes = attributes[:self.string_count]
+            self.number_attributes = attributes[self.string_count:]
+        numbers = 'd' * kinds.count(float) + '?' * kinds.count(bool)
+        self.equipment = struct.Struct('<BBH' + numbers)
+        self.rental = struct.Struct('<BBH' + numbers + 'dddH')
+
+    def int_mask(self, numbers: tuple) -> int:
+        '''Маска полей float, в которых хранится int (тип сохраняется при обратном чтении)'''
+        mask = 0
+        for position, value in enumerate(numbers[:self.float_count]):
+            if type(value) is int:
+                mask |= 1 << position
+        return mask
+
+    @staticmethod
+    def restore_ints(numbers: tuple, mask: int) -> tuple:
+        '''Возврат типа int полям, отмеченным в маске'''
+        if not mask:
+            return numbers
+        return tuple(int(value) if mask >> position & 1 else value for position, value in enumerate(numbers))
+
+    def build(self, strings: List[str], numbers: tuple) -> SportEquipment:
+        '''Создание объекта из разобранных полей'''
+        if self.string_attributes is None:
+            merged = strings + list(numbers)
+            return self.equipment_class(*[merged[k] for k in self.inverse])
+        obj = self.equipment_class.__new__(self.equipment_class)
+        state = obj.__dict__
+        state.update(self.constants)
+        state.update(zip(self.string_attributes, strings))
+        state.update(zip(self.number_attributes, numbers))
+        return obj
+
+class BinarySerializer:
+    '''Компактный двоичный формат для оборудования, клиентов и аренд'''
+    layouts: Dict[Any, EquipmentLayout] = {}
+    rentals = StateLayout(Rental, 6)
+
+    @staticmethod
+    def layout(key) -> EquipmentLayout:
+        '''Схема по классу или коду типа'''
+        layout = BinarySerializer.layouts.get(key)
+        if layout is None:
+            equipment_class = EquipmentMeta.by_code(key) if isinstance(key, int) else key
+            if equipment_class is None or getattr(equipment_class, 'type_code', None) is None:
+                logger.error("Неизвестный тип для двоичного формата: %s", key)
+                raise InvalidEquipmentError(f"Неизвестный тип для двоичного формата: {key}")
+            layout = EquipmentLayout(equipment_class)
+            BinarySerializer.layouts[equipment_class] = BinarySerializer.layouts[layout.code] = layout
+        return layout
+
+    @staticmethod
+    def encode(obj: Any) -> bytes:
+        '''Кодирование одного объекта'''
+        if isinstance(obj, Rental):
+            return BinarySerializer.encode_rental(obj)
+        if isinstance(obj, Customer):
+            return KIND.pack(CUSTOMER) + join_strings((obj.customer_id, obj.name))
+        if isinstance(obj, SportEquipment):
+            layout = BinarySerializer.layout(type(obj))
+            values = layout.values(obj)
+            strings, numbers = values[:layout.string_count], values[layout.string_count:]
+            return layout.equipment.pack(EQUIPMENT, layout.code, layout.int_mask(numbers), *numbers) + join_strings(strings)
+        raise InvalidEquipmentError(f"Тип {type(obj).__name__} не поддерживается двоичным форматом")
+
+    @staticmethod
+    def encode_rental(rental: Rental) -> bytes:
+        '''Кодирование аренды вместе с клиентом и оборудованием'''
+        layout = BinarySerializer.layout(type(rental.equipment))
+        values = layout.values(rental.equipment)
+        customer = rental.customer_info
+        extras = rental.extras
+        end_time = rental.end_time.timestamp() if rental.end_time is not None else math.nan
+        approved = rental.total_cost_approved if rental.total_cost_approved is not None else math.nan
+        numbers = values[layout.string_count:]
+        header = layout.rental.pack(RENTAL, layout.code, layout.int_mask(numbers), *numbers, rental.start_time.timestamp(),
+                                    end_time, approved, NO_EXTRAS if extras is None else len(extras))
+        strings = [rental.rental_id, customer.customer_id, customer.name, *values[:layout.string_count]]
+        if not extras:
+            return header + join_strings(strings)
+        strings.extend(extras)
+        return header + struct.pack(f'<{len(extras)}d', *extras.values()) + join_strings(strings)
+
+    @staticmethod
+    def decode(data: bytes) -> Any:
+        '''Декодирование одного объекта (без побочных эффектов конструкторов)'''
+        with Logger.silenced():
+            return BinarySerializer.__decode(data)
+
+    @staticmethod
+    def __decode(data: bytes) -> Any:
+        '''Разбор записи по байту вида'''
+        kind = data[0]
+        if kind == CUSTOMER:
+            return registry.intern(*split_strings(data, KIND.size, 2))
+        layout = BinarySerializer.layout(data[1])
+        if kind == EQUIPMENT:
+            header = layout.equipment.unpack_from(data)
+            numbers = layout.restore_ints(header[3:], header[2])
+            return layout.build(split_strings(data, layout.equipment.size, layout.string_count), numbers)
+        if kind != RENTAL:
+            raise InvalidEquipmentError(f"Неизвестный вид записи: {kind}")
+        header = layout.rental.unpack_from(data)
+        start_time, end_time, approved, extras_count = header[-4:]
+        offset = layout.rental.size
+        extras = None
+        string_count = 3 + layout.string_count
+        if extras_count != NO_EXTRAS:
+            prices = struct.unpack_from(f'<{extras_count}d', data, offset)
+            offset += 8 * extras_count
+            strings = split_strings(data, offset, string_count + extras_count)
+            extras = dict(zip(strings[string_count:], prices))
+        else:
+            strings = split_strings(data, offset, string_count)
+        equipment = layout.build(strings[3:string_count], layout.restore_ints(header[3:-4], header[2]))
+        end_time = optional_float(end_time)
+        customer = registry.intern(strings[1], strings[2])
+        rental = BinarySerializer.rentals.create((strings[0], customer, equipment, datetime.fromtimestamp(start_time),
+                                                  datetime.fromtimestamp(end_time) if end_time is not None else None, extras))
+        approved = optional_float(approved)
+        if approved is not None:
+            rental.total_cost_approved = approved
+        return rental
+
+    @staticmethod
+    def dump_stream(objects: Iterable[Any], file: BinaryIO, batch_size: int = 1024) -> int:
+        '''Потоковая запись последовательности объектов кадрами с длиной'''
+        count = 0
+        objects = iter(objects)
+        while True:
+            batch = list(islice(objects, batch_size))
+            if not batch:
+                break
+            parts = []
+            for obj in batch:
+                record = BinarySerializer.encode(obj)
+                parts.append(FRAME.pack(len(record)))
+                parts.append(record)
+            file.write(b''.join(parts))
+            count += len(batch)
+        logger.info("Записано %s объектов в двоичном формате", count)
+        return count
+
+    @staticmethod
+    def load_stream(file: BinaryIO, batch_size: int = 1024) -> Iterator[Any]:
+        '''Потоковое чтение объектов, записанных dump_stream'''
+        while True:
+            records = []
+            for _ in range(batch_size):
+                frame = file.read(FRAME.size)
+                if len(frame) < FRAME.size:
+                    break
+                records.append(file.read(FRAME.unpack(frame)[0]))
+            if not records:
+                return
+            with Logger.silenced():
+                objects = [BinarySerializer.__decode(record) for record in records]
+            yield from objects
@@ -0,0 +1,146 @@
+import Logger
+import math
+import os
+import random
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from EquipmentFactory import EquipmentFactory
+from BatchPricing import BatchPricing
+from BookingCalendar import UnitCalendar
+from Errors import InvalidEquipmentError, RentalNotFoundError
+
+logger = Logger.logger
+
+DURATIONS = (1, 2, 3, 4, 6, 8, 24, 48)
+DURATION_WEIGHTS = (20, 25, 15, 12, 10, 8, 7, 3)
+OPENING_HOUR, CLOSING_HOUR = 8, 20
+RATE = 4
+
+Row = Tuple[Any, ...]
+
+def empty_totals() -> Dict[str, float]:
+    '''Нулевые итоги среза'''
+    return {'units': 0, 'requests': 0, 'booked': 0, 'rejected': 0, 'hours': 0.0, 'revenue': 0.0}
+
+def add_totals(target: Dict[str, float], source: Dict[str, float]) -> None:
+    '''Сложение итогов среза'''
+    for key, value in source.items():
+        target[key] += value
+
+def simulate_shard(task: Tuple[List[Row], datetime, int, float, int, float]) -> Dict[str, Dict[str, float]]:
+    '''Симуляция одного шарда парка в процессе-исполнителе: итоги по типам оборудования'''
+    rows, season_start, days, demand, seed, rate_factor = task
+    cumulative = list(accumulate(DURATION_WEIGHTS))
+    weight_total = cumulative[-1]
+    lengths = [timedelta(hours=hours) for hours in DURATIONS]
+    slots = [season_start + timedelta(days=day, hours=hour) for day in range(days)
+             for hour in range(OPENING_HOUR, CLOSING_HOUR)]
+    totals: Dict[str, Dict[str, float]] = {}
+    with Logger.silenced():
+        units = [EquipmentFactory.create_equipment(*row[:RATE], row[RATE] * rate_factor, *row[RATE + 1:]) for row in rows]
+        quotes = BatchPricing.quote(units, DURATIONS)
+    for row, costs in zip(rows, quotes):
+        equipment_type = row[0].lower()
+        rng = random.Random(f'{seed}:{equipment_type}:{row[1]}')
+        draw = rng.random
+        calendar = UnitCalendar()
+        requests = int(days * demand) + (draw() < days * demand % 1)
+        booked, hours, revenue = 0, 0.0, []
+        for number in range(requests):
+            choice = bisect_right(cumulative, draw() * weight_total)
+            start_time = slots[int(draw() * len(slots))]
+            try:
+                calendar.book(start_time, start_time + lengths[choice], f'sim_{number}')
+            except RentalNotFoundError:
+                continue
+            booked += 1
+            hours += DURATIONS[choice]
+            revenue.append(costs[choice])
+        unit_totals = {'units': 1, 'requests': requests, 'booked': booked, 'rejected': requests - booked
+                       , 'hours': hours, 'revenue': math.fsum(revenue)}
+        add_totals(totals.setdefault(equipment_type, empty_totals()), unit_totals)
+    return totals
+
+def merge(results: Iterable[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    '''Объединение итогов шардов в порядке шардов'''
+    merged: Dict[str, Dict[str, float]] = {}
+    for result in results:
+        for equipment_type, totals in result.items():
+            add_totals(merged.setdefault(equipment_type, empty_totals()), totals)
+    return dict(sorted(merged.items()))
+
+class SeasonSimulation:
+    '''Симуляция сезона аренд по парку с шардированием по типу или диапазону ID между процессами'''
+    def __init__(self, rows: Iterable[Row], season_start: datetime, days: int = 90, demand: float = 2.0
+                 , seed: int = 0, shard_by: str = 'range', shard_size: int = 2000, rate_factor: float = 1.0
+                 , elasticity: float = 0.0) -> None:
+        '''Конструктор симуляции: rows - аргументы create_equipment, demand - заявок на единицу в день при базовой ставке'''
+        if shard_by not in ('range', 'type'):
+            raise InvalidEquipmentError(f"Неизвестный способ шардирования: {shard_by}")
+        if days <= 0 or demand < 0 or shard_size <= 0 or rate_factor <= 0:
+            raise InvalidEquipmentError("Некорректные параметры симуляции")
+        self.__rows = list(rows)
+        self.__season_start = season_start
+        self.__days = days
+        self.__demand = demand * rate_factor ** -elasticity
+        self.__seed = seed
+        self.__shard_by = shard_by
+        self.__shard_size = shard_size
+        self.__rate_factor = rate_factor
+
+    @property
+    def units(self) -> int:
+        '''Размер парка'''
+        return len(self.__rows)
+
+    @property
+    def days(self) -> int:
+        '''Длина сезона в днях'''
+        return self.__days
+
+    def shards(self) -> List[List[Row]]:
+        '''Разбиение парка: по типу оборудования или на диапазоны по shard_size единиц (не зависит от числа процессов)'''
+        if self.__shard_by == 'type':
+            groups: Dict[str, List[Row]] = {}
+            for row in self.__rows:
+                groups.setdefault(row[0].lower(), []).append(row)
+            return [groups[name] for name in sorted(groups)]
+        size = self.__shard_size
+        return [self.__rows[i:i + size] for i in range(0, len(self.__rows), size)]
+
+    def tasks(self) -> List[Tuple]:
+        '''Задания для процессов-исполнителей'''
+        return [(shard, self.__season_start, self.__days, self.__demand, self.__seed, self.__rate_factor)
+                for shard in self.shards()]
+
+    def run(self, workers: Optional[int] = None) -> Dict[str, Any]:
+        '''Запуск симуляции на workers процессах (1 - в текущем процессе); результат детерминирован для seed'''
+        workers = workers or os.cpu_count() or 1
+        tasks = self.tasks()
+        logger.info("Симуляция сезона: %s единиц, %s дней, %s шардов, %s процессов", self.units, self.__days, len(tasks)
+                    , workers)
+        if workers == 1 or len(tasks) == 1:
+            by_type = merge(map(simulate_shard, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                by_type = merge(pool.map(simulate_shard, tasks))
+        summary = empty_totals()
+        for totals in by_type.values():
+            add_totals(summary, totals)
+        capacity = summary['units'] * self.__days * 24
+        summary['utilization'] = summary['hours'] / capacity if capacity else 0.0
+        for totals in by_type.values():
+            totals['utilization'] = totals['hours'] / (totals['units'] * self.__days * 24)
+        logger.info("Симуляция завершена: %s заявок, %s аренд, выручка %.2f", summary['requests'], summary['booked']
+                    , summary['revenue'])
+        return {'total': summary, 'by_type': by_type}
+
+    @staticmethod
+    def compare(rows: Sequence[Row], season_start: datetime, rate_factors: Sequence[float] = (0.9, 1.0, 1.1)
+                , workers: Optional[int] = None, **options) -> Dict[float, Dict[str, Any]]:
+        '''Сценарии "что если" для нескольких множителей ставки на одном парке и seed'''
+        return {factor: SeasonSimulation(rows, season_start, rate_factor=factor, **options).run(workers)
+                for factor in rate_factors}
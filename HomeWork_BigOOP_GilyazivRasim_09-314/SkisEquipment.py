@@ -0,0 +1,59 @@
+import Logger
+from typing import Dict, Any
+from SportsEquipment import SportEquipment
+from Tariffs import Tariff
+from Errors import InvalidEquipmentError
+
+logger = Logger.logger
+
+class Skis(SportEquipment):
+    '''Класс лыж'''
+    type_code = 2
+    tariff = Tariff([(5, 0.9)])
+
+    def __init__(self, equipment_id: str, name: str, condition: str
+                 , hourly_rate: float, length: float, is_available: bool = True) -> None:
+        '''Конструктор лыж'''
+        super().__init__(equipment_id, name, condition, hourly_rate, is_available)
+        self.__length = length
+        logger.info("Созданы лыжи: %s (Длина: %s)", name, length)
+
+    @property
+    def length(self) -> float:
+        '''Геттер для длины лыж'''
+        return self.__length
+
+    @length.setter
+    def length(self, length: float) -> None:
+        '''Сеттер для длины лыж'''
+        if length < 0:
+            logger.error("Попытка установить отрицательную длину лыж")
+            raise InvalidEquipmentError
+        logger.debug("Изменение длины лыж с %s на %s", self.__length, length)
+        self.__length = length
+
+    def calculate_rental_cost(self, hours: float) -> float:
+        '''Расчет стоимости аренды лыж по тарифу класса'''
+        logger.debug("Расчет стоимости аренды лыж на %s часов", hours)
+        return self.tariff.cost(self.hourly_rate, hours)
+
+    def __str__(self) -> str:
+        '''Строковое представление лыж'''
+        return f"Лыжи: {self.name}, Длина: {self.__length}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''Преобразование лыж в словарь'''
+        return {
+            'equipment_id': self.equipment_id,
+            'name': self.name,
+            'condition': self.condition,
+            'hourly_rate': self.hourly_rate,
+            'length': self.length,
+            'is_available': self.is_available
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Skis':
+        '''Создание лыж из словаря'''
+        logger.debug("Создание Skis из словаря: %s", data)
+        return cls(*data.values())
@@ -0,0 +1,245 @@
+import Logger
+import json
+import sqlite3
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from EquipmentMeta import EquipmentMeta
+from SportsEquipment import SportEquipment
+from Customer import Customer, registry
+from RentalIds import IdGenerator
+from Rental import Rental
+from Errors import InvalidEquipmentError
+
+logger = Logger.logger
+
+BASE_FIELDS = ('equipment_id', 'name', 'condition', 'hourly_rate', 'is_available')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS equipment (
+    equipment_type TEXT NOT NULL,
+    equipment_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    hourly_rate REAL NOT NULL,
+    is_available INTEGER NOT NULL,
+    details TEXT NOT NULL,
+    PRIMARY KEY (equipment_type, equipment_id)
+);
+CREATE INDEX IF NOT EXISTS idx_equipment_available ON equipment (equipment_type, is_available, hourly_rate);
+
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rentals (
+    rental_id TEXT PRIMARY KEY,
+    customer_id TEXT NOT NULL,
+    equipment_type TEXT NOT NULL,
+    equipment_id TEXT NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL,
+    extras TEXT,
+    total_cost_approved REAL
+);
+CREATE INDEX IF NOT EXISTS idx_rentals_time ON rentals (start_time, end_time);
+CREATE INDEX IF NOT EXISTS idx_rentals_equipment ON rentals (equipment_type, equipment_id, start_time);
+CREATE INDEX IF NOT EXISTS idx_rentals_customer ON rentals (customer_id);
+"""
+
+INSERT_EQUIPMENT = """
+INSERT OR REPLACE INTO equipment (equipment_type, equipment_id, name, condition, hourly_rate, is_available, details)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_CUSTOMER = "INSERT OR REPLACE INTO customers (customer_id, name) VALUES (?, ?)"
+INSERT_RENTAL = """
+INSERT INTO rentals (rental_id, customer_id, equipment_type, equipment_id, start_time, end_time, extras, total_cost_approved)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+UPSERT_RENTAL = INSERT_RENTAL + """
+ON CONFLICT (rental_id) DO UPDATE SET customer_id = excluded.customer_id, equipment_type = excluded.equipment_type
+    , equipment_id = excluded.equipment_id, start_time = excluded.start_time, end_time = excluded.end_time
+    , extras = excluded.extras, total_cost_approved = excluded.total_cost_approved
+"""
+SELECT_EQUIPMENT = "SELECT equipment_type, equipment_id, name, condition, hourly_rate, is_available, details FROM equipment"
+SELECT_CUSTOMERS = "SELECT customer_id, name FROM customers"
+SELECT_RENTALS = """
+SELECT rental_id, customer_id, equipment_type, equipment_id, start_time, end_time, extras, total_cost_approved FROM rentals
+"""
+
+def equipment_type(equipment: SportEquipment) -> str:
+    '''Тип оборудования в формате ключей реестра'''
+    return type(equipment).__name__.lower()
+
+class SQLiteRepository:
+    '''Хранилище оборудования, клиентов и аренд в SQLite'''
+    def __init__(self, path: str = ':memory:', batch_size: int = 5000) -> None:
+        '''Конструктор хранилища: одно соединение на весь срок жизни'''
+        self.__path = path
+        self.__batch_size = batch_size
+        self.__connection = sqlite3.connect(path, cached_statements=64)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.executescript(SCHEMA)
+        logger.info("Открыто хранилище SQLite: %s", path)
+
+    def close(self) -> None:
+        '''Закрытие соединения'''
+        self.__connection.close()
+        logger.info("Закрыто хранилище SQLite: %s", self.__path)
+
+    def __enter__(self) -> 'SQLiteRepository':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def equipment_row(equipment: SportEquipment) -> Tuple:
+        '''Строка таблицы equipment'''
+        details = {key: getattr(equipment, key) for _, key, _, _ in type(equipment).schema() if key not in BASE_FIELDS}
+        return (equipment_type(equipment), equipment.equipment_id, equipment.name, equipment.condition,
+                equipment.hourly_rate, int(equipment.is_available), json.dumps(details, ensure_ascii=False))
+
+    @staticmethod
+    def customer_row(customer: Customer) -> Tuple:
+        '''Строка таблицы customers'''
+        return (customer.customer_id, customer.name)
+
+    @staticmethod
+    def rental_row(rental: Rental) -> Tuple:
+        '''Строка таблицы rentals'''
+        return (rental.rental_id, rental.customer_info.customer_id, equipment_type(rental.equipment),
+                rental.equipment.equipment_id, rental.start_time.timestamp(),
+                rental.end_time.timestamp() if rental.end_time is not None else None,
+                json.dumps(rental.extras, ensure_ascii=False) if rental.extras is not None else None,
+                rental.total_cost_approved)
+
+    def __write(self, sql: str, rows: Iterable[Tuple]) -> int:
+        '''Запись строк пачками через executemany в текущей транзакции'''
+        count = 0
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.__batch_size))
+            if not batch:
+                return count
+            try:
+                self.__connection.executemany(sql, batch)
+            except sqlite3.IntegrityError as error:
+                logger.error("Повторная запись в хранилище SQLite: %s", error)
+                raise InvalidEquipmentError(f"Запись уже есть в хранилище: {error}") from error
+            count += len(batch)
+
+    def save_equipment(self, units: Iterable[SportEquipment]) -> int:
+        '''Сохранение оборудования одной транзакцией'''
+        with self.__connection:
+            count = self.__write(INSERT_EQUIPMENT, map(self.equipment_row, units))
+        logger.info("Сохранено единиц инвентаря: %s", count)
+        return count
+
+    def save_customers(self, customers: Iterable[Customer]) -> int:
+        '''Сохранение клиентов одной транзакцией'''
+        with self.__connection:
+            count = self.__write(INSERT_CUSTOMER, map(self.customer_row, customers))
+        logger.info("Сохранено клиентов: %s", count)
+        return count
+
+    def save_rentals(self, rentals: Iterable[Rental]) -> int:
+        '''Сохранение новых аренд одной транзакцией (повтор rental_id - ошибка, транзакция откатывается)'''
+        with self.__connection:
+            count = self.__write(INSERT_RENTAL, map(self.rental_row, rentals))
+        logger.info("Сохранено аренд: %s", count)
+        return count
+
+    def update_rentals(self, rentals: Iterable[Rental]) -> int:
+        '''Явное обновление аренд (продление, завершение, утверждение стоимости) с добавлением отсутствующих'''
+        with self.__connection:
+            count = self.__write(UPSERT_RENTAL, map(self.rental_row, rentals))
+        logger.info("Обновлено аренд: %s", count)
+        return count
+
+    def save_all(self, equipment: Iterable[SportEquipment] = (), customers: Iterable[Customer] = ()
+                 , rentals: Iterable[Rental] = ()) -> Dict[str, int]:
+        '''Сохранение всего состояния одной транзакцией (клиенты и инвентарь аренд добавляются сами,
+        аренды только новые)'''
+        rentals = list(rentals)
+        units = {(equipment_type(unit), unit.equipment_id): unit for unit in equipment}
+        people = {customer.customer_id: customer for customer in customers}
+        for rental in rentals:
+            units.setdefault((equipment_type(rental.equipment), rental.equipment.equipment_id), rental.equipment)
+            people.setdefault(rental.customer_info.customer_id, rental.customer_info)
+        with self.__connection:
+            counts = {
+                'equipment': self.__write(INSERT_EQUIPMENT, map(self.equipment_row, units.values())),
+                'customers': self.__write(INSERT_CUSTOMER, map(self.customer_row, people.values())),
+                'rentals': self.__write(INSERT_RENTAL, map(self.rental_row, rentals)),
+            }
+        logger.info("Сохранено состояние: %s", counts)
+        return counts
+
+    @staticmethod
+    def build_equipment(row: Tuple) -> SportEquipment:
+        '''Создание оборудования из строки таблицы'''
+        kind, equipment_id, name, condition, hourly_rate, is_available, details = row
+        equipment_class = EquipmentMeta.lookup(kind)
+        if equipment_class is None:
+            logger.error("Неизвестный тип инвентаря в хранилище: %s", kind)
+            raise InvalidEquipmentError(f'Неизвестный тип инвентаря: {kind}')
+        values = json.loads(details)
+        values.update(equipment_id=equipment_id, name=name, condition=condition,
+                      hourly_rate=hourly_rate, is_available=bool(is_available))
+        return equipment_class(**{parameter: values[key] for parameter, key, _, _ in equipment_class.schema()})
+
+    @staticmethod
+    def build_rental(row: Tuple, customers: Dict[str, Customer]
+                     , equipment: Dict[Tuple[str, str], SportEquipment]) -> Rental:
+        '''Создание аренды из строки таблицы с уже загруженными клиентами и инвентарем'''
+        rental_id, customer_id, kind, equipment_id, start_time, end_time, extras, approved = row
+        rental = Rental(rental_id, customers[customer_id], equipment[(kind, equipment_id)],
+                        datetime.fromtimestamp(start_time),
+                        datetime.fromtimestamp(end_time) if end_time is not None else None,
+                        json.loads(extras) if extras is not None else None)
+        if approved is not None:
+            rental.total_cost_approved = approved
+        return rental
+
+    def load_all(self) -> Dict[str, List[Any]]:
+        '''Загрузка всего состояния без побочных эффектов конструкторов'''
+        cursor = self.__connection.cursor()
+        with Logger.silenced():
+            equipment = {(row[0], row[1]): self.build_equipment(row) for row in cursor.execute(SELECT_EQUIPMENT)}
+            customers = {row[0]: registry.intern(*row) for row in cursor.execute(SELECT_CUSTOMERS)}
+            rentals = [self.build_rental(row, customers, equipment) for row in cursor.execute(SELECT_RENTALS)]
+        logger.info("Загружено состояние: %s единиц, %s клиентов, %s аренд", len(equipment), len(customers), len(rentals))
+        return {'equipment': list(equipment.values()), 'customers': list(customers.values()), 'rentals': rentals}
+
+    def available_equipment(self, kind: str, max_rate: Optional[float] = None) -> Iterator[SportEquipment]:
+        '''Доступное оборудование типа по индексу (type, is_available, hourly_rate)'''
+        sql = SELECT_EQUIPMENT + " WHERE equipment_type = ? AND is_available = 1"
+        parameters: Tuple = (kind.lower(),)
+        if max_rate is not None:
+            sql += " AND hourly_rate <= ?"
+            parameters += (max_rate,)
+        rows = self.__connection.execute(sql + " ORDER BY hourly_rate", parameters).fetchall()
+        with Logger.silenced():
+            units = [self.build_equipment(row) for row in rows]
+        return iter(units)
+
+    def rental_rows_between(self, start_time: datetime, end_time: datetime) -> List[Tuple]:
+        '''Строки аренд, пересекающихся с интервалом, по индексу на времени'''
+        return self.__connection.execute(
+            SELECT_RENTALS + " WHERE start_time < ? AND (end_time IS NULL OR end_time > ?) ORDER BY start_time",
+            (end_time.timestamp(), start_time.timestamp())).fetchall()
+
+    def rental_rows_created_between(self, start_time: datetime, end_time: datetime) -> List[Tuple]:
+        '''Строки аренд, созданных в интервале, по диапазону первичного ключа (ID из RentalIds)'''
+        low, high = IdGenerator.bounds(start_time, end_time)
+        return self.__connection.execute(SELECT_RENTALS + " WHERE rental_id BETWEEN ? AND ? ORDER BY rental_id"
+                                         , (low, high)).fetchall()
+
+    def rental_rows_for_equipment(self, kind: str, equipment_id: str) -> List[Tuple]:
+        '''Строки аренд единицы инвентаря по индексу (type, id, start_time)'''
+        return self.__connection.execute(
+            SELECT_RENTALS + " WHERE equipment_type = ? AND equipment_id = ? ORDER BY start_time",
+            (kind.lower(), equipment_id)).fetchall()
@@ -0,0 +1,122 @@
+import Logger
+import json
+from bisect import bisect_right
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from Errors import InvalidEquipmentError
+
+logger = Logger.logger
+
+RESOLUTIONS = (1, 2, 4, 8, 16, 32, 64)
+
+class Tariff:
+    '''Тариф класса оборудования: ступени множителей по длительности и сборы за доп. услуги'''
+    def __init__(self, tiers: Iterable[Tuple[float, float]] = (), extra_fees: Optional[Mapping[str, float]] = None) -> None:
+        '''Конструктор тарифа: tiers - пары (от скольких часов, множитель), extra_fees - сбор за услугу'''
+        tiers = tuple(sorted((float(hours), float(multiplier)) for hours, multiplier in tiers))
+        if any(hours < 0 or multiplier < 0 for hours, multiplier in tiers):
+            raise InvalidEquipmentError("Порог и множитель тарифа не могут быть отрицательными")
+        if len({hours for hours, _ in tiers}) != len(tiers):
+            raise InvalidEquipmentError("Пороги тарифа должны различаться")
+        extra_fees = dict(extra_fees or {})
+        if any(fee < 0 for fee in extra_fees.values()):
+            raise InvalidEquipmentError("Сбор за услугу не может быть отрицательным")
+        self.__tiers = tiers
+        self.__extra_fees = extra_fees
+        self.multiplier, self.cost = self.__compile()
+
+    @property
+    def tiers(self) -> Tuple[Tuple[float, float], ...]:
+        '''Геттер для ступеней тарифа'''
+        return self.__tiers
+
+    @property
+    def extra_fees(self) -> Dict[str, float]:
+        '''Геттер для сборов за доп. услуги (копия)'''
+        return dict(self.__extra_fees)
+
+    def __compile(self) -> Tuple[Callable[[float], float], Callable[[float, float], float]]:
+        '''Функции множителя и стоимости: таблица по корзинам длительности (шаг - степень двойки долей часа)
+        или двоичный поиск по порогам, если пороги не кратны корзинам'''
+        thresholds = [hours for hours, _ in self.__tiers]
+        multipliers = [1.0] + [multiplier for _, multiplier in self.__tiers]
+        last = multipliers[-1]
+        resolution = next((step for step in RESOLUTIONS if all((hours * step).is_integer() for hours in thresholds)), None)
+        if not thresholds:
+            def multiplier(hours: float) -> float:
+                '''Множитель для длительности в часах'''
+                return 1.0
+
+            def cost(hourly_rate: float, hours: float) -> float:
+                '''Стоимость аренды на hours часов по ставке hourly_rate'''
+                return hourly_rate * hours * 1.0
+        elif resolution is None:
+            def multiplier(hours: float) -> float:
+                '''Множитель для длительности в часах'''
+                return multipliers[bisect_right(thresholds, hours)]
+
+            def cost(hourly_rate: float, hours: float) -> float:
+                '''Стоимость аренды на hours часов по ставке hourly_rate'''
+                return hourly_rate * hours * multipliers[bisect_right(thresholds, hours)]
+        else:
+            table = [multipliers[bisect_right(thresholds, bucket / resolution)]
+                     for bucket in range(int(thresholds[-1] * resolution))]
+            size = len(table)
+
+            def multiplier(hours: float) -> float:
+                '''Множитель для длительности в часах'''
+                if hours < 0:
+                    return 1.0
+                bucket = int(hours * resolution)
+                return table[bucket] if bucket < size else last
+
+            def cost(hourly_rate: float, hours: float) -> float:
+                '''Стоимость аренды на hours часов по ставке hourly_rate'''
+                if hours < 0:
+                    return hourly_rate * hours * 1.0
+                bucket = int(hours * resolution)
+                return hourly_rate * hours * (table[bucket] if bucket < size else last)
+        return multiplier, cost
+
+    def multipliers(self, durations: Sequence[float]) -> List[float]:
+        '''Множители для списка длительностей'''
+        lookup = self.multiplier
+        return [lookup(hours) for hours in durations]
+
+    def extras_cost(self, extras: Optional[Mapping[str, float]]) -> float:
+        '''Стоимость доп. услуг аренды вместе со сборами тарифа'''
+        if not extras:
+            return 0
+        fees = self.__extra_fees
+        if not fees:
+            return sum(extras.values())
+        return sum(extras.values()) + sum(fees.get(service, 0.0) for service in extras)
+
+    def __eq__(self, other: Any) -> bool:
+        '''Равенство тарифов по данным'''
+        return isinstance(other, Tariff) and (self.__tiers, self.__extra_fees) == (other.tiers, other.extra_fees)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        '''Представление тарифа'''
+        return f"Tariff(tiers={list(self.__tiers)}, extra_fees={self.__extra_fees})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''Преобразование тарифа в словарь'''
+        return {
+            'tiers': [list(tier) for tier in self.__tiers],
+            'extra_fees': dict(self.__extra_fees),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Tariff':
+        '''Создание тарифа из словаря'''
+        logger.debug("Создание Tariff из словаря: %s", data)
+        return cls(data.get('tiers', ()), data.get('extra_fees'))
+
+    @staticmethod
+    def load(path: str) -> Dict[str, 'Tariff']:
+        '''Чтение тарифов из JSON вида {"bicycle": {"tiers": [[5, 0.92]], "extra_fees": {...}}}'''
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        return {name.lower(): Tariff.from_dict(tariff) for name, tariff in data.items()}
@@ -0,0 +1,59 @@
+import Logger
+from typing import Dict, Any
+from SportsEquipment import SportEquipment
+from Tariffs import Tariff
+from Errors import InvalidEquipmentError
+
+logger = Logger.logger
+
+class TennisRacket(SportEquipment):
+    '''Класс теннисной ракетки'''
+    type_code = 3
+    tariff = Tariff([(5, 0.88)])
+
+    def __init__(self, equipment_id: str, name: str,condition: str
+                 , hourly_rate: float, string_tension: float, is_available: bool = True) -> None:
+        '''Конструктор теннисной ракетки'''
+        super().__init__(equipment_id, name, condition, hourly_rate, is_available)
+        self.__string_tension = string_tension
+        logger.info("Создана теннисная ракетка: %s (Натяжение: %s)", name, string_tension)
+
+    @property
+    def string_tension(self) -> float:
+        '''Геттер для натяжения струн'''
+        return self.__string_tension
+
+    @string_tension.setter
+    def string_tension(self, string_tension: float) -> None:
+        '''Сеттер для натяжения струн'''
+        if string_tension < 0:
+            logger.error("Попытка установить отрицательное натяжение струн")
+            raise InvalidEquipmentError("Недопустимое значение для напряжения")
+        logger.debug("Изменение натяжения струн с %s на %s", self.__string_tension, string_tension)
+        self.__string_tension = string_tension
+
+    def calculate_rental_cost(self, hours: float) -> float:
+        '''Расчет стоимости аренды ракетки по тарифу класса'''
+        logger.debug("Расчет стоимости аренды ракетки на %s часов", hours)
+        return self.tariff.cost(self.hourly_rate, hours)
+
+    def __str__(self) -> str:
+        '''Строковое представление ракетки'''
+        return f"Теннисная ракетка: {self.name}, Натяжение: {self.__string_tension}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''Преобразование ракетки в словарь'''
+        return {
+            'equipment_id': self.equipment_id,
+            'name': self.name,
+            'condition': self.condition,
+            'hourly_rate': self.hourly_rate,
+            'string_tension': self.string_tension,
+            'is_available': self.is_available
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TennisRacket':
+        '''Создание ракетки из словаря'''
+        logger.debug("Создание TennisRacket из словаря: %s", data)
+        return cls(*data.values())
@@ -0,0 +1,216 @@
+import Logger
+import Events
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from Rental import Rental
+from Errors import RentalNotFoundError
+
+logger = Logger.logger
+
+class Timer:
+    '''Таймер колеса: срок в тиках, обратный вызов и корзина, в которой он лежит'''
+    __slots__ = ('due', 'deadline', 'callback', 'args', 'bucket')
+
+    def __init__(self, due: int, deadline: float, callback: Callable, args: tuple) -> None:
+        '''Конструктор таймера'''
+        self.due = due
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.bucket: Optional[Dict['Timer', None]] = None
+
+    @property
+    def pending(self) -> bool:
+        '''Таймер еще не сработал и не отменен'''
+        return self.bucket is not None
+
+class TimerWheel:
+    '''Иерархическое колесо таймеров: постановка и отмена за O(1), срабатывание с точностью до тика'''
+    def __init__(self, tick: float = 1.0, bits: int = 8, levels: int = 4, start: Optional[float] = None) -> None:
+        '''Конструктор колеса: tick секунд на тик, 2**bits корзин на уровне, levels уровней'''
+        self.__tick = tick
+        self.__bits = bits
+        self.__mask = (1 << bits) - 1
+        self.__levels = levels
+        self.__wheels: List[List[Dict[Timer, None]]] = [[{} for _ in range(1 << bits)] for _ in range(levels)]
+        self.__origin = time.time() if start is None else start
+        self.__current = 0
+        self.__count = 0
+        self.__lock = threading.RLock()
+        self.__runner: Optional[threading.Thread] = None
+        self.__stop = threading.Event()
+
+    def __len__(self) -> int:
+        '''Количество ожидающих таймеров'''
+        return self.__count
+
+    @property
+    def now(self) -> float:
+        '''Время, до которого колесо уже провернуто'''
+        return self.__origin + self.__current * self.__tick
+
+    def __place(self, timer: Timer) -> None:
+        '''Корзина по сроку: уровень выбирается по расстоянию до срока, корзина - по битам срока'''
+        delta = timer.due - self.__current
+        level = 0
+        while level < self.__levels - 1 and delta >> (self.__bits * (level + 1)):
+            level += 1
+        bucket = self.__wheels[level][(timer.due >> (self.__bits * level)) & self.__mask]
+        bucket[timer] = None
+        timer.bucket = bucket
+
+    def schedule(self, deadline: float, callback: Callable, *args: Any, with_timer: bool = False) -> Timer:
+        '''Таймер на момент deadline (секунды эпохи); уже наступивший срок сработает на следующем тике;
+        при with_timer обратный вызов получает сам таймер первым аргументом'''
+        with self.__lock:
+            due = max(math.ceil((deadline - self.__origin) / self.__tick), self.__current + 1)
+            timer = Timer(due, deadline, callback, args)
+            if with_timer:
+                timer.args = (timer,) + args
+            self.__place(timer)
+            self.__count += 1
+        return timer
+
+    def cancel(self, timer: Timer) -> bool:
+        '''Отмена таймера; False, если он уже сработал или отменен'''
+        with self.__lock:
+            bucket = timer.bucket
+            if bucket is None:
+                return False
+            del bucket[timer]
+            timer.bucket = None
+            self.__count -= 1
+        return True
+
+    def __cascade(self) -> None:
+        '''Перенос таймеров старших уровней вниз на границе оборота младшего колеса'''
+        current = self.__current
+        for level in range(1, self.__levels):
+            if (current >> (self.__bits * (level - 1))) & self.__mask:
+                break
+            index = (current >> (self.__bits * level)) & self.__mask
+            bucket = self.__wheels[level][index]
+            if bucket:
+                self.__wheels[level][index] = {}
+                for timer in bucket:
+                    self.__place(timer)
+
+    def __expired(self, target: int, limit: Optional[int]) -> List[Timer]:
+        '''Проворот колеса до тика target со сбором сработавших таймеров'''
+        fired: List[Timer] = []
+        wheel = self.__wheels[0]
+        with self.__lock:
+            while self.__current < target and (limit is None or len(fired) < limit):
+                if not self.__count:
+                    self.__current = target
+                    break
+                self.__current += 1
+                self.__cascade()
+                index = self.__current & self.__mask
+                bucket = wheel[index]
+                if bucket:
+                    wheel[index] = {}
+                    for timer in bucket:
+                        timer.bucket = None
+                    fired.extend(bucket)
+                    self.__count -= len(bucket)
+        return fired
+
+    def advance(self, now: Optional[float] = None, limit: Optional[int] = None) -> int:
+        '''Проворот до момента now с вызовом сработавших таймеров (вне блокировки); возвращает их число'''
+        now = time.time() if now is None else now
+        fired = self.__expired(math.floor((now - self.__origin) / self.__tick), limit)
+        for timer in fired:
+            try:
+                timer.callback(*timer.args)
+            except Exception:
+                logger.exception("Ошибка в обработчике таймера со сроком %s", timer.deadline)
+        return len(fired)
+
+    def start(self, interval: Optional[float] = None) -> None:
+        '''Фоновый поток, проворачивающий колесо по реальному времени'''
+        if self.__runner is not None:
+            return
+        self.__stop.clear()
+        interval = interval or self.__tick
+
+        def loop():
+            while not self.__stop.wait(interval):
+                self.advance()
+
+        self.__runner = threading.Thread(target=loop, name='timer-wheel', daemon=True)
+        self.__runner.start()
+
+    def stop(self) -> None:
+        '''Остановка фонового потока'''
+        if self.__runner is not None:
+            self.__stop.set()
+            self.__runner.join()
+            self.__runner = None
+
+class RentalExpiry:
+    '''Автоматический возврат: по окончании аренды инвентарь освобождается, стоимость утверждается'''
+    def __init__(self, wheel: TimerWheel) -> None:
+        '''Конструктор планировщика возвратов на колесе wheel'''
+        self.__wheel = wheel
+        self.__timers: Dict[Rental, Timer] = {}
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        '''Количество ожидающих возврата аренд'''
+        return len(self.__timers)
+
+    def track(self, rental: Rental) -> None:
+        '''Постановка (или перенос) таймера возврата на время окончания аренды'''
+        with self.__lock:
+            timer = self.__timers.pop(rental, None)
+            if timer is not None:
+                self.__wheel.cancel(timer)
+            if rental.end_time is None or rental.closed:
+                return
+            self.__timers[rental] = self.__wheel.schedule(rental.end_time.timestamp(), self.settle, rental
+                                                          , with_timer=True)
+
+    def untrack(self, rental: Rental) -> None:
+        '''Отмена таймера возврата'''
+        with self.__lock:
+            timer = self.__timers.pop(rental, None)
+            if timer is not None:
+                self.__wheel.cancel(timer)
+
+    def settle(self, timer: Timer, rental: Rental) -> None:
+        '''Возврат по окончании срока: утверждение итоговой стоимости и закрытие аренды (RENTAL_CLOSED видит утвержденную)'''
+        with self.__lock:
+            if self.__timers.get(rental) is not timer:
+                return
+            if rental.closed or rental.end_time is None or rental.end_time.timestamp() > timer.deadline:
+                return
+            del self.__timers[rental]
+        if rental.total_cost_approved is None:
+            rental.total_cost_approved = rental.calculate_total()
+        try:
+            rental.close(rental.end_time)
+        except RentalNotFoundError:
+            return
+        logger.info("Аренда %s завершена по сроку %s", rental.rental_id, rental.end_time)
+
+    def on_changed(self, rental: Rental, old_hours: float, old_cost: Optional[float]) -> None:
+        '''Перенос таймера при продлении и снятие при завершении аренды'''
+        if rental.closed:
+            self.untrack(rental)
+        else:
+            self.track(rental)
+
+    def attach(self, bus: Events.EventBus = Events.bus) -> None:
+        '''Подписка на события аренды'''
+        bus.subscribe(Events.RENTAL_CONFIRMED, self.track)
+        bus.subscribe(Events.RENTAL_EXTENDED, self.on_changed)
+        bus.subscribe(Events.RENTAL_CLOSED, self.on_changed)
+
+    def detach(self, bus: Events.EventBus = Events.bus) -> None:
+        '''Отписка от событий аренды'''
+        bus.unsubscribe(Events.RENTAL_CONFIRMED, self.track)
+        bus.unsubscribe(Events.RENTAL_EXTENDED, self.on_changed)
+        bus.unsubscribe(Events.RENTAL_CLOSED, self.on_changed)
@@ -0,0 +1,308 @@
+import Logger
+import Events
+import heapq
+import itertools
+import threading
+from collections import deque
+from datetime import datetime
+from math import inf
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from BookingCalendar import BookingCalendar
+from Customer import Customer
+from EquipmentMeta import EquipmentMeta
+from EquipmentCatalog import EquipmentCatalog
+from SportsEquipment import SportEquipment
+from Rental import Rental
+from RentalProcess import RentalProcess, OnlineRentalProcess
+from Request import Request
+from TimerWheel import TimerWheel
+from Errors import InvalidEquipmentError, RentalNotFoundError
+
+logger = Logger.logger
+
+WAITING = 'waiting'
+ASSIGNING = 'assigning'
+ASSIGNED = 'assigned'
+EXPIRED = 'expired'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+
+Entry = Tuple[float, datetime, int, 'WaitRequest']
+
+PRICE_TOLERANCE = 1e-9
+
+class WaitRequest:
+    '''Заявка листа ожидания: тип инвентаря, интервал аренды, предельная цена и результат назначения'''
+    def __init__(self, sequence: int, customer: Customer, equipment_type: str, start_time: datetime
+                 , end_time: datetime, max_price: float, max_rate: float, expires: datetime
+                 , extras: Optional[Dict[str, float]], approval: Optional[Request], process_class: type
+                 , on_done: Optional[Callable[['WaitRequest'], None]]) -> None:
+        '''Конструктор заявки (создается через Waitlist.request)'''
+        self.sequence = sequence
+        self.request_id = f'wait_{sequence}'
+        self.customer = customer
+        self.equipment_type = equipment_type
+        self.start_time = start_time
+        self.end_time = end_time
+        self.max_price = max_price
+        self.max_rate = max_rate
+        self.expires = expires
+        self.extras = extras
+        self.approval = approval
+        self.process_class = process_class
+        self.on_done = on_done
+        self.state = WAITING
+        self.rental: Optional[Rental] = None
+        self.timer = None
+        self.__done = threading.Event()
+
+    @property
+    def hours(self) -> float:
+        '''Длительность запрошенной аренды в часах'''
+        return (self.end_time - self.start_time).total_seconds() / 3600
+
+    def finish(self, state: str, rental: Optional[Rental] = None) -> None:
+        '''Завершение заявки: назначение, истечение, отмена или ошибка; ожидающие клиенты будятся'''
+        self.state = state
+        self.rental = rental
+        self.__done.set()
+        if self.on_done is not None:
+            self.on_done(self)
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Rental]:
+        '''Блокирующее ожидание назначения вместо повторных попыток аренды; None, если не назначено'''
+        self.__done.wait(timeout)
+        return self.rental
+
+class Waitlist:
+    '''Лист ожидания: очереди с приоритетом по типам, назначение освободившегося инвентаря за O(log n).
+    С календарем бронирований единица подбирается по свободному окну заявки, а не по текущей доступности'''
+    def __init__(self, catalog: Optional[EquipmentCatalog] = None, wheel: Optional[TimerWheel] = None
+                 , clock: Callable[[], datetime] = datetime.now, calendar: Optional[BookingCalendar] = None) -> None:
+        '''Конструктор листа: каталог для немедленной выдачи, колесо таймеров для снятия просроченных заявок'''
+        self.__catalog = catalog
+        self.__calendar = calendar
+        self.__wheel = wheel
+        self.__clock = clock
+        self.__queues: Dict[str, List[Entry]] = {}
+        self.__sequence = itertools.count()
+        self.__waiting = 0
+        self.__lock = threading.RLock()
+        self.__pending: Deque[SportEquipment] = deque()
+        self.__draining = False
+
+    def __len__(self) -> int:
+        '''Количество ожидающих заявок'''
+        return self.__waiting
+
+    def waiting(self, equipment_type: str) -> int:
+        '''Размер очереди типа (вместе с еще не вычищенными снятыми заявками)'''
+        return len(self.__queues.get(equipment_type.lower(), ()))
+
+    @staticmethod
+    def max_rate(equipment_type: str, hours: float, max_price: float, extras: Optional[Dict[str, float]]) -> float:
+        '''Наибольшая почасовая ставка, при которой аренда укладывается в max_price по тарифу типа'''
+        equipment_class = EquipmentMeta.lookup(equipment_type)
+        if equipment_class is None:
+            raise InvalidEquipmentError(f"Неизвестный тип оборудования: {equipment_type}")
+        budget = max_price - equipment_class.tariff.extras_cost(extras)
+        if budget < 0:
+            raise InvalidEquipmentError("Предельная цена меньше стоимости дополнительных услуг")
+        per_rate = equipment_class.tariff.cost(1.0, hours)
+        return budget / per_rate if per_rate > 0 else inf
+
+    def request(self, customer: Customer, equipment_type: str, start_time: datetime, end_time: datetime
+                , max_price: float, extras: Optional[Dict[str, float]] = None, approval: Optional[Request] = None
+                , expires: Optional[datetime] = None, process_class: type = OnlineRentalProcess
+                , on_done: Optional[Callable[[WaitRequest], None]] = None) -> WaitRequest:
+        '''Постановка заявки в очередь; при наличии каталога сразу предлагается самая дешевая свободная единица'''
+        equipment_type = equipment_type.lower()
+        if end_time <= start_time:
+            raise InvalidEquipmentError("Время окончания аренды должно быть позже начала")
+        if not issubclass(process_class, RentalProcess):
+            raise InvalidEquipmentError(f"{process_class.__name__} не является процессом аренды")
+        hours = (end_time - start_time).total_seconds() / 3600
+        max_rate = self.max_rate(equipment_type, hours, max_price, extras)
+        sequence = next(self.__sequence)
+        wait_request = WaitRequest(sequence, customer, equipment_type, start_time, end_time, max_price
+                                   , max_rate, expires or start_time, extras, approval, process_class, on_done)
+        self.__push(wait_request)
+        if self.__wheel is not None:
+            wait_request.timer = self.__wheel.schedule(wait_request.expires.timestamp(), self.expire, wait_request)
+        logger.info("Заявка %s клиента %s в листе ожидания %s до %s", wait_request.request_id, customer.name
+                    , equipment_type, max_price)
+        if self.__calendar is not None:
+            free = self.__calendar.free_units(equipment_type, start_time, end_time)
+            for unit in sorted(free, key=lambda unit: (unit.hourly_rate, unit.condition, unit.equipment_id))[:1]:
+                self.offer(unit)
+        elif self.__catalog is not None:
+            for unit in self.__catalog.cheapest_available(equipment_type):
+                self.offer(unit)
+        return wait_request
+
+    def __push(self, wait_request: WaitRequest) -> None:
+        '''Постановка заявки в кучу ее типа'''
+        with self.__lock:
+            wait_request.state = WAITING
+            heapq.heappush(self.__queues.setdefault(wait_request.equipment_type, [])
+                           , (-wait_request.max_rate, wait_request.start_time, wait_request.sequence, wait_request))
+            self.__waiting += 1
+
+    def __withdraw(self, wait_request: WaitRequest, state: str) -> bool:
+        '''Снятие ожидающей заявки (запись в куче удаляется лениво)'''
+        with self.__lock:
+            if wait_request.state != WAITING:
+                return False
+            wait_request.state = state
+            self.__waiting -= 1
+        if wait_request.timer is not None and self.__wheel is not None:
+            self.__wheel.cancel(wait_request.timer)
+        wait_request.finish(state)
+        return True
+
+    def cancel(self, wait_request: WaitRequest) -> bool:
+        '''Отмена заявки клиентом; False, если она уже не ожидает'''
+        cancelled = self.__withdraw(wait_request, CANCELLED)
+        if cancelled:
+            logger.info("Заявка %s отменена", wait_request.request_id)
+        return cancelled
+
+    def expire(self, wait_request: WaitRequest) -> bool:
+        '''Снятие заявки, не дождавшейся инвентаря к сроку'''
+        expired = self.__withdraw(wait_request, EXPIRED)
+        if expired:
+            logger.info("Заявка %s снята по сроку %s", wait_request.request_id, wait_request.expires)
+        return expired
+
+    def __fits(self, unit: SportEquipment, wait_request: WaitRequest) -> bool:
+        '''Единица свободна на окне заявки (без календаря достаточно проверки доступности в offer)'''
+        return self.__calendar is None or self.__calendar.is_free(unit.equipment_id, wait_request.start_time
+                                                                  , wait_request.end_time)
+
+    def __best(self, unit: SportEquipment, expired: List[WaitRequest]) -> Optional[WaitRequest]:
+        '''Извлечение лучшей подходящей заявки: вершина кучи - наибольшая допустимая ставка, затем ранний старт;
+        просроченные заявки снимаются в expired и завершаются вызывающим после освобождения блокировки'''
+        queue = self.__queues.get(EquipmentCatalog.equipment_type(unit))
+        if not queue:
+            return None
+        now = self.__clock()
+        hourly_rate = unit.hourly_rate
+        skipped: List[Entry] = []
+        try:
+            while queue:
+                negative_rate, _, _, wait_request = queue[0]
+                if wait_request.state != WAITING:
+                    heapq.heappop(queue)
+                elif wait_request.expires <= now:
+                    heapq.heappop(queue)
+                    wait_request.state = EXPIRED
+                    self.__waiting -= 1
+                    expired.append(wait_request)
+                elif -negative_rate < hourly_rate:
+                    return None
+                elif unit.tariff.cost(hourly_rate, wait_request.hours) + unit.tariff.extras_cost(wait_request.extras) \
+                        > wait_request.max_price * (1 + PRICE_TOLERANCE):
+                    max_rate = self.max_rate(wait_request.equipment_type, wait_request.hours
+                                             , wait_request.max_price, wait_request.extras)
+                    if max_rate != wait_request.max_rate:
+                        wait_request.max_rate = max_rate
+                        heapq.heapreplace(queue, (-max_rate,) + queue[0][1:])
+                    else:
+                        skipped.append(heapq.heappop(queue))
+                elif not self.__fits(unit, wait_request):
+                    skipped.append(heapq.heappop(queue))
+                else:
+                    heapq.heappop(queue)
+                    wait_request.state = ASSIGNING
+                    self.__waiting -= 1
+                    return wait_request
+            return None
+        finally:
+            for entry in skipped:
+                heapq.heappush(queue, entry)
+
+    def offer(self, unit: SportEquipment) -> Optional[Rental]:
+        '''Назначение свободной единицы лучшей заявке через check/create/confirm процесса аренды;
+        под блокировкой листа только выбор заявки, аренда и обратные вызовы - после ее освобождения'''
+        expired: List[WaitRequest] = []
+        with self.__lock:
+            if self.__calendar is None and not unit.is_available:
+                return None
+            wait_request = self.__best(unit, expired)
+        for request in expired:
+            if request.timer is not None and self.__wheel is not None:
+                self.__wheel.cancel(request.timer)
+            request.finish(EXPIRED)
+        if wait_request is None:
+            return None
+        process = wait_request.process_class(wait_request.request_id, wait_request.customer, unit
+                                             , wait_request.start_time, wait_request.end_time, wait_request.extras
+                                             , self.__calendar)
+        try:
+            rent = process.rent_equipment(wait_request.approval)
+        except RentalNotFoundError:
+            self.__push(wait_request)
+            logger.warning("Инвентарь %s занят до назначения заявке %s", unit.equipment_id, wait_request.request_id)
+            return None
+        except Exception:
+            logger.exception("Заявка %s не оформлена", wait_request.request_id)
+            wait_request.finish(FAILED)
+            return None
+        if wait_request.timer is not None and self.__wheel is not None:
+            self.__wheel.cancel(wait_request.timer)
+        logger.info("Инвентарь %s назначен по заявке %s", unit.equipment_id, wait_request.request_id)
+        wait_request.finish(ASSIGNED, rent)
+        return rent
+
+    def __drain(self) -> None:
+        '''Обработка освободившихся единиц по одной (без вложенных назначений из оповещений); вне блокировки листа'''
+        with self.__lock:
+            if self.__draining:
+                return
+            self.__draining = True
+        try:
+            while True:
+                with self.__lock:
+                    if not self.__pending:
+                        self.__draining = False
+                        return
+                    unit = self.__pending.popleft()
+                self.offer(unit)
+        except BaseException:
+            with self.__lock:
+                self.__draining = False
+            raise
+
+    def _on_change(self, unit: SportEquipment, field: str, old, new) -> None:
+        '''Освобождение единицы (is_available: False -> True) запускает назначение после завершения операции'''
+        if field == 'is_available' and new and not old:
+            self.__pending.append(unit)
+            Events.bus.defer(self.__drain)
+
+    def _on_cancelled(self, calendar: BookingCalendar, unit: SportEquipment, start_time: datetime, rental_id: str) -> None:
+        '''Отмена бронирования в календаре листа освобождает окно: назначение после завершения операции'''
+        if calendar is self.__calendar:
+            self.__pending.append(unit)
+            Events.bus.defer(self.__drain)
+
+    def attach(self, bus: Events.EventBus = Events.bus) -> None:
+        '''Подписка на отмены бронирований календаря'''
+        bus.subscribe(Events.BOOKING_CANCELLED, self._on_cancelled)
+
+    def detach(self, bus: Events.EventBus = Events.bus) -> None:
+        '''Отписка от отмен бронирований'''
+        bus.unsubscribe(Events.BOOKING_CANCELLED, self._on_cancelled)
+
+    def watch(self, unit: SportEquipment) -> None:
+        '''Подключение единицы (новой или существующей): свободная предлагается очереди в фоновом потоке'''
+        unit.subscribe(self._on_change)
+        if unit.is_available:
+            with self.__lock:
+                self.__pending.append(unit)
+                idle = not self.__draining
+            if idle:
+                threading.Thread(target=self.__drain, name='waitlist-drain', daemon=True).start()
+
+    def unwatch(self, unit: SportEquipment) -> None:
+        '''Отключение единицы от листа ожидания'''
+        unit.unsubscribe(self._on_change)
@@ -1,11 +1,11 @@
 import Logger
-from SportsEquipment import *
-from Customer import Customer 
-from datetime import datetime
+from datetime import datetime, timedelta
+from Customer import Customer
 from Rental import Rental
+from Request import Request
 from EquipmentFactory import EquipmentFactory
-from Chain_of_Responsibilities import *
-from RentalProcess import *
+from Chain_of_Responsibilities import Operator, Manager, Admin
+from RentalProcess import OnlineRentalProcess, OfflineRentalProcess
 
 logger = Logger.logger
 
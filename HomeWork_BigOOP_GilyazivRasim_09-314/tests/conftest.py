@@ -0,0 +1,27 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix='equipment-tests-'))
+
+import pytest
+
+def make_fleet(size, types=('bicycle', 'skis', 'tennisracket')):
+    '''Парк инвентаря с предсказуемыми ставками (общая фабрика с замерами)'''
+    from Samples import build_fleet
+    return build_fleet(size, None, types)
+
+def make_rentals(units, seed=0):
+    '''Аренды для каждой единицы парка со случайной длительностью'''
+    from Samples import build_rentals
+    return build_rentals(units, seed)
+
+@pytest.fixture
+def fleet():
+    return make_fleet
+
+@pytest.fixture
+def rentals():
+    return make_rentals
@@ -0,0 +1,62 @@
+import sys
+import threading
+from datetime import datetime, timedelta
+import Events
+import Logger
+from Aggregates import RentalAggregates
+from Customer import Customer
+from Rental import Rental
+
+def test_revenue_by_type_and_day_matches_recompute(fleet, rentals):
+    history = rentals(fleet(90))
+    day = history[0].start_time
+    with Logger.silenced():
+        for rental in history:
+            rental.total_cost_approved = rental.total_cost
+        aggregates = RentalAggregates.rebuild(history)
+        expected = sum(rental.calculate_total() for rental in history
+                       if type(rental.equipment).__name__.lower() == 'skis' and rental.start_time.date() == day.date())
+    assert abs(aggregates.revenue('skis', moment=day) - expected) <= 1e-6 * aggregates.revenue()
+
+def test_hours_are_split_across_days_and_revenue_stays_on_the_start_day(fleet):
+    unit, = fleet(1)
+    start_time = datetime(2025, 1, 1, 22)
+    next_day = start_time + timedelta(days=1)
+    aggregates = RentalAggregates()
+    aggregates.attach()
+    try:
+        with Logger.silenced():
+            rental = Rental('overnight', Customer('1', 'Ivan'), unit, start_time, start_time + timedelta(hours=6))
+            rental.total_cost_approved = rental.total_cost
+            Events.bus.emit(Events.RENTAL_CONFIRMED, rental)
+            rental.extend(start_time + timedelta(hours=8))
+    finally:
+        aggregates.detach()
+    assert aggregates.hours('bicycle', moment=start_time) == 2 and aggregates.hours(moment=next_day) == 6
+    assert aggregates.revenue(moment=start_time) == rental.total_cost_approved and aggregates.revenue(moment=next_day) == 0
+    assert aggregates.count(moment=start_time) == 1 and aggregates.count(moment=next_day) == 0
+    assert aggregates.hours() == 8 and aggregates.verify([rental])
+
+def test_concurrent_updates_are_not_lost(fleet, rentals):
+    history, threads = rentals(fleet(50)), 8
+    aggregates = RentalAggregates('hour')
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        for _ in range(50):
+            for rental in history:
+                aggregates.on_confirmed(rental)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert aggregates.count() == threads * 50 * len(history)
+    assert abs(aggregates.hours() - threads * 50 * sum(rental.hours for rental in history)) < 1e-6
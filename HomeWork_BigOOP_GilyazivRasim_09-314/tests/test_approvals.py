@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+import Logger
+import Metrics
+from Chain_of_Responsibilities import Operator, Manager, Admin, ApprovalService, ApprovalEngine
+from Customer import Customer
+from BookingCalendar import BookingCalendar
+from RentalProcess import OnlineRentalProcess, OfflineRentalProcess
+from Request import Request
+
+def test_approver_is_logged_for_single_and_batch(caplog):
+    engine = ApprovalEngine()
+    with caplog.at_level(logging.INFO, logger='equipment_system'):
+        assert engine.approve(Request('easy', 100))
+        assert engine.approve_batch([Request('average', 90), Request('hard', 80)]) == [True, True]
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Оператор одобрил запрос типа easy" in messages
+    assert "Менеджер одобрил запрос типа average" in messages
+    assert "Администратор одобрил запрос типа hard" in messages
+
+def test_engine_matches_handler_chain():
+    rng = random.Random(0)
+    with Logger.silenced():
+        requests = [Request(rng.choice(['easy', 'average', 'hard']), 100.0) for _ in range(300)]
+        chain = [Operator(Manager(Admin())).handle_request(request) for request in requests]
+        assert ApprovalEngine().approve_batch(requests) == chain
+
+def test_async_rentals_are_approved_at_requested_price(fleet):
+    start_time = datetime(2025, 1, 1, 10)
+    chain = Operator(Manager(Admin(), service=ApprovalService(0.001)))
+    with Logger.silenced():
+        customer = Customer('online', 'online')
+        processes = [OnlineRentalProcess(f'rent_{i}', customer, unit, start_time, start_time + timedelta(hours=3))
+                     for i, unit in enumerate(fleet(20))]
+
+        async def concurrent():
+            return await asyncio.gather(*[process.rent_equipment_async(Request('average', 100.0), chain)
+                                          for process in processes])
+
+        confirmed = asyncio.run(concurrent())
+    assert [rental.total_cost_approved for rental in confirmed] == [100.0] * len(processes)
+
+def test_offline_async_rental_books_through_the_rental_calendar(fleet):
+    start_time = datetime(2025, 1, 1, 10)
+    end_time = start_time + timedelta(hours=2)
+    unit = fleet(1)[0]
+    calendar = BookingCalendar()
+    calendar.register(unit)
+    with Logger.silenced():
+        process = OfflineRentalProcess('rent_0', Customer('desk', 'desk'), unit, start_time, end_time, calendar=calendar)
+        rental = asyncio.run(process.rent_equipment_async(Request('easy', 10.0), Operator(Manager(Admin()))))
+    assert process.calendar is calendar
+    assert rental.total_cost_approved == 10.0
+    assert not calendar.is_free(unit.equipment_id, start_time, end_time)
+
+def test_engine_routes_through_overridden_handlers():
+    class StrictManager(Manager):
+        def handle_request(self, request):
+            '''Менеджер, не одобряющий скидки ниже 50'''
+            if request.newprice < 50:
+                return self._next.handle_request(request) if request.type == 'hard' else False
+            return super().handle_request(request)
+
+    with Logger.silenced():
+        engine = ApprovalEngine(Operator(StrictManager(Admin())))
+        assert not engine.compiled
+        assert engine.approve_batch([Request('average', 40.0), Request('average', 60.0)]) == [False, True]
+    assert engine.counters == {'Менеджер': 1}
+
+def test_engine_advances_handler_metrics():
+    Metrics.reset()
+    Metrics.enable()
+    try:
+        with Logger.silenced():
+            engine = ApprovalEngine()
+            engine.approve(Request('easy', 10.0))
+            engine.approve_batch([Request('average', 10.0), Request('hard', 10.0)])
+        totals = {dict(item['labels'])['handler']: item['value'] for item in Metrics.snapshot()['counters']
+                  if item['name'] == 'approval_handler_total'}
+    finally:
+        Metrics.disable()
+        Metrics.reset()
+    assert totals == {'operator': 3, 'manager': 2, 'admin': 1}
@@ -0,0 +1,73 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+import Logger
+from BookingCalendar import BookingCalendar, SortedChunks, UnitCalendar
+from EquipmentFactory import EquipmentFactory
+from Errors import InvalidEquipmentError, RentalNotFoundError
+
+START = datetime(2025, 1, 1, 10)
+
+def test_sorted_chunks_matches_sorted_list(monkeypatch):
+    monkeypatch.setattr(SortedChunks, 'LOAD', 4)
+    rng = random.Random(2)
+    chunks, reference = SortedChunks(lambda item: item), []
+    for _ in range(500):
+        value = rng.randint(0, 300)
+        if value in reference and rng.random() < 0.4:
+            chunks.remove(value)
+            reference.remove(value)
+        elif value not in reference:
+            chunks.add(value)
+            reference.append(value)
+        reference.sort()
+        assert list(chunks) == reference
+        probe = rng.randint(-1, 301)
+        assert chunks.last_upto(probe) == max((item for item in reference if item <= probe), default=None)
+        assert chunks.first_after(probe) == min((item for item in reference if item > probe), default=None)
+        head, tail = chunks.split(probe)
+        assert list(head) + list(tail) == reference
+    with pytest.raises(ValueError):
+        chunks.remove(1000)
+
+def test_unit_calendar_rejects_overlaps_and_cancels(monkeypatch):
+    monkeypatch.setattr(SortedChunks, 'LOAD', 2)
+    calendar = UnitCalendar()
+    for day in range(0, 40, 2):
+        calendar.book(START + timedelta(days=day), START + timedelta(days=day, hours=3), f'rent_{day}')
+    with pytest.raises(RentalNotFoundError):
+        calendar.book(START + timedelta(days=4, hours=2), START + timedelta(days=4, hours=5), 'late')
+    with pytest.raises(RentalNotFoundError):
+        calendar.book(START + timedelta(days=5, hours=23), START + timedelta(days=6, hours=1), 'early')
+    with pytest.raises(InvalidEquipmentError):
+        calendar.book(START, START, 'empty')
+    calendar.book(START + timedelta(days=4, hours=3), START + timedelta(days=4, hours=5), 'adjacent')
+    assert calendar.cancel(START + timedelta(days=4)) == 'rent_4'
+    assert calendar.is_free(START + timedelta(days=4), START + timedelta(days=4, hours=3))
+    with pytest.raises(RentalNotFoundError):
+        calendar.cancel(START + timedelta(days=4))
+    assert len(calendar) == 20
+    assert calendar.free_from == START + timedelta(days=38, hours=3)
+
+def test_free_units_index_matches_full_scan():
+    rng = random.Random(7)
+    with Logger.silenced():
+        fleet = [EquipmentFactory.create_equipment('skis', str(i), f'skis_{i}', 'good', 100, 150) for i in range(60)]
+    calendar = BookingCalendar()
+    for unit in fleet:
+        calendar.register(unit)
+    for number in range(300):
+        unit = rng.choice(fleet)
+        start_time = START + timedelta(hours=rng.randint(0, 200))
+        try:
+            calendar.book(unit.equipment_id, start_time, start_time + timedelta(hours=rng.randint(1, 12)), f'r{number}')
+        except RentalNotFoundError:
+            pass
+    for booking in calendar.unit(fleet[0].equipment_id).bookings()[::2]:
+        calendar.cancel(fleet[0].equipment_id, booking[0])
+    for _ in range(50):
+        start_time = START + timedelta(hours=rng.randint(0, 220))
+        end_time = start_time + timedelta(hours=rng.randint(1, 24))
+        expected = {unit.equipment_id for unit in fleet if calendar.is_free(unit.equipment_id, start_time, end_time)}
+        assert {unit.equipment_id for unit in calendar.free_units('Skis', start_time, end_time)} == expected
+    assert calendar.free_units('bicycle', START) == []
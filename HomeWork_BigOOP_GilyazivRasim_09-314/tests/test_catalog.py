@@ -0,0 +1,40 @@
+import pytest
+import Logger
+from BookingCalendar import SortedChunks
+from EquipmentCatalog import EquipmentCatalog
+from Errors import InvalidEquipmentError
+from FleetStore import FleetStore
+
+def test_rate_queries_span_index_chunks(fleet, monkeypatch):
+    monkeypatch.setattr(SortedChunks, 'LOAD', 4)
+    units, catalog = fleet(90), EquipmentCatalog()
+    with Logger.silenced():
+        for unit in units:
+            catalog.add(unit)
+        for unit in units[::3]:
+            unit.hourly_rate = unit.hourly_rate + 0.5
+    order = lambda unit: (unit.hourly_rate, unit.condition, unit.equipment_id)
+    expected = sorted((unit for unit in units if 60 <= unit.hourly_rate <= 120), key=order)
+    assert catalog.in_rate_range(60, 120) == expected
+    skis = sorted((unit for unit in units if catalog.equipment_type(unit) == 'skis'), key=order)
+    assert catalog.cheapest_available('skis', 5) == skis[:5]
+
+def test_views_are_rejected(fleet):
+    store, catalog = FleetStore(), EquipmentCatalog()
+    with Logger.silenced():
+        store.add(fleet(1)[0])
+        with pytest.raises(InvalidEquipmentError):
+            catalog.add(store[0])
+    assert len(catalog) == 0
+
+def test_duplicate_id_change_is_rejected_and_rolled_back(fleet):
+    first, second = fleet(2)
+    catalog = EquipmentCatalog()
+    with Logger.silenced():
+        catalog.add(first)
+        catalog.add(second)
+        with pytest.raises(InvalidEquipmentError):
+            second.equipment_id = first.equipment_id
+    assert second.equipment_id == '1'
+    assert catalog.get('0') is first and catalog.get('1') is second
+    assert sorted(unit.equipment_id for unit in catalog.in_rate_range(0, 1000)) == ['0', '1']
@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import Logger
+from BookingCalendar import BookingCalendar
+from Checkpoint import Checkpoint
+from Customer import Customer
+from EquipmentMeta import EquipmentMeta
+from Tariffs import Tariff
+
+def test_failed_background_write_is_reported(tmp_path, fleet):
+    checkpoint = Checkpoint(os.path.join(tmp_path, 'missing', 'state.snapshot'))
+    with Logger.silenced():
+        assert checkpoint.save_in_background({'equipment': fleet(3)})
+        while checkpoint.busy():
+            time.sleep(0.01)
+        assert not checkpoint.wait()
+
+def test_tariffs_are_restored_and_cost_caches_reset(tmp_path, fleet, rentals):
+    history = rentals(fleet(12))
+    checkpoint = Checkpoint(os.path.join(tmp_path, 'state.snapshot'))
+    previous = {name: EquipmentMeta.lookup(name).tariff for name in EquipmentMeta.declared}
+    with Logger.silenced():
+        try:
+            EquipmentMeta.set_tariffs({name: Tariff(tariff.tiers, {'helmet': 10.0}) for name, tariff in previous.items()})
+            saved = [rental.total_cost for rental in history]
+            generation = EquipmentMeta.tariff_generation
+            checkpoint.save({'rentals': history})
+            EquipmentMeta.set_tariffs(previous)
+            restored = checkpoint.load()['rentals']
+            assert EquipmentMeta.lookup('skis').tariff.extra_fees == {'helmet': 10.0}
+            assert EquipmentMeta.tariff_generation > generation
+            assert all(rental._Rental__cost_key[1] != rental.equipment.pricing_version for rental in restored)
+            assert [rental.total_cost for rental in restored] == saved
+        finally:
+            EquipmentMeta.set_tariffs(previous)
+
+def test_periodic_snapshot_copies_under_the_lock_and_pickles_outside(tmp_path, fleet):
+    checkpoint, lock, held = Checkpoint(os.path.join(tmp_path, 'state.snapshot')), threading.Lock(), []
+    units, dumps = fleet(5), checkpoint.dumps
+
+    def source():
+        held.append(('source', lock.locked()))
+        return {'equipment': units}
+
+    def traced_dumps(state):
+        held.append(('dumps', lock.locked()))
+        return dumps(state)
+
+    checkpoint.dumps = traced_dumps
+    with Logger.silenced():
+        checkpoint.start_periodic(source, 0.01, lock)
+        while len(held) < 2:
+            time.sleep(0.01)
+        checkpoint.stop_periodic()
+        assert len(checkpoint.load()['equipment']) == 5
+    assert ('source', True) in held and ('dumps', False) in held
+    assert ('source', False) not in held and ('dumps', True) not in held
+
+def test_periodic_snapshot_survives_a_failed_pass(tmp_path, fleet):
+    checkpoint, calls, units = Checkpoint(os.path.join(tmp_path, 'state.snapshot')), [], fleet(3)
+
+    def source():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('boom')
+        return {'equipment': units}
+
+    with Logger.silenced():
+        checkpoint.start_periodic(source, 0.01)
+        while len(calls) < 3:
+            time.sleep(0.01)
+        checkpoint.stop_periodic()
+        assert len(checkpoint.load()['equipment']) == 3
+
+def test_calendar_backed_rental_is_checkpointed(tmp_path, fleet):
+    units, calendar = fleet(2), BookingCalendar()
+    start_time = datetime(2025, 1, 1, 10)
+    checkpoint = Checkpoint(os.path.join(tmp_path, 'state.snapshot'))
+    with Logger.silenced():
+        for unit in units:
+            calendar.register(unit)
+        rental = units[0].reserve_equipment(calendar, Customer('1', 'Ivan'), start_time, start_time + timedelta(hours=2))
+        checkpoint.save({'rentals': [rental], 'calendars': [calendar]})
+        restored = checkpoint.load()
+    calendar = restored['rentals'][0].calendar
+    assert calendar is restored['calendars'][0]
+    assert not calendar.is_free(units[0].equipment_id, start_time, start_time + timedelta(hours=1))
+    assert calendar.is_free(units[1].equipment_id, start_time, start_time + timedelta(hours=1))
+    with Logger.silenced():
+        restored['rentals'][0].close()
+    assert calendar.is_free(units[0].equipment_id, start_time, start_time + timedelta(hours=1))
@@ -0,0 +1,104 @@
+import random
+import sys
+import threading
+from datetime import datetime, timedelta
+import Locks
+import Logger
+from BookingCalendar import BookingCalendar
+from Customer import Customer
+from EquipmentCatalog import EquipmentCatalog
+from Errors import RentalNotFoundError
+
+START = datetime(2025, 1, 1, 10)
+END = START + timedelta(hours=2)
+
+def run_threads(count, target):
+    barrier = threading.Barrier(count)
+
+    def worker(index):
+        barrier.wait()
+        target(index)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+def test_each_unit_has_exactly_one_winner(fleet):
+    units, threads = fleet(1000), 8
+    calendar = BookingCalendar()
+    rented = [[] for _ in units]
+    booked = [[] for _ in units]
+    with Logger.silenced():
+        customer = Customer('stress', 'stress')
+    for unit in units:
+        calendar.register(unit)
+
+    def attempt(index):
+        order = list(range(len(units)))
+        random.Random(index).shuffle(order)
+        with Logger.silenced():
+            for position in order:
+                try:
+                    units[position].rent_equipment(customer, START, END)
+                    rented[position].append(index)
+                except RentalNotFoundError:
+                    pass
+                try:
+                    units[position].reserve_equipment(calendar, customer, START, END)
+                    booked[position].append(index)
+                except RentalNotFoundError:
+                    pass
+
+    run_threads(threads, attempt)
+    assert all(len(winners) == 1 for winners in rented)
+    assert all(len(winners) == 1 for winners in booked)
+
+def test_catalog_indexes_stay_consistent_under_threads(fleet):
+    units, threads = fleet(600), 6
+    catalog = EquipmentCatalog()
+    for unit in units:
+        catalog.add(unit)
+    with Logger.silenced():
+        customer = Customer('catalog', 'catalog')
+
+    def churn(index):
+        rng = random.Random(index)
+        with Logger.silenced():
+            for _ in range(1500):
+                unit = rng.choice(units)
+                try:
+                    unit.rent_equipment(customer, START, END)
+                except RentalNotFoundError:
+                    unit.is_available = True
+
+    run_threads(threads, churn)
+    for kind in ('bicycle', 'skis', 'tennisracket'):
+        expected = sorted(unit.equipment_id for unit in units if unit.is_available and catalog.equipment_type(unit) == kind)
+        assert sorted(unit.equipment_id for unit in catalog.available(kind)) == expected
+        cheapest = catalog.in_rate_range(0, 1000, kind, only_available=True)
+        assert sorted(unit.equipment_id for unit in cheapest) == expected
+
+def test_listener_may_rent_another_unit_on_the_same_stripe(fleet, monkeypatch):
+    monkeypatch.setattr(Locks, 'units', Locks.StripedLock(1))
+    first, second = fleet(2)
+    with Logger.silenced():
+        customer = Customer('chain', 'chain')
+
+    def rent_pair(unit, field, old, new):
+        if field == 'is_available' and not new and second.is_available:
+            second.rent_equipment(customer, START, END)
+
+    first.subscribe(rent_pair)
+    worker = threading.Thread(target=lambda: first.rent_equipment(customer, START, END), daemon=True)
+    with Logger.silenced():
+        worker.start()
+        worker.join(5)
+    assert not worker.is_alive()
+    assert not first.is_available and not second.is_available
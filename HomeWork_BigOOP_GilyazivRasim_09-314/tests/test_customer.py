@@ -0,0 +1,32 @@
+import json
+import logging
+import random
+import Logger
+from Customer import Customer, CustomerRegistry, registry
+
+def test_registry_returns_one_object_per_customer():
+    rng = random.Random(0)
+    history = [{'cutstomer_id': f'c{i}', 'name': f'Клиент {i}'} for i in (rng.randrange(50) for _ in range(1000))]
+    with Logger.silenced():
+        registry.clear()
+        try:
+            decoded = [Customer.from_dict(json.loads(json.dumps(row))) for row in history]
+        finally:
+            registry.clear()
+    assert len({id(customer) for customer in decoded}) == len({row['cutstomer_id'] for row in history})
+    assert [customer.to_dict() for customer in decoded] == history
+
+def test_evicted_customers_are_decoded_again():
+    cold = CustomerRegistry(capacity=5)
+    with Logger.silenced():
+        assert [cold.intern(f'c{i}', '').customer_id for i in range(50)] == [f'c{i}' for i in range(50)]
+
+def test_conflicting_name_keeps_the_first_and_is_logged(caplog):
+    names = CustomerRegistry()
+    with Logger.silenced():
+        first = names.intern('c1', 'Анна')
+    with caplog.at_level(logging.WARNING, logger=Logger.logger.name):
+        assert names.intern('c1', 'Анна Петрова') is first
+        assert names.add(Customer('c1', 'А. Петрова')) is first
+    assert first.name == 'Анна'
+    assert [record.args[2] for record in caplog.records] == ['Анна Петрова', 'А. Петрова']
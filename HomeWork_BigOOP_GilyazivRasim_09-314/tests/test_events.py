@@ -0,0 +1,38 @@
+import os
+from datetime import datetime, timedelta
+import Events
+import Logger
+from Customer import Customer
+from EquipmentFactory import EquipmentFactory
+from Ledger import RentalLedger
+from RentalProcess import OnlineRentalProcess
+
+START = datetime(2025, 1, 1, 10)
+
+def test_failing_listener_does_not_stop_others():
+    bus, seen = Events.EventBus(), []
+
+    def broken(rental):
+        raise ValueError('broken listener')
+
+    bus.subscribe(Events.RENTAL_CONFIRMED, broken)
+    bus.subscribe(Events.RENTAL_CONFIRMED, seen.append)
+    bus.emit(Events.RENTAL_CONFIRMED, 'rental')
+    assert seen == ['rental']
+
+def test_long_ids_are_hashed_into_the_ledger(tmp_path):
+    with Logger.silenced():
+        unit = EquipmentFactory.create_equipment('skis', 'equipment-with-a-long-id', 'skis', 'good', 100, 150)
+        customer = Customer('customer-with-a-very-long-id', 'Long')
+        ledger = RentalLedger(os.path.join(tmp_path, 'rentals.ledger'))
+        ledger.attach()
+        try:
+            rental = OnlineRentalProcess('process', customer, unit, START, START + timedelta(hours=2)).rent_equipment()
+        finally:
+            ledger.detach()
+        with ledger.view() as view:
+            stored = view.record(0)
+        ledger.close()
+    assert not unit.is_available and rental.total_cost_approved is not None
+    assert stored[5] == rental.rental_id
+    assert stored[6].startswith('#') and len(stored[6]) <= 16 and len(stored[7]) <= 16
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import pytest
+import Logger
+from BatchPricing import BatchPricing
+from EquipmentFactory import EquipmentFactory
+from EquipmentCatalog import EquipmentCatalog
+from EquipmentMeta import EquipmentMeta
+from Errors import InvalidEquipmentError
+from FleetStore import EquipmentView, FleetStore
+from SportsEquipment import SportEquipment
+from Tariffs import Tariff
+from conftest import ROOT
+
+def test_views_round_trip_to_dict_with_original_types():
+    with Logger.silenced():
+        units = [EquipmentFactory.create_equipment('skis', '1', 'skis_1', 'good', 170, 150)
+                 , EquipmentFactory.create_equipment('skis', '2', 'skis_2', 'bad', 99.5, 151.5)
+                 , EquipmentFactory.create_equipment('bicycle', '3', 'bike_3', 'perfect', 120, 'Mountain')
+                 , EquipmentFactory.create_equipment('tennisracket', '4', 'racket_4', 'good', 80, 1.2)]
+    store = FleetStore()
+    for unit in units:
+        store.add(unit)
+    for unit, view in zip(units, store):
+        assert view.to_dict() == unit.to_dict()
+        assert [type(value) for value in view.to_dict().values()] == [type(value) for value in unit.to_dict().values()]
+    assert [EquipmentCatalog.equipment_type(view) for view in store] == ['skis', 'skis', 'bicycle', 'tennisracket']
+    view = store[0]
+    view.hourly_rate = 180.5
+    view.length = 160
+    assert view.to_dict()['hourly_rate'] == 180.5 and type(view.length) is int
+
+def test_import_does_not_load_equipment_modules(tmp_path):
+    probe = 'import sys, FleetStore; print(sorted(set(FleetStore.EquipmentMeta.declared.values()) & set(sys.modules)))'
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.run([sys.executable, '-c', probe], cwd=tmp_path, env=environment
+                            , capture_output=True, text=True, check=True).stdout
+    assert output.strip() == '[]'
+
+def test_view_setters_notify_listeners(fleet):
+    store, changes = FleetStore(), []
+    with Logger.silenced():
+        for unit in fleet(3):
+            store.add(unit)
+    view = store[2]
+    view.subscribe(lambda unit, field, old, new: changes.append((unit.equipment_id, field, old, new)))
+    view.hourly_rate = 75.5
+    store[2].is_available = False
+    assert store[2].release()
+    view.string_tension = 1.4
+    store[1].name = 'untracked'
+    assert changes == [('2', 'hourly_rate', 52, 75.5), ('2', 'is_available', True, False)
+                       , ('2', 'is_available', False, True), ('2', 'string_tension', 1.2, 1.4)]
+
+def test_new_equipment_type_gets_a_layout_from_its_schema():
+    class Kayak(SportEquipment):
+        tariff = Tariff([(5, 0.9)])
+
+        def __init__(self, equipment_id: str, name: str, condition: str, hourly_rate: float, seats: float
+                     , is_available: bool = True) -> None:
+            super().__init__(equipment_id, name, condition, hourly_rate, is_available)
+            self.seats = seats
+
+        def calculate_rental_cost(self, hours: float) -> float:
+            return self.tariff.cost(self.hourly_rate, hours)
+
+    store = FleetStore()
+    try:
+        with Logger.silenced():
+            store.add(Kayak('k1', 'kayak_1', 'good', 40, 2))
+        view = store[0]
+        assert type(view).__name__ == 'KayakView' and view.seats == 2 and type(view.seats) is int
+        assert view.to_dict() == {'equipment_id': 'k1', 'name': 'kayak_1', 'condition': 'good', 'hourly_rate': 40
+                                  , 'seats': 2, 'is_available': True}
+        with pytest.raises(InvalidEquipmentError):
+            view.seats = -1
+        assert BatchPricing.quote([view], [2, 6]) == [[80.0, 216.0]]
+    finally:
+        EquipmentMeta.registry.pop('kayak', None)
+        FleetStore.specific_fields.pop('kayak', None)
+        EquipmentView.views.pop('kayak', None)
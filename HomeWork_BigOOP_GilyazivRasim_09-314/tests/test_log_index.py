@@ -0,0 +1,34 @@
+import os
+import re
+from Benchmarks import synthetic_log
+from LogIndex import LogIndex
+
+def scan(path, rental_id):
+    pattern = re.compile(rf'(?:Создана аренда:|Продление аренды) {rental_id} ')
+    found = []
+    for name in (f'{path}.3', f'{path}.2', f'{path}.1', path):
+        with open(name, encoding='utf-8') as file:
+            found.extend(line.rstrip('\n') for line in file if pattern.search(line))
+    return found
+
+def test_index_matches_scan_and_skips_rotated_files(tmp_path):
+    path, lines = os.path.join(tmp_path, 'system.log'), 4000
+    for number in (3, 2, 1):
+        synthetic_log(f'{path}.{number}', lines // 4, (3 - number) * (lines // 4), seed=number)
+    synthetic_log(path, lines // 4, 3 * (lines // 4))
+    index = LogIndex(path)
+    index.update()
+    index.save()
+    with open(path, encoding='utf-8') as file:
+        rental_ids = re.findall(r'Создана аренда: (rent_\d+) ', file.read())[:20]
+    assert rental_ids
+    for rental_id in rental_ids:
+        found = list(index.query(rental_id=rental_id))
+        assert found and found == scan(path, rental_id)
+    os.replace(f'{path}.2', f'{path}.3')
+    os.replace(f'{path}.1', f'{path}.2')
+    os.replace(path, f'{path}.1')
+    synthetic_log(path, 100, lines, seed=9)
+    reopened = LogIndex(path)
+    assert reopened.update() == 100
+    assert len(reopened) == lines // 4 * 3 + 100
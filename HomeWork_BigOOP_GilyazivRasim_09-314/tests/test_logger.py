@@ -0,0 +1,42 @@
+import logging
+import threading
+import Logger
+
+def test_async_logging_captures_arguments_at_call_time():
+    Logger.use_async_logging(True)
+    try:
+        state = {'units': 1}
+        Logger.logger.warning("Снимок параметров: %s", state)
+        state['units'] = 2
+    finally:
+        Logger.use_async_logging(False)
+    with open(Logger.log_path, encoding='utf-8') as file:
+        lines = [line for line in file if 'Снимок параметров' in line]
+    assert lines[-1].rstrip().endswith("{'units': 1}")
+
+def test_silenced_is_scoped_to_the_calling_thread():
+    inside, entered, release = [], threading.Event(), threading.Event()
+
+    def bulk_load():
+        with Logger.silenced():
+            inside.append((Logger.logger.isEnabledFor(logging.INFO), Logger.prints_enabled()))
+            entered.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=bulk_load)
+    worker.start()
+    entered.wait(5)
+    try:
+        assert inside == [(False, False)]
+        assert Logger.logger.isEnabledFor(logging.INFO) and Logger.prints_enabled()
+    finally:
+        release.set()
+        worker.join()
+
+def test_nested_silenced_restores_in_order():
+    with Logger.silenced(logging.ERROR):
+        with Logger.silenced(logging.INFO):
+            assert not Logger.logger.isEnabledFor(logging.WARNING)
+        assert not Logger.logger.isEnabledFor(logging.WARNING)
+        assert Logger.logger.isEnabledFor(logging.ERROR)
+    assert Logger.logger.isEnabledFor(logging.DEBUG) and Logger.prints_enabled()
@@ -0,0 +1,55 @@
+import random
+import Logger
+from BatchPricing import BatchPricing
+from EquipmentMeta import EquipmentMeta
+from Tariffs import Tariff
+
+def test_batch_quotes_match_per_unit_cost(fleet):
+    units, durations = fleet(90), (1, 2, 3, 4.5, 5, 6, 8, 24)
+    expected = [[unit.calculate_rental_cost(hours) for hours in durations] for unit in units]
+    assert BatchPricing.quote(units, durations) == expected
+
+def test_compiled_tariff_matches_threshold_rule():
+    rng = random.Random(0)
+    tiered = Tariff([(3, 0.95), (5, 0.9), (24, 0.8), (48, 0.7)])
+    rules = [(48, 0.7), (24, 0.8), (5, 0.9), (3, 0.95)]
+
+    def rule(rate, hours):
+        for threshold, discount in rules:
+            if hours >= threshold:
+                return rate * hours * discount
+        return rate * hours
+
+    for _ in range(2000):
+        rate, hours = rng.randint(50, 300), rng.choice((0.5, 1, 2, 3, 4.5, 5, 6, 8, 24, 48))
+        assert tiered.cost(rate, hours) == rule(rate, hours)
+
+def test_cost_cache_follows_rate_and_extras(fleet, rentals):
+    units = fleet(60)
+    history = rentals(units)
+    rng = random.Random(0)
+    with Logger.silenced():
+        [rental.total_cost for rental in history]
+        for unit in rng.sample(units, 6):
+            unit.hourly_rate = unit.hourly_rate + 10
+        for rental in rng.sample(history, 6):
+            rental.add_extra('insurance', 30.0)
+        cached = [rental.total_cost for rental in history]
+        for rental in history:
+            rental.invalidate_cost()
+        assert cached == [rental.total_cost for rental in history]
+
+def test_tariff_swap_reprices_open_rentals(fleet, rentals):
+    history = rentals(fleet(30))
+    with Logger.silenced():
+        before = [rental.total_cost for rental in history]
+        previous = {name: EquipmentMeta.lookup(name).tariff for name in EquipmentMeta.declared}
+        EquipmentMeta.set_tariffs({name: Tariff(tariff.tiers, {'helmet': 10.0}) for name, tariff in previous.items()})
+        try:
+            swapped = [rental.total_cost for rental in history]
+        finally:
+            EquipmentMeta.set_tariffs(previous)
+        restored = [rental.total_cost for rental in history]
+    assert swapped == [cost + (10.0 if rental.extras and 'helmet' in rental.extras else 0.0)
+                       for cost, rental in zip(before, history)]
+    assert restored == before
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+import pytest
+import Logger
+from BookingCalendar import BookingCalendar
+from Customer import Customer
+from Errors import InvalidEquipmentError, RentalNotFoundError
+
+START = datetime(2025, 1, 1, 10)
+
+def test_close_frees_unit_once_and_rejects_early_end(fleet):
+    unit, = fleet(1)
+    changes = []
+    unit.subscribe(lambda unit, field, old, new: changes.append((old, new)))
+    with Logger.silenced():
+        rental = unit.rent_equipment(Customer('c1', 'Анна'), START, START + timedelta(hours=3))
+        with pytest.raises(InvalidEquipmentError):
+            rental.close(START - timedelta(hours=1))
+        assert not rental.closed and not unit.is_available
+        rental.close(START + timedelta(hours=2))
+        with pytest.raises(RentalNotFoundError):
+            rental.close()
+    assert unit.is_available and rental.hours == 2
+    assert changes == [(True, False), (False, True)]
+
+def test_close_cancels_calendar_booking(fleet):
+    unit, = fleet(1)
+    calendar = BookingCalendar()
+    calendar.register(unit)
+    end = START + timedelta(hours=4)
+    with Logger.silenced():
+        rental = unit.reserve_equipment(calendar, Customer('c1', 'Анна'), START, end)
+        assert rental.calendar is calendar
+        assert not calendar.is_free(unit.equipment_id, START, end)
+        rental.close(START + timedelta(hours=1))
+    assert calendar.is_free(unit.equipment_id, START, end)
+    assert calendar.unit(unit.equipment_id).bookings() == []
+
+def test_extras_are_copied_and_writes_reprice(fleet):
+    unit, = fleet(1)
+    extras = {'helmet': 10.0}
+    with Logger.silenced():
+        rental = unit.rent_equipment(Customer('c1', 'Анна'), START, START + timedelta(hours=2), extras)
+        cost = rental.total_cost
+        extras['lock'] = 500.0
+        assert rental.total_cost == cost and rental.extras == {'helmet': 10.0}
+        rental.extras['lock'] = 5.0
+        assert rental.total_cost == cost + 5.0
+        rental.extras['lock'] = 7.0
+        assert rental.calculate_total() == cost + 7.0
+        del rental.extras['lock']
+        assert rental.total_cost == cost
+    assert extras == {'helmet': 10.0, 'lock': 500.0}
+    assert type(rental.extras) is dict and rental.to_dict()['extras'] == {'helmet': 10.0}
+
+def test_failed_close_is_rolled_back(fleet, monkeypatch):
+    unit, = fleet(1)
+    end = START + timedelta(hours=3)
+    with Logger.silenced():
+        rental = unit.rent_equipment(Customer('c1', 'Анна'), START, end)
+        rental.total_cost_approved = rental.calculate_total()
+        approved = rental.total_cost_approved
+        with monkeypatch.context() as patch:
+            patch.setattr(type(unit), 'release', lambda unit: 1 / 0)
+            with pytest.raises(ZeroDivisionError):
+                rental.close(START + timedelta(hours=5))
+        assert not rental.closed and rental.end_time == end and rental.total_cost_approved == approved
+        assert rental.total_cost == rental.calculate_total()
+        rental.close()
+    assert rental.closed and unit.is_available and rental.end_time == end
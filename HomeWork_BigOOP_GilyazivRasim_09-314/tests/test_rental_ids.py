@@ -0,0 +1,60 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+from datetime import datetime
+import Logger
+from Customer import Customer
+from Rental import Rental
+from RentalIds import IdGenerator, MAX_WORKER, rental_ids
+from Storage import SQLiteRepository
+from conftest import ROOT
+
+def test_ids_are_unique_across_threads_and_increase_per_thread():
+    generator, threads = IdGenerator(worker_id=5), 8
+    issued = [[] for _ in range(threads)]
+    workers = [threading.Thread(target=lambda number: issued[number].extend(generator.next_rental_id() for _ in range(2000))
+                                , args=(number,)) for number in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len({rental_id for ids in issued for rental_id in ids}) == 2000 * threads
+    assert all(ids == sorted(ids) for ids in issued)
+
+def test_range_scan_matches_filter_and_storage(fleet):
+    clock = iter(range(1750000000 * 10 ** 9, 1760000000 * 10 ** 9, 10 ** 7))
+    timed = IdGenerator(worker_id=5, clock=lambda: next(clock))
+    units = fleet(20)
+    with Logger.silenced():
+        customer = Customer('ids', 'Range scan')
+        history = [Rental(timed.next_rental_id(), customer, units[i % len(units)], datetime(2025, 1, 1)
+                          , datetime(2025, 1, 1, 2)) for i in range(1000)]
+    start_time = IdGenerator.created_at(history[300].rental_id)
+    end_time = IdGenerator.created_at(history[450].rental_id)
+    matched = IdGenerator.created_between(history, start_time, end_time)
+    assert matched == [rental for rental in history
+                       if start_time <= IdGenerator.created_at(rental.rental_id) <= end_time]
+    assert len(matched) == 151
+    with Logger.silenced(), SQLiteRepository() as repository:
+        repository.save_all(rentals=history)
+        stored = [row[0] for row in repository.rental_rows_created_between(start_time, end_time)]
+    assert stored == [rental.rental_id for rental in matched]
+
+def worker_of_child(queue):
+    queue.put(rental_ids.worker_id)
+
+def test_each_process_gets_its_own_worker_id(tmp_path):
+    probe = 'import os, RentalIds; print(RentalIds.rental_ids.worker_id, os.getpid() & RentalIds.MAX_WORKER)'
+    environment = {key: value for key, value in os.environ.items() if key != 'RENTAL_WORKER_ID'}
+    environment['PYTHONPATH'] = ROOT
+    own, derived = subprocess.run([sys.executable, '-c', probe], cwd=tmp_path, env=environment
+                                  , capture_output=True, text=True, check=True).stdout.split()
+    assert own == derived
+    if hasattr(os, 'fork'):
+        queue = multiprocessing.get_context('fork').SimpleQueue()
+        child = multiprocessing.get_context('fork').Process(target=worker_of_child, args=(queue,))
+        child.start()
+        child.join()
+        assert queue.get() == child.pid & MAX_WORKER
@@ -0,0 +1,70 @@
+import io
+import os
+import pytest
+import Logger
+from Checkpoint import Checkpoint
+from FleetStore import CustomerStore
+from Customer import Customer
+from Errors import InvalidEquipmentError
+from Ledger import RentalLedger, LedgerView
+from Serialization import BinarySerializer
+
+def test_binary_round_trip_keeps_rentals(fleet, rentals):
+    history = rentals(fleet(40))
+    buffer = io.BytesIO()
+    with Logger.silenced():
+        BinarySerializer.dump_stream(history, buffer)
+        buffer.seek(0)
+        decoded = list(BinarySerializer.load_stream(buffer))
+    assert [rental.to_dict() for rental in decoded] == [rental.to_dict() for rental in history]
+    assert [type(rental.equipment.hourly_rate) for rental in decoded] == [int] * len(history)
+    unit = history[1].equipment
+    unit.hourly_rate = 99.5
+    with Logger.silenced():
+        restored = BinarySerializer.decode(BinarySerializer.encode(unit))
+    assert restored.to_dict() == unit.to_dict()
+    assert [type(value) for value in restored.to_dict().values()] == [type(value) for value in unit.to_dict().values()]
+
+def test_nul_in_a_string_field_is_rejected_on_encode(fleet):
+    unit, = fleet(1)
+    unit.name = 'broken\0name'
+    with pytest.raises(InvalidEquipmentError):
+        BinarySerializer.encode(unit)
+    with pytest.raises(InvalidEquipmentError):
+        BinarySerializer.encode(Customer.restore('c1', 'Анна\0'))
+
+def test_customer_store_matches_objects():
+    with Logger.silenced():
+        customers = [Customer(str(i), f'customer_{i}') for i in range(20)]
+    store = CustomerStore()
+    for customer in customers:
+        store.append(customer.customer_id, customer.name)
+    assert [view.to_dict() for view in store] == [customer.to_dict() for customer in customers]
+
+def test_ledger_totals_match_objects(fleet, rentals, tmp_path):
+    history = rentals(fleet(50))
+    with Logger.silenced():
+        for rental in history:
+            rental.total_cost_approved = rental.total_cost
+        with RentalLedger(os.path.join(tmp_path, 'rentals.ledger')) as ledger:
+            ledger.append_many(history)
+            path = ledger.path
+        with LedgerView(path) as view:
+            revenue, hours = view.revenue(), view.hours()
+    assert abs(revenue - sum(rental.total_cost_approved for rental in history)) < 1e-6 * revenue
+    assert abs(hours - sum(rental.hours for rental in history)) < 1e-6 * hours
+
+def test_checkpoint_restores_state_and_shared_references(fleet, rentals, tmp_path):
+    units = fleet(30)
+    state = {'equipment': units, 'rentals': rentals(units)}
+    checkpoint = Checkpoint(os.path.join(tmp_path, 'state.snapshot'))
+    with Logger.silenced():
+        for unit in units[::7]:
+            unit.subscribe(lambda *change: None)
+        checkpoint.save(state)
+        restored = checkpoint.load()
+        assert [rental.to_dict() for rental in restored['rentals']] == [rental.to_dict() for rental in state['rentals']]
+        assert restored['rentals'][0].equipment is restored['equipment'][0]
+        checkpoint.save_in_background(state)
+        assert checkpoint.wait()
+        assert len(checkpoint.load()['rentals']) == len(units)
@@ -0,0 +1,9 @@
+from datetime import datetime
+import Logger
+from Benchmarks import fleet_rows
+from Simulation import SeasonSimulation
+
+def test_result_does_not_depend_on_worker_count():
+    simulation = SeasonSimulation(fleet_rows(300), datetime(2025, 1, 1), days=5, demand=2.0, seed=7)
+    with Logger.silenced():
+        assert simulation.run(workers=1) == simulation.run(workers=2)
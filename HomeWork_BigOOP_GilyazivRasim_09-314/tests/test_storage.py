@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+import pytest
+import Logger
+from Customer import Customer
+from EquipmentFactory import EquipmentFactory
+from Errors import InvalidEquipmentError
+from Rental import Rental
+from Storage import SQLiteRepository
+
+START = datetime(2025, 1, 1, 10)
+
+def make_rentals():
+    with Logger.silenced():
+        unit = EquipmentFactory.create_equipment('skis', '1', 'skis_1', 'good', 100, 150)
+        customer = Customer('storage', 'Storage')
+        first = Rental('rent_1', customer, unit, START, START + timedelta(hours=2))
+        second = Rental('rent_1', customer, unit, START + timedelta(days=1), START + timedelta(days=1, hours=3))
+    return first, second
+
+def test_duplicate_rental_id_fails_and_keeps_first_row():
+    first, second = make_rentals()
+    with SQLiteRepository() as repository:
+        repository.save_all(rentals=[first])
+        with pytest.raises(InvalidEquipmentError):
+            repository.save_rentals([second])
+        rows = repository.rental_rows_for_equipment('skis', '1')
+    assert [row[4] for row in rows] == [START.timestamp()]
+
+def test_update_rentals_replaces_explicitly():
+    first, _ = make_rentals()
+    with SQLiteRepository() as repository:
+        repository.save_rentals([first])
+        with Logger.silenced():
+            first.extend(START + timedelta(hours=5))
+        repository.update_rentals([first])
+        rows = repository.rental_rows_for_equipment('skis', '1')
+    assert len(rows) == 1 and rows[0][5] == (START + timedelta(hours=5)).timestamp()
@@ -0,0 +1,88 @@
+import random
+from datetime import datetime, timedelta
+import Events
+import Logger
+from Customer import Customer
+from Rental import Rental
+from TimerWheel import TimerWheel, RentalExpiry
+
+ORIGIN = 1750000000.0
+
+def test_wheel_fires_each_pending_timer_once():
+    rng, fired = random.Random(24), []
+    wheel = TimerWheel(start=ORIGIN)
+    timers = [wheel.schedule(ORIGIN + rng.uniform(1, 30 * 86400), fired.append, i) for i in range(20000)]
+    for timer in timers[::10]:
+        wheel.cancel(timer)
+    pending = len(wheel)
+    wheel.advance(ORIGIN + 30 * 86400 + 1)
+    assert sorted(fired) == [i for i in range(20000) if i % 10]
+    assert len(fired) == pending and len(wheel) == 0
+    assert not any(timer.pending for timer in timers)
+
+def test_expiry_follows_extend_and_early_close(fleet):
+    start = datetime.fromtimestamp(ORIGIN)
+    wheel = TimerWheel(start=ORIGIN)
+    expiry = RentalExpiry(wheel)
+    with Logger.silenced():
+        customer = Customer('expiry', 'Auto return')
+        expiry.attach()
+        try:
+            history = []
+            for i, unit in enumerate(fleet(200)):
+                unit.is_available = False
+                rental = Rental(f'rent_{i}', customer, unit, start, start + timedelta(hours=1 + i % 48))
+                Events.bus.emit(Events.RENTAL_CONFIRMED, rental)
+                history.append(rental)
+            for rental in history[::4]:
+                rental.extend(rental.end_time + timedelta(hours=24))
+            for rental in history[1::4]:
+                rental.close(rental.end_time - timedelta(minutes=30))
+            wheel.advance(ORIGIN + 24 * 3600 + 1800)
+            assert not any(rental.closed for rental in history[::4])
+            wheel.advance(ORIGIN + 80 * 3600)
+        finally:
+            expiry.detach()
+    assert len(expiry) == 0 and len(wheel) == 0
+    returned = set(history[1::4])
+    assert all(rental.closed and rental.equipment.is_available for rental in history)
+    assert all(rental.total_cost_approved == rental.calculate_total() for rental in history if rental not in returned)
+
+def test_timer_fired_between_extend_and_reschedule_is_ignored(fleet):
+    start = datetime.fromtimestamp(ORIGIN)
+    wheel, bus = TimerWheel(start=ORIGIN), Events.EventBus()
+    expiry = RentalExpiry(wheel)
+    unit, = fleet(1)
+    with Logger.silenced():
+        rental = unit.rent_equipment(Customer('race', 'Race'), start, start + timedelta(hours=2))
+        expiry.attach(bus)
+        bus.emit(Events.RENTAL_CONFIRMED, rental)
+        rental.extend(start + timedelta(hours=5))
+        wheel.advance(ORIGIN + 3 * 3600)
+        assert not rental.closed and not unit.is_available
+        bus.emit(Events.RENTAL_EXTENDED, rental, 2.0, None)
+        wheel.advance(ORIGIN + 6 * 3600)
+        expiry.detach(bus)
+    assert rental.closed and rental.hours == 5 and unit.is_available and len(expiry) == 0
+
+def test_cost_is_approved_before_the_close_event(fleet):
+    start = datetime.fromtimestamp(ORIGIN)
+    wheel = TimerWheel(start=ORIGIN)
+    expiry, seen = RentalExpiry(wheel), []
+
+    def closed(rental, old_hours, old_cost):
+        seen.append((rental.total_cost_approved, old_cost))
+
+    with Logger.silenced():
+        unit, = fleet(1)
+        unit.is_available = False
+        rental = Rental('rent_expiry', Customer('expiry', 'Auto return'), unit, start, start + timedelta(hours=3))
+        expiry.attach()
+        Events.bus.subscribe(Events.RENTAL_CLOSED, closed)
+        try:
+            Events.bus.emit(Events.RENTAL_CONFIRMED, rental)
+            wheel.advance(ORIGIN + 4 * 3600)
+        finally:
+            Events.bus.unsubscribe(Events.RENTAL_CLOSED, closed)
+            expiry.detach()
+    assert seen == [(rental.calculate_total(), rental.calculate_total())]
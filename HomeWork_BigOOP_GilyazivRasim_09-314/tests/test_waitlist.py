@@ -0,0 +1,185 @@
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+import Events
+import Logger
+from BookingCalendar import BookingCalendar
+from Customer import Customer
+from EquipmentCatalog import EquipmentCatalog
+from RentalProcess import OnlineRentalProcess
+from TimerWheel import TimerWheel
+import Waitlist as WaitlistModule
+from EquipmentFactory import EquipmentFactory
+from Waitlist import Waitlist, ASSIGNED, EXPIRED, PRICE_TOLERANCE, WAITING
+
+OPENING = datetime(2025, 1, 1, 10)
+TYPES = ('bicycle', 'skis', 'tennisracket')
+
+def peak_day(requests=800):
+    rng = random.Random(25)
+    with Logger.silenced():
+        customers = [Customer(f'waiting_{i}', f'waiting_{i}') for i in range(20)]
+    demand = []
+    for i in range(requests):
+        start_time = OPENING + timedelta(minutes=30 * rng.randint(0, 16))
+        demand.append((customers[i % len(customers)], TYPES[i % len(TYPES)], start_time
+                       , start_time + timedelta(hours=rng.randint(1, 8)), rng.uniform(100, 2400)))
+    return customers, demand
+
+def occupied(fleet, customer, units=60):
+    return [unit.rent_equipment(customer, OPENING - timedelta(hours=3), OPENING - timedelta(hours=1))
+            for unit in fleet(units)]
+
+def test_freed_units_go_to_the_best_affordable_request(fleet):
+    customers, demand = peak_day()
+    with Logger.silenced(logging.CRITICAL):
+        taken = occupied(fleet, customers[0])
+        waitlist = Waitlist(clock=lambda: OPENING - timedelta(hours=1))
+        for rental in taken:
+            waitlist.watch(rental.equipment)
+        tickets = [waitlist.request(*row) for row in demand]
+        for rental in taken:
+            rental.close()
+    assigned = [ticket for ticket in tickets if ticket.rental is not None]
+    assert assigned
+    assert all(ticket.rental.total_cost_approved <= ticket.max_price * (1 + PRICE_TOLERANCE) for ticket in assigned)
+    assert len({ticket.rental.equipment.equipment_id for ticket in assigned}) == len(assigned)
+    assert len(waitlist) == len(demand) - len(assigned)
+    assert all(ticket.wait(0) is ticket.rental for ticket in assigned)
+
+    with Logger.silenced(logging.CRITICAL):
+        taken = occupied(fleet, customers[0])
+        pending = [(-Waitlist.max_rate(row[1], (row[3] - row[2]).total_seconds() / 3600, row[4], None)
+                    , row[2], i, row) for i, row in enumerate(demand)]
+        served = []
+        for rental in taken:
+            rental.close()
+            unit = rental.equipment
+            kind = EquipmentCatalog.equipment_type(unit)
+            best = None
+            for index, item in enumerate(pending):
+                if item[3][1] == kind and -item[0] >= unit.hourly_rate and (best is None or item < pending[best]):
+                    best = index
+            if best is not None:
+                customer, _, start_time, end_time, _ = pending.pop(best)[3]
+                process = OnlineRentalProcess(f'scan_{len(served)}', customer, unit, start_time, end_time)
+                served.append((unit.equipment_id, customer.customer_id, start_time, process.rent_equipment().end_time))
+    assert sorted((ticket.rental.equipment.equipment_id, ticket.customer.customer_id, ticket.start_time
+                   , ticket.end_time) for ticket in assigned) == sorted(served)
+
+def test_request_expires_on_the_wheel():
+    customers, _ = peak_day(0)
+    with Logger.silenced(logging.CRITICAL):
+        wheel = TimerWheel(start=OPENING.timestamp())
+        waitlist = Waitlist(wheel=wheel, clock=lambda: OPENING)
+        ticket = waitlist.request(customers[0], 'skis', OPENING + timedelta(hours=1), OPENING + timedelta(hours=3), 1000.0)
+        wheel.advance((OPENING + timedelta(hours=1)).timestamp())
+    assert ticket.state == EXPIRED and len(waitlist) == 0
+
+def rounding_edge(tolerance, monkeypatch):
+    monkeypatch.setattr(WaitlistModule, 'PRICE_TOLERANCE', tolerance)
+    with Logger.silenced():
+        unit = EquipmentFactory.create_equipment('bicycle', '1', 'bike', 'good', 338924.3919361567, 'Mountain')
+        unit.is_available = False
+        waitlist = Waitlist(clock=lambda: OPENING - timedelta(hours=1))
+        waitlist.watch(unit)
+        ticket = waitlist.request(Customer('edge', 'edge'), 'bicycle', OPENING, OPENING + timedelta(hours=25)
+                                  , 7795261.014531604)
+        freeing = threading.Thread(target=setattr, args=(unit, 'is_available', True), daemon=True)
+        freeing.start()
+        freeing.join(5)
+    assert not freeing.is_alive()
+    return waitlist, ticket
+
+def test_rounding_at_the_price_cap_is_tolerated(monkeypatch):
+    waitlist, ticket = rounding_edge(PRICE_TOLERANCE, monkeypatch)
+    assert ticket.state == ASSIGNED and len(waitlist) == 0
+
+def test_unaffordable_top_entry_is_skipped_not_respun(monkeypatch):
+    waitlist, ticket = rounding_edge(0.0, monkeypatch)
+    assert ticket.state == WAITING and len(waitlist) == 1 and waitlist.waiting('bicycle') == 1
+
+def test_freed_unit_is_assigned_after_the_close_completes(fleet):
+    unit, = fleet(1)
+    seen = []
+    with Logger.silenced():
+        customer = Customer('first', 'first')
+        rental = unit.rent_equipment(customer, OPENING - timedelta(hours=3), OPENING - timedelta(hours=1))
+        waitlist = Waitlist(clock=lambda: OPENING - timedelta(hours=1))
+        waitlist.watch(unit)
+        ticket = waitlist.request(Customer('next', 'next'), 'bicycle', OPENING, OPENING + timedelta(hours=2), 10 ** 6)
+
+        def closed(rental, old_hours, old_cost):
+            seen.append((ticket.state, unit.is_available))
+
+        Events.bus.subscribe(Events.RENTAL_CLOSED, closed)
+        try:
+            rental.close()
+        finally:
+            Events.bus.unsubscribe(Events.RENTAL_CLOSED, closed)
+    assert seen == [(WAITING, True)]
+    assert ticket.state == ASSIGNED and not unit.is_available
+
+def test_calendar_windows_and_cancellations_drive_assignment(fleet):
+    first, second = fleet(6)[1:5:3]
+    calendar = BookingCalendar()
+    with Logger.silenced():
+        customer = Customer('booked', 'booked')
+        for unit in (first, second):
+            calendar.register(unit)
+        morning = [unit.reserve_equipment(calendar, customer, OPENING, OPENING + timedelta(hours=4)) for unit in (first, second)]
+        waitlist = Waitlist(clock=lambda: OPENING - timedelta(hours=1), calendar=calendar)
+        waitlist.attach()
+        try:
+            later = waitlist.request(Customer('later', 'later'), 'skis', OPENING + timedelta(hours=5)
+                                     , OPENING + timedelta(hours=7), 10 ** 6)
+            overlapping = waitlist.request(Customer('overlap', 'overlap'), 'skis', OPENING + timedelta(hours=1)
+                                           , OPENING + timedelta(hours=3), 10 ** 6)
+            assert later.state == ASSIGNED and overlapping.state == WAITING
+            morning[1].close()
+        finally:
+            waitlist.detach()
+    assert overlapping.state == ASSIGNED and overlapping.rental.equipment is second
+    assert overlapping.rental.calendar is calendar
+    assert not calendar.is_free(second.equipment_id, OPENING + timedelta(hours=1), OPENING + timedelta(hours=2))
+
+def test_callbacks_run_outside_the_waitlist_lock(fleet):
+    unit, = fleet(1)
+    now, outcomes = [OPENING - timedelta(hours=2)], []
+    with Logger.silenced():
+        rental = unit.rent_equipment(Customer('first', 'first'), OPENING - timedelta(hours=3), OPENING - timedelta(hours=1))
+        waitlist = Waitlist(clock=lambda: now[0])
+        lock = waitlist._Waitlist__lock
+
+        def probe(ticket):
+            acquired = lock.acquire(timeout=1)
+            outcomes.append((ticket.state, acquired))
+            if acquired:
+                lock.release()
+
+        def done(ticket):
+            prober = threading.Thread(target=probe, args=(ticket,))
+            prober.start()
+            prober.join()
+
+        waitlist.watch(unit)
+        stale = waitlist.request(Customer('stale', 'stale'), 'bicycle', OPENING, OPENING + timedelta(hours=1), 10 ** 6
+                                 , expires=OPENING - timedelta(hours=1), on_done=done)
+        fresh = waitlist.request(Customer('fresh', 'fresh'), 'bicycle', OPENING, OPENING + timedelta(hours=1), 10 ** 5
+                                 , on_done=done)
+        now[0] = OPENING - timedelta(minutes=30)
+        rental.close()
+    assert stale.state == EXPIRED and fresh.state == ASSIGNED
+    assert outcomes == [(EXPIRED, True), (ASSIGNED, True)]
+
+def test_watch_offers_a_free_unit_off_the_caller_thread(fleet):
+    unit, = fleet(1)
+    threads = []
+    with Logger.silenced(logging.CRITICAL):
+        waitlist = Waitlist(clock=lambda: OPENING - timedelta(hours=1))
+        ticket = waitlist.request(Customer('next', 'next'), 'bicycle', OPENING, OPENING + timedelta(hours=2), 10 ** 6
+                                  , on_done=lambda ticket: threads.append(threading.get_ident()))
+        waitlist.watch(unit)
+        assert ticket.wait(5) is not None
+    assert threads and threads[0] != threading.get_ident()